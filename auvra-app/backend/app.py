@@ -3,21 +3,55 @@ Main FastAPI Application
 Auvra Hormone Assessment API
 """
 
+import hmac
+import json
 import os
-from fastapi import FastAPI, HTTPException, status, Request
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Literal, Optional, Union
+from fastapi import FastAPI, HTTPException, status, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import ValidationError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from models.schemas import CompleteAssessmentRequest, AssessmentResponse
-from services.assessment_service import AssessmentService
+from models.schemas import (
+    CompleteAssessmentRequest, AssessmentResponse, AssessmentResponseRefs, CounterfactualResponse,
+    LabBatchRequest, LabBatchResponse, LabPanelEvaluation, LabFindingResult,
+    CycleCalendarResponse, ScoreHistoryResponse, ScorePoint, UserIdResponse
+)
+from services.assessment_service import AssessmentService, DETAIL_FIELDS, SELECTABLE_FIELDS
+from services.lab_reference import lab_reference_engine, LabUnitError
+from services.cycle_calculator import CycleStatistics
+from services.content_store import ContentStore, content_hash
+from services.assessment_store import AssessmentStore, create_backend
+from services.population_percentiles import PopulationPercentiles
+from services.hormone_scorer import INITIAL_HORMONE_SCORES
+from services.score_history import RESOLUTIONS, choose_resolution
+from services.idempotency import MAX_KEY_LENGTH, IdempotencyConflict, IdempotencyStore, StoredReply
+from services.tracing import FileSpanExporter, Tracer, TracingMiddleware, current_span
+from services.profiling import MODES as PROFILING_MODES, ProfileCapture, ProfilerBusy
+from services.response_encoding import JSON_MEDIA_TYPE, encode, encode_model, negotiate, transcode
+from services.user_ids import UserIds
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write out queued assessments and this worker's population shard before the process exits
+    population.close()
+    assessment_store.close()
+    tracer.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Auvra Hormone Assessment API",
     description="AI-powered hormone assessment and analysis",
     version="1.0.0",
@@ -34,9 +68,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request tracing: spans for TRACE_SAMPLE_RATE of requests (and those arriving with a sampled
+# traceparent) are written to TRACE_EXPORT_PATH as OTLP/JSON lines; unset = tracing off
+trace_export_path = os.getenv("TRACE_EXPORT_PATH")
+tracer = Tracer(
+    FileSpanExporter(trace_export_path) if trace_export_path else None,
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Initialize assessment service
 gemini_api_key = os.getenv("GEMINI_API_KEY")
-assessment_service = AssessmentService(gemini_api_key)
+# Completed assessments are persisted write-behind (ASSESSMENT_STORE_URL, default SQLite file)
+assessment_store = AssessmentStore(create_backend(os.getenv("ASSESSMENT_STORE_URL", "sqlite:///assessments.db")))
+
+# Population score percentiles, synced with the other workers every POPULATION_SYNC_SECONDS
+population = PopulationPercentiles(
+    assessment_store.backend,
+    interval=float(os.getenv("POPULATION_SYNC_SECONDS", "60")),
+    min_population=int(os.getenv("POPULATION_MIN_SIZE", "100"))
+)
+
+# STAGE_WORKERS > 0 runs blocking stages (the Gemini call) on a pool alongside answer scoring
+assessment_service = AssessmentService(
+    gemini_api_key,
+    stage_workers=int(os.getenv("STAGE_WORKERS", "0")),
+    assessment_store=assessment_store,
+    population=population
+)
+
+# MEMORY_PROFILE=1: trace allocations per pipeline stage (reported under /health "memory"; slow)
+if os.getenv("MEMORY_PROFILE", "0") == "1":
+    assessment_service.enable_memory_profiling()
+
+# Explanation templates and recommendation sets served by hash (?content=refs)
+# are written through to the assessment store, so any worker can serve any hash.
+# They hold no user data (factors stay in the reply), so shared caches may keep them
+content_store = ContentStore(backend=assessment_store.backend)
+CONTENT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Stored assessments never change, but they are personal health data
+STORED_ASSESSMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Replies to POST /api/v1/assess by Idempotency-Key, so client retries don't re-run the pipeline
+idempotency_store = IdempotencyStore(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+)
+
+# Returning users' ids are issued by POST /api/v1/users and signed with USER_ID_SECRET
+# (the same on every worker); unset = a per-process secret, ids valid until restart
+user_ids = UserIds(os.getenv("USER_ID_SECRET"))
+if user_ids.ephemeral:
+    print("[USERS][WARN] USER_ID_SECRET not set: issued user ids are only valid on this worker until it restarts")
+
+# Bearer token for /api/v1/admin/*; unset = admin endpoints disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# On-demand profiling of this worker's next assessments (POST /api/v1/admin/profile)
+profile_capture = ProfileCapture()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contains this (strong) ETag, or "*" """
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+
+def _require_issued_user_id(assessment: CompleteAssessmentRequest) -> None:
+    """Reject a user_id the server did not issue: it would read and extend someone else's history"""
+    if assessment.user_id is not None and not user_ids.verify(assessment.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"error": "Unknown user_id", "message": "Use a user_id issued by POST /api/v1/users"}
+        )
+
+
+def _selected_fields(fields: Optional[str], detail: Optional[str]) -> Optional[List[str]]:
+    """Requested response fields, or None for the full AssessmentResponse"""
+    if fields is None:
+        return None if detail in (None, "full") else list(DETAIL_FIELDS[detail])
+    selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in SELECTABLE_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid fields",
+                "unknown": unknown,
+                "allowed": list(SELECTABLE_FIELDS)
+            }
+        )
+    return selected
 
 
 @app.get("/health")
@@ -45,15 +166,38 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Auvra Hormone Assessment API",
-        "version": "1.0"
+        "version": "1.0",
+        "caches": {
+            "explanations": assessment_service.explanation_generator.cache_stats()
+        },
+        "stages": assessment_service.stage_stats.snapshot(),
+        **({"memory": assessment_service.stage_memory.snapshot()} if assessment_service.stage_memory is not None else {}),
+        "store": assessment_store.stats(),
+        "population": population.stats(),
+        "idempotency": idempotency_store.stats(),
+        "tracing": tracer.stats()
     }
 
 
-@app.post("/api/v1/assess", response_model=AssessmentResponse)
-async def assess_hormones(assessment: CompleteAssessmentRequest, request: Request):
+@app.post("/api/v1/assess", response_model=Union[AssessmentResponse, AssessmentResponseRefs])
+async def assess_hormones(
+    assessment: CompleteAssessmentRequest,
+    request: Request,
+    content: Literal["inline", "refs"] = Query(
+        "inline", description="'refs' replaces explanation/recommendations with content hashes"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields; only the stages they need are run"
+    ),
+    detail: Optional[Literal["full", "scores"]] = Query(
+        None, description="'scores' returns scores, confidence and cycle context only (ignored when fields is set)"
+    ),
+    use_llm: bool = Query(True, description="false skips LLM interpretation of 'others' free text")
+):
     """
     Complete hormone assessment endpoint
     Accepts full assessment data and returns detailed results
+    (JSON, or MessagePack/CBOR for Accept: application/msgpack / application/cbor)
     """
     # Debug logging of incoming request payload (after successful model parsing)
     print("[ASSESS] Incoming payload parsed successfully:")
@@ -65,11 +209,84 @@ async def assess_hormones(assessment: CompleteAssessmentRequest, request: Reques
         except Exception:
             print("[ASSESS] Could not dump assessment model")
 
+    _require_issued_user_id(assessment)
+    selected = _selected_fields(fields, detail)
+    media_type = negotiate(request.headers.get("accept"))
+
+    async def compute() -> StoredReply:
+        # The pipeline (and its Gemini call) runs off the event loop
+        args = (assessment, selected, content, use_llm, media_type)
+        if profile_capture.capturing:
+            return await run_in_threadpool(profile_capture.run, _assess_reply, *args)
+        return await run_in_threadpool(_assess_reply, *args)
+
+    idempotency_key = request.headers.get("idempotency-key")
+    if idempotency_key is None:
+        reply = await compute()
+        return Response(content=reply.body, status_code=reply.status_code, media_type=reply.media_type,
+                        headers={"Vary": "Accept"})
+
+    if not idempotency_key.strip() or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Invalid Idempotency-Key", "max_length": MAX_KEY_LENGTH}
+        )
+    # Same key, same query, encoding and body: a retry. Same key, anything else: a client bug
+    fingerprint = content_hash(
+        request.url.query.encode("utf-8") + b"\n" + media_type.encode("ascii") + b"\n" + await request.body()
+    )
+    # Keys are per client: the issued user_id, else the client address
+    scope = assessment.user_id or f"client:{request.client.host if request.client else ''}"
+    span = current_span()
+    try:
+        reply, replayed = await idempotency_store.run((scope, idempotency_key), fingerprint, compute)
+    except IdempotencyConflict:
+        if span is not None:
+            span.set_attribute("idempotency.conflict", True)
+        print(f"[ASSESS][WARN] Idempotency-Key {idempotency_key!r} reused with a different request")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "error": "Idempotency-Key reused with a different request",
+                "idempotency_key": idempotency_key
+            }
+        )
+    if span is not None:
+        span.set_attribute("idempotency.replayed", replayed)
+    if replayed:
+        print(f"[ASSESS] Replaying stored reply for Idempotency-Key {idempotency_key!r}")
+    headers = {"Vary": "Accept", "Idempotent-Replayed": "true"} if replayed else {"Vary": "Accept"}
+    return Response(content=reply.body, status_code=reply.status_code, media_type=reply.media_type, headers=headers)
+
+
+def _assess_reply(
+    assessment: CompleteAssessmentRequest,
+    selected: Optional[List[str]],
+    content: str,
+    use_llm: bool,
+    media_type: str = JSON_MEDIA_TYPE
+) -> StoredReply:
+    """Run the assessment and serialize the reply in the negotiated encoding (errors raise HTTPException)"""
     try:
+        if selected is not None or not use_llm:
+            # Partial pipeline: run only the stages behind the selected fields
+            selected = selected or list(DETAIL_FIELDS["full"])
+            outputs = assessment_service.assess_outputs(assessment, selected, use_llm=use_llm)
+            body = jsonable_encoder({field: outputs[field] for field in selected})
+            print("[ASSESS] Partial assessment processed. Fields:", list(body))
+            if content == "refs":
+                content_store.externalize(body)
+            return StoredReply(status.HTTP_200_OK, encode(body, media_type), media_type)
+
         # Process assessment
         result = assessment_service.process_complete_assessment(assessment)
         print("[ASSESS] Assessment processed. Primary hormone:", result.primary_imbalance.hormone)
-        return result
+        if content == "refs":
+            body = result.model_dump(mode="json")
+            content_store.externalize(body)
+            return StoredReply(status.HTTP_200_OK, encode(body, media_type), media_type)
+        # JSON is serialized straight from the model, same bytes as JSONResponse
+        return StoredReply(status.HTTP_200_OK, encode_model(result, media_type), media_type)
     except ValidationError as e:
         print("[ASSESS][ERROR] ValidationError during processing:")
         for err in e.errors():
@@ -81,6 +298,12 @@ async def assess_hormones(assessment: CompleteAssessmentRequest, request: Reques
                 "details": e.errors()
             }
         )
+    except LabUnitError as e:
+        print(f"[ASSESS][ERROR] Lab unit error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Invalid lab units", "message": str(e)}
+        )
     except Exception as e:
         print(f"[ASSESS][ERROR] Unexpected exception: {e}")
         raise HTTPException(
@@ -92,6 +315,156 @@ async def assess_hormones(assessment: CompleteAssessmentRequest, request: Reques
         )
 
 
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}\n\n"
+
+
+@app.post("/api/v1/assess/stream")
+async def assess_hormones_stream(
+    assessment: CompleteAssessmentRequest,
+    use_llm: bool = Query(True, description="false skips LLM interpretation of 'others' free text")
+):
+    """
+    Streamed assessment (Server-Sent Events)
+    `scores` event: deterministic scores, primary/secondary hormones and cycle context (before the LLM)
+    `result` event: the complete AssessmentResponse
+    """
+    _require_issued_user_id(assessment)
+    def events():
+        try:
+            for event, data in assessment_service.stream_assessment(assessment, use_llm=use_llm):
+                yield _sse_event(event, data)
+        except LabUnitError as e:
+            print(f"[ASSESS][STREAM][ERROR] Lab unit error: {e}")
+            yield _sse_event("error", {"error": "Invalid lab units", "message": str(e)})
+        except Exception as e:
+            print(f"[ASSESS][STREAM][ERROR] Unexpected exception: {e}")
+            yield _sse_event("error", {"error": "Internal server error", "message": str(e)})
+
+    # A sync generator: Starlette iterates it in the thread pool, so the LLM call never blocks the loop
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/v1/assessments/{assessment_id}", response_model=AssessmentResponse)
+async def get_assessment(assessment_id: str, request: Request):
+    """
+    Re-open a stored assessment by metadata.assessment_id
+    Returns the bytes stored when it was computed (no model rebuild); strong ETag.
+    MessagePack/CBOR (Accept) are transcoded from them, with their own ETag
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    # Store reads run on the thread pool: the event loop never waits on the database
+    span = current_span()
+    if span is None:
+        stored = await run_in_threadpool(assessment_store.get_response, assessment_id)
+    else:
+        with span.child("store.get_response") as lookup:
+            stored = await run_in_threadpool(assessment_store.get_response, assessment_id)
+            lookup.set_attribute("store.found", stored is not None)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "Assessment not found", "assessment_id": assessment_id}
+        )
+    
+    # Each representation has its own strong ETag
+    etag = f'"{stored.etag}"' if media_type == JSON_MEDIA_TYPE else f'"{stored.etag}.{media_type.rpartition("/")[2]}"'
+    headers = {"ETag": etag, "Cache-Control": STORED_ASSESSMENT_CACHE_CONTROL, "Vary": "Accept"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=transcode(stored.body, media_type), media_type=media_type, headers=headers)
+
+
+@app.post("/api/v1/users", response_model=UserIdResponse, status_code=status.HTTP_201_CREATED)
+async def create_user():
+    """
+    Issue a user_id for a returning user
+    Send it with each assessment to build their score history; it is the only
+    credential for reading that history, so keep it private
+    """
+    return UserIdResponse(user_id=user_ids.issue())
+
+
+@app.get("/api/v1/users/{user_id}/scores", response_model=ScoreHistoryResponse)
+async def user_score_history(
+    user_id: str,
+    resolution: Literal["auto", "raw", "week", "month"] = Query(
+        "auto", description="'auto' picks the finest resolution whose whole history fits in one page"
+    ),
+    hormones: Optional[str] = Query(None, description="Comma-separated hormones (default: all)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """
+    Per-hormone score series across a user's assessments (requests sent with user_id)
+    Pages go back in time; each page is one index range scan
+    """
+    if not user_ids.verify(user_id):
+        # Same answer as any other unknown user: never issued, so it has no history
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "User not found"}
+        )
+    selected = None
+    if hormones:
+        selected = [h.strip() for h in hormones.split(",") if h.strip()]
+        unknown = [h for h in selected if h not in INITIAL_HORMONE_SCORES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": "Unknown hormones", "unknown": unknown, "allowed": list(INITIAL_HORMONE_SCORES)}
+            )
+    
+    before = None
+    if cursor:
+        # Cursors carry their resolution so 'auto' cannot switch between pages
+        resolution, _, before = cursor.partition(":")
+    
+    summary = await run_in_threadpool(assessment_store.history_summary, user_id)
+    if resolution == "auto":
+        resolution = choose_resolution(summary, limit) if summary else "raw"
+    try:
+        if resolution not in RESOLUTIONS or (cursor and not before):
+            raise ValueError(f"Malformed cursor: {cursor!r}")
+        points = await run_in_threadpool(
+            assessment_store.score_history, user_id, resolution, before=before, limit=limit
+        ) if summary else []
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Invalid cursor", "message": str(e)}
+        )
+    
+    points.reverse()  # oldest to newest within the page
+    series = {}
+    for hormone in selected or INITIAL_HORMONE_SCORES:
+        series[hormone] = [
+            ScorePoint(
+                at=point.at,
+                score=point.scores[hormone][0],
+                min=point.scores[hormone][1],
+                max=point.scores[hormone][2],
+                count=point.count,
+                assessment_id=point.assessment_id
+            )
+            for point in points if hormone in point.scores
+        ]
+    
+    return ScoreHistoryResponse(
+        user_id=user_id,
+        resolution=resolution,
+        total_assessments=summary.count if summary else 0,
+        first_assessed_at=summary.first_at if summary else None,
+        last_assessed_at=summary.last_at if summary else None,
+        series=series,
+        next_cursor=f"{resolution}:{points[0].key}" if len(points) == limit else None
+    )
+
+
 @app.post("/api/v1/assess/quick")
 async def quick_assess(data: dict):
     """
@@ -114,14 +487,20 @@ async def quick_assess(data: dict):
             lab_results=None
         )
         
-        result = assessment_service.process_complete_assessment(quick_request)
+        # Scores and confidence only: explanations, flags and next steps are never built
+        outputs = assessment_service.assess_outputs(
+            quick_request,
+            ("primary_hormone", "scoring", "confidence"),
+            use_llm=data.get("use_llm", True)
+        )
+        primary = outputs["scoring"].hormone_scores[outputs["primary_hormone"]]
         
         # Return simplified response
         return {
-            "primary_hormone": result.primary_imbalance.hormone,
-            "direction": result.primary_imbalance.direction,
-            "confidence": result.confidence.level,
-            "score": result.primary_imbalance.total_score
+            "primary_hormone": outputs["primary_hormone"],
+            "direction": primary["direction"],
+            "confidence": outputs["confidence"].level,
+            "score": primary["total"]
         }
         
     except Exception as e:
@@ -131,6 +510,139 @@ async def quick_assess(data: dict):
         )
 
 
+@app.post("/api/v1/assess/counterfactuals", response_model=CounterfactualResponse)
+async def assess_counterfactuals(assessment: CompleteAssessmentRequest):
+    """
+    Counterfactual analysis endpoint
+    Returns which single answers, if different, would change the primary/secondary
+    imbalances or the confidence level (deterministic scoring, no LLM calls)
+    """
+    _require_issued_user_id(assessment)  # a returning user's cycle statistics come from their history
+    try:
+        # One scoring pass per perturbation: keep it off the event loop
+        return await run_in_threadpool(assessment_service.analyze_counterfactuals, assessment)
+    except LabUnitError as e:
+        print(f"[COUNTERFACTUAL][ERROR] Lab unit error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Invalid lab units", "message": str(e)}
+        )
+    except Exception as e:
+        print(f"[COUNTERFACTUAL][ERROR] Unexpected exception: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Internal server error",
+                "message": str(e)
+            }
+        )
+
+
+@app.post("/api/v1/labs/evaluate", response_model=LabBatchResponse)
+async def evaluate_lab_panels(batch: LabBatchRequest):
+    """
+    Evaluate one or many lab panels against the reference table
+    Returns per-panel 'from_labs' contributions in canonical units
+    """
+    try:
+        all_findings = lab_reference_engine.evaluate_panels(batch.panels, batch.cycle_phases)
+    except LabUnitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Invalid lab units", "message": str(e)}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": str(e)}
+        )
+    
+    return LabBatchResponse(evaluations=[
+        LabPanelEvaluation(
+            from_labs=lab_reference_engine.summarize(findings),
+            findings=[
+                LabFindingResult(
+                    analyte=analyte,
+                    hormone=hormone,
+                    points=points,
+                    direction=direction,
+                    value=value,
+                    factor=factor
+                )
+                for analyte, hormone, points, direction, value, factor in findings
+            ]
+        )
+        for findings in all_findings
+    ])
+
+
+@app.get("/api/v1/cycle/calendar", response_model=CycleCalendarResponse)
+async def cycle_calendar(
+    last_period_date: date,
+    cycle_length: str = Query(..., description='Cycle length bucket (e.g. "26-30") or days (e.g. "29")'),
+    start_date: Optional[date] = None,
+    days: int = Query(90, ge=1, le=366),
+    luteal_length: Optional[int] = Query(
+        None, ge=10, le=14, description="cycle_context.luteal_length_estimate of the user's assessment"
+    )
+):
+    """
+    Forecast phase calendar for one user
+    Projects cycles forward from the last period date for the requested range.
+    A cycle length in days is treated like a period history mean, as /assess does:
+    ovulation falls a luteal length (estimated from the cycle length unless given)
+    before the next period. Buckets keep the day-14 default
+    """
+    cycle_calculator = assessment_service.cycle_calculator
+    if cycle_length.isdigit():
+        length = int(cycle_length)
+        if not 15 <= length <= 90:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": "cycle_length in days must be between 15 and 90"}
+            )
+        follicular_end = length - (luteal_length or CycleStatistics.luteal_days(length))
+    else:
+        length = cycle_length
+        parsed = cycle_calculator._parse_cycle_length(cycle_length)
+        if parsed is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": f"Unknown cycle_length '{cycle_length}'"}
+            )
+        follicular_end = parsed - luteal_length if luteal_length else None
+    
+    return cycle_calculator.phase_calendar(
+        last_period_date,
+        length,
+        start_date or date.today(),
+        days,
+        follicular_end
+    )
+
+
+@app.get("/api/v1/content/{content_hash}")
+async def get_content_block(content_hash: str, request: Request):
+    """
+    Explanation template or recommendation set referenced by an assessment (content=refs)
+    Blocks are immutable: strong ETag, cacheable for a year
+    """
+    block = content_store.get_cached(content_hash)
+    if block is None:
+        # Not cached by this worker: read the store on the thread pool
+        block = await run_in_threadpool(content_store.get, content_hash)
+    if block is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "Unknown content hash", "message": "Re-run the assessment to re-issue this block"}
+        )
+    
+    headers = {"ETag": block.etag, "Cache-Control": CONTENT_CACHE_CONTROL}
+    if _etag_matches(request, block.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=block.body, media_type=block.media_type, headers=headers)
+
+
 @app.post("/api/v1/validate/others")
 async def validate_others_input(data: dict):
     """
@@ -162,6 +674,74 @@ async def validate_others_input(data: dict):
         )
 
 
+def _require_admin(request: Request) -> None:
+    """Allow only requests carrying `Authorization: Bearer <ADMIN_TOKEN>`"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"error": "Admin endpoints are disabled", "message": "Set ADMIN_TOKEN to enable them"}
+        )
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"error": "Invalid admin token"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+@app.post("/api/v1/admin/profile", status_code=status.HTTP_202_ACCEPTED)
+async def start_profile(
+    request: Request,
+    assessments: Optional[int] = Query(None, ge=1, le=10000, description="Profile this worker's next N assessments"),
+    seconds: Optional[float] = Query(None, gt=0, le=3600, description="Profile assessments started in the next T seconds"),
+    mode: Literal["cprofile", "sample"] = Query("cprofile", description="'cprofile' -> pstats file, 'sample' -> collapsed stacks")
+):
+    """
+    Start profiling POST /api/v1/assess on the worker serving this request
+    Ends after `assessments` assessments or `seconds` seconds, whichever comes first
+    """
+    _require_admin(request)
+    if assessments is None and seconds is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Give assessments, seconds or both", "modes": list(PROFILING_MODES)}
+        )
+    try:
+        capture = profile_capture.start(mode, assessments, seconds)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": "A capture is already running", "capture": profile_capture.status()}
+        )
+    print(f"[PROFILE] Capture started: mode={mode} assessments={assessments} seconds={seconds}")
+    return capture
+
+
+@app.get("/api/v1/admin/profile")
+async def profile_status(request: Request):
+    """State of this worker's current or last capture"""
+    _require_admin(request)
+    return profile_capture.status()
+
+
+@app.get("/api/v1/admin/profile/download")
+async def download_profile(request: Request):
+    """The finished capture as a pstats file (cprofile) or collapsed stacks (sample)"""
+    _require_admin(request)
+    result = profile_capture.result()
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if profile_capture.capturing else status.HTTP_404_NOT_FOUND,
+            detail={"error": "No finished capture", "capture": profile_capture.status()}
+        )
+    return Response(
+        content=result.body,
+        media_type=result.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{result.filename}"'}
+    )
+
+
 if __name__ == '__main__':
     import uvicorn
     
@@ -176,8 +756,17 @@ if __name__ == '__main__':
     print("\n📋 Available Endpoints:")
     print(f"  GET  /health                    - Health check")
     print(f"  POST /api/v1/assess             - Complete assessment")
+    print(f"  POST /api/v1/assess/stream      - Streamed assessment (SSE)")
+    print(f"  GET  /api/v1/assessments/{{id}}  - Stored assessment")
+    print(f"  POST /api/v1/users              - Issue a user id (score history)")
+    print(f"  GET  /api/v1/users/{{id}}/scores - Score history (per hormone)")
     print(f"  POST /api/v1/assess/quick       - Quick assessment")
+    print(f"  POST /api/v1/assess/counterfactuals - What would change the result")
+    print(f"  POST /api/v1/labs/evaluate      - Evaluate lab panels (batch)")
+    print(f"  GET  /api/v1/cycle/calendar     - Forecast phase calendar")
+    print(f"  GET  /api/v1/content/{{hash}}     - Explanation/recommendation block")
     print(f"  POST /api/v1/validate/others    - Validate custom input")
+    print(f"  POST /api/v1/admin/profile      - Profile the next assessments (ADMIN_TOKEN)")
     print(f"  GET  /docs                      - Interactive API documentation (Swagger)")
     print(f"  GET  /redoc                     - Alternative API documentation (ReDoc)")
     print("=" * 60)
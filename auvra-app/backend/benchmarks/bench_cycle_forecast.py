@@ -0,0 +1,59 @@
+"""
+Benchmark: nightly phase forecast for one million user-days
+Compares CycleCalculator.forecast_phases with a per-day _determine_phase loop
+
+Usage: python benchmarks/bench_cycle_forecast.py [users] [days]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.cycle_calculator import CycleCalculator
+
+
+def naive_forecast(calculator, last_period_dates, cycle_lengths, start_date, days):
+    """Reference implementation: one date subtraction and phase lookup per user-day"""
+    result = []
+    for last_period, length in zip(last_period_dates, cycle_lengths):
+        phases = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            since = (day - last_period).days
+            phases.append(calculator._determine_phase(since % length, length) if since >= 0 else None)
+        result.append(phases)
+    return result
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 11_112
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+
+    rng = random.Random(42)
+    start_date = date(2025, 11, 1)
+    last_period_dates = [start_date - timedelta(days=rng.randint(0, 60)) for _ in range(users)]
+    cycle_lengths = [rng.randint(21, 40) for _ in range(users)]
+    calculator = CycleCalculator()
+
+    started = time.perf_counter()
+    phases, next_periods = calculator.forecast_phases(last_period_dates, cycle_lengths, start_date, days)
+    vectorized = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = naive_forecast(calculator, last_period_dates, cycle_lengths, start_date, days)
+    naive = time.perf_counter() - started
+
+    assert phases == expected, "forecast_phases disagrees with per-day reference"
+
+    user_days = users * days
+    print(f"user-days:       {user_days:,}")
+    print(f"forecast_phases: {vectorized:.3f}s ({user_days / vectorized:,.0f} user-days/s)")
+    print(f"per-day loop:    {naive:.3f}s ({user_days / naive:,.0f} user-days/s)")
+    print(f"speedup:         {naive / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: memory per assessment, by pipeline step
+Runs seeded assessments (stubbed Gemini) under tracemalloc and reports, per
+stage, the memory it leaves allocated, its peak above its start and the net
+allocated blocks; then the same for whole assessments split into pipeline,
+response model and JSON serialization, plus garbage collections per 100
+assessments.
+
+Usage: python benchmarks/bench_memory.py [assessments] [--json]
+"""
+
+import contextlib
+import gc
+import json
+import os
+import statistics
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.payloads import PayloadGenerator
+from benchmarks.suite import stub_llm
+from models.schemas import AssessmentResponse
+from services import memory_profile
+from services.assessment_service import RESPONSE_FIELDS, AssessmentService
+from services.response_encoding import model_json
+
+PHASES = ("pipeline", "response_model", "serialize")
+
+
+def summary(deltas):
+    return {
+        "mean_allocated_kib": round(statistics.mean(d.allocated for d in deltas) / 1024, 2),
+        "mean_peak_kib": round(statistics.mean(d.peak for d in deltas) / 1024, 2),
+        "max_peak_kib": round(max(d.peak for d in deltas) / 1024, 2),
+        "mean_blocks": round(statistics.mean(d.blocks for d in deltas), 1),
+    }
+
+
+def assessment_memory(service, requests):
+    """Each phase of each assessment measured on its own; the assessment's peak is the
+    highest phase peak counted from the assessment's start"""
+    measured = {phase: [] for phase in PHASES + ("assessment",)}
+    for request in requests:
+        start = memory_profile.begin()
+        highest = 0
+
+        def phase(name, fn):
+            nonlocal highest
+            mark = memory_profile.begin()
+            result = fn()
+            measured[name].append(memory_profile.delta(mark))
+            highest = max(highest, mark.traced - start.traced + measured[name][-1].peak)
+            return result
+
+        outputs = phase("pipeline", lambda: service.assess_outputs(request, RESPONSE_FIELDS))
+        response = phase("response_model", lambda: AssessmentResponse(**{f: outputs[f] for f in RESPONSE_FIELDS}))
+        phase("serialize", lambda: model_json(response))
+        del outputs, response
+        end = memory_profile.delta(start)
+        measured["assessment"].append(memory_profile.MemoryDelta(end.allocated, highest, end.blocks))
+    return {name: summary(deltas) for name, deltas in measured.items()}
+
+
+def main():
+    count = int(next((arg for arg in sys.argv[1:] if arg.isdigit()), 200))
+    generator = PayloadGenerator(11, free_text_rate=0.5, labs_rate=0.5)
+    requests = [generator.request() for _ in range(count)]
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        service = stub_llm(AssessmentService(gemini_api_key=None))
+        for request in requests[:20]:
+            service.process_complete_assessment(request)  # warm caches and lazy imports
+
+        collections = sum(generation["collections"] for generation in gc.get_stats())
+        for request in requests:
+            service.process_complete_assessment(request)
+        collections = sum(generation["collections"] for generation in gc.get_stats()) - collections
+
+        stages = service.enable_memory_profiling()  # starts tracemalloc
+        for request in requests:
+            service.assess_outputs(request, RESPONSE_FIELDS)
+        service.stage_memory = None  # stage measurements reset the peak the phases rely on
+        phases = assessment_memory(service, requests)
+        tracemalloc.stop()
+
+    report = {
+        "assessments": count,
+        "stages": stages.snapshot(),
+        "phases": phases,
+        "gc_collections_per_100": round(collections / count * 100, 1),
+    }
+    if "--json" in sys.argv:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{count} assessments; KiB per call (mean allocated = still held after the step)")
+    print(f"{'step':<20} {'allocated':>10} {'peak':>8} {'max peak':>9} {'blocks':>8}")
+    for section in ("stages", "phases"):
+        for name, row in report[section].items():
+            print(f"{name:<20} {row['mean_allocated_kib']:>10,.2f} {row['mean_peak_kib']:>8,.2f} "
+                  f"{row['max_peak_kib']:>9,.2f} {row['mean_blocks']:>8,.1f}")
+        print()
+    print(f"gc collections per 100 assessments (untraced): {report['gc_collections_per_100']}")
+
+
+if __name__ == "__main__":
+    main()
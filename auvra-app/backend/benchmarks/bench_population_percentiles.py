@@ -0,0 +1,70 @@
+"""
+Benchmark: population percentile costs vs population size
+Times the request-path work (annotating all hormones of one assessment, and
+recording it), a background sync against SQLite with several worker shards,
+and compares the sketch's answers with exact percentiles over the same scores.
+
+Usage: python benchmarks/bench_population_percentiles.py [workers]
+"""
+
+import bisect
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.assessment_store import SQLiteAssessmentBackend
+from services.hormone_scorer import INITIAL_HORMONE_SCORES
+from services.population_percentiles import PopulationPercentiles
+
+POPULATIONS = (1_000, 100_000, 1_000_000)
+REPEAT = 20_000
+
+
+def timed_us(fn, repeat=REPEAT):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rng = random.Random(42)
+    hormones = list(INITIAL_HORMONE_SCORES)
+    assessment = {hormone: rng.randint(0, 30) for hormone in hormones}
+
+    print(f"{workers} worker shards; times in us")
+    print(f"{'population':>10} {'annotate':>9} {'record':>7} {'sync':>9} {'max error':>10}")
+    for size in POPULATIONS:
+        backend = SQLiteAssessmentBackend(os.path.join(tempfile.mkdtemp(), "population.db"))
+        shards = [PopulationPercentiles(backend, interval=0, min_population=1) for _ in range(workers)]
+        exact = {hormone: [] for hormone in hormones}
+        for i in range(size):
+            scores = {hormone: max(0, int(rng.gauss(12, 6))) for hormone in hormones}
+            shards[i % workers].record(scores)
+            for hormone, score in scores.items():
+                exact[hormone].append(score)
+        for worker in shards:
+            worker.sync()
+        population = shards[0]
+        population.sync()  # its first sync ran before the other shards were saved
+
+        error = 0
+        for hormone, values in exact.items():
+            values.sort()
+            for score in range(0, 31):
+                truth = round(100 * bisect.bisect_left(values, score) / len(values))
+                error = max(error, abs(population.percentile(hormone, score) - truth))
+
+        annotate = timed_us(lambda: [population.percentile(h, score) for h, score in assessment.items()])
+        sync = timed_us(population.sync, repeat=20)
+        scratch = PopulationPercentiles()  # recording the same assessment REPEAT times would skew the shard
+        record = timed_us(lambda: scratch.record(assessment))
+        print(f"{size:>10,} {annotate:>9.2f} {record:>7.2f} {sync:>9.0f} {error:>9} pt")
+
+
+if __name__ == "__main__":
+    main()
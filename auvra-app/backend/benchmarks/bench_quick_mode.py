@@ -0,0 +1,71 @@
+"""
+Benchmark: /api/v1/assess/quick before and after demand-driven stage selection
+Before: full process_complete_assessment, then pick four fields.
+After: assess_outputs for scores and confidence only (with and without the LLM stage).
+Half of the requests carry an "others" free-text input so the LLM stage has work to do
+(without GEMINI_API_KEY that is the keyword fallback).
+
+Usage: python benchmarks/bench_quick_mode.py [requests]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.assessment_service import AssessmentService
+from tests.test_thread_safety import random_request
+
+QUICK_OUTPUTS = ("primary_hormone", "scoring", "confidence")
+
+
+def quick_before(service, request):
+    result = service.process_complete_assessment(request)
+    return (result.primary_imbalance.hormone, result.primary_imbalance.direction,
+            result.confidence.level, result.primary_imbalance.total_score)
+
+
+def quick_after(service, request, use_llm=True):
+    outputs = service.assess_outputs(request, QUICK_OUTPUTS, use_llm=use_llm)
+    primary = outputs["scoring"].hormone_scores[outputs["primary_hormone"]]
+    return (outputs["primary_hormone"], primary["direction"],
+            outputs["confidence"].level, primary["total"])
+
+
+def timed(fn, requests):
+    started = time.perf_counter()
+    results = [fn(r) for r in requests]
+    return results, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+    rng = random.Random(42)
+    requests = []
+    for _ in range(count):
+        request = random_request(rng)
+        if rng.random() < 0.5:
+            request.diagnosed_conditions.others_input = rng.choice(["PCOS", "hypothyroidism", "endometriosis"])
+        requests.append(request)
+    service = AssessmentService(gemini_api_key=None)
+
+    # The pipeline logs heavily; keep terminal I/O out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        before, before_time = timed(lambda r: quick_before(service, r), requests)
+        after, after_time = timed(lambda r: quick_after(service, r), requests)
+        _, no_llm_time = timed(lambda r: quick_after(service, r, use_llm=False), requests)
+
+    assert before == after, "quick results differ"
+
+    print(f"requests:              {count:,}")
+    print(f"before (full + pick):  {before_time:.3f}s ({before_time / count * 1e6:,.0f} us/req)")
+    print(f"after (scores only):   {after_time:.3f}s ({after_time / count * 1e6:,.0f} us/req)  {before_time / after_time:.2f}x")
+    print(f"after, use_llm=false:  {no_llm_time:.3f}s ({no_llm_time / count * 1e6:,.0f} us/req)  {before_time / no_llm_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
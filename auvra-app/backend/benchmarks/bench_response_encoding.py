@@ -0,0 +1,84 @@
+"""
+Benchmark: serializing assessment replies
+  json_response - model_dump(mode="json") rendered by JSONResponse (the previous path)
+  orjson        - model_dump(mode="json") encoded by orjson (refs/partial replies)
+  model_json    - pydantic-core writes the model straight to bytes (full JSON replies)
+  msgpack, cbor - what Accept: application/msgpack / application/cbor get
+Reports encode time and size per reply, raw and gzipped (as a proxy would send
+it), and decode time in Python as a rough stand-in for the client's parse.
+JSON encodings are checked byte for byte against json_response, binary ones
+for decoding to the same data.
+
+Usage: python benchmarks/bench_response_encoding.py [assessments] [repeat]
+"""
+
+import contextlib
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cbor2
+import msgpack
+from fastapi.responses import JSONResponse
+
+from benchmarks.payloads import PayloadGenerator
+from benchmarks.suite import stub_llm
+from services.assessment_service import AssessmentService
+from services.response_encoding import CBOR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode_model, json_bytes, model_json
+
+# name -> (encode, decode); JSON encodings are compared byte for byte
+ENCODINGS = {
+    "json_response": (lambda response: JSONResponse(response.model_dump(mode="json")).body, json.loads),
+    "orjson": (lambda response: json_bytes(response.model_dump(mode="json")), json.loads),
+    "model_json": (model_json, json.loads),
+    "msgpack": (lambda response: encode_model(response, MSGPACK_MEDIA_TYPE), msgpack.unpackb),
+    "cbor": (lambda response: encode_model(response, CBOR_MEDIA_TYPE), cbor2.loads),
+}
+
+
+def per_call_us(fn, items, repeat):
+    """Median over `repeat` passes of the mean time per item"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        runs.append((time.perf_counter() - started) / len(items) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    generator = PayloadGenerator(17, free_text_rate=0.3, labs_rate=0.5, history_rate=0.5)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        service = stub_llm(AssessmentService(gemini_api_key=None))
+        service.assessment_store = None
+        responses = [service.process_complete_assessment(generator.request()) for _ in range(count)]
+
+    baseline = [ENCODINGS["json_response"][0](response) for response in responses]
+    print(f"{count} assessments, median of {repeat} passes, per reply")
+    print(f"{'encoding':<15} {'encode us':>10} {'speedup':>8} {'bytes':>8} {'gzipped':>8} {'decode us':>10} {'same':>9}")
+    reference = None
+    for name, (encode, decode) in ENCODINGS.items():
+        bodies = [encode(response) for response in responses]
+        if decode is json.loads:
+            same = sum(body == expected for body, expected in zip(bodies, baseline))
+        else:
+            same = sum(decode(body) == json.loads(expected) for body, expected in zip(bodies, baseline))
+        took = per_call_us(encode, responses, repeat)
+        reference = reference or took
+        size = statistics.mean(len(body) for body in bodies)
+        gzipped = statistics.mean(len(gzip.compress(body, 6)) for body in bodies)
+        decoded = per_call_us(decode, bodies, repeat)
+        print(f"{name:<15} {took:>10.1f} {reference / took:>7.1f}x {size:>8,.0f} {gzipped:>8,.0f} {decoded:>10.1f} "
+              f"{same:>5}/{count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: building the AssessmentResponse model tree
+  validated - the model's constructor (what the service uses)
+  construct - pydantic's model_construct, no validation
+Per model from ready values (a composite response, an imbalance with its
+lists, a flat score), for reference against a whole assessment (stubbed
+Gemini), and FastAPI's response_model round trip (dump + validate + dump)
+that POST /api/v1/assess avoids by returning the serialized bytes itself.
+
+Usage: python benchmarks/bench_response_models.py [assessments] [repeat]
+"""
+
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.payloads import PayloadGenerator
+from benchmarks.suite import stub_llm
+from models.schemas import AssessmentResponse, HormoneImbalance, HormoneScore
+from services.assessment_service import RESPONSE_FIELDS, AssessmentService
+
+
+def per_call_us(fn, items, repeat):
+    """Median over `repeat` passes of the mean time per item"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        runs.append((time.perf_counter() - started) / len(items) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    generator = PayloadGenerator(13, free_text_rate=0.3, labs_rate=0.5, history_rate=0.5)
+    requests = [generator.request() for _ in range(count)]
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        service = stub_llm(AssessmentService(gemini_api_key=None))
+        service.assessment_store = None  # measure construction, not the write-behind queue
+        outputs = [service.assess_outputs(request, RESPONSE_FIELDS) for request in requests]
+        responses = [service.process_complete_assessment(request) for request in requests]
+
+        models = {
+            "AssessmentResponse": (AssessmentResponse, [{f: o[f] for f in RESPONSE_FIELDS} for o in outputs]),
+            "HormoneImbalance": (HormoneImbalance, [dict(r.primary_imbalance) for r in responses]),
+            "HormoneScore": (HormoneScore, [dict(s) for r in responses for s in r.all_hormone_scores.values()]),
+        }
+        rows = {}
+        for name, (model, values) in models.items():
+            rows[name] = (
+                per_call_us(lambda v: model(**v), values, repeat),
+                per_call_us(lambda v: model.model_construct(**v), values, repeat),
+            )
+        whole = per_call_us(service.process_complete_assessment, requests, repeat)
+        round_trip = per_call_us(
+            lambda r: AssessmentResponse.model_validate(r.model_dump()).model_dump(mode="json"), responses, repeat
+        )
+
+    print(f"{count} assessments, median of {repeat} passes, us per call")
+    print(f"{'':<20} {'validated':>10} {'construct':>10}")
+    for name, (validated, construct) in rows.items():
+        print(f"{name:<20} {validated:>10.2f} {construct:>10.2f}")
+    print(f"whole assessment: {whole:.1f} us")
+    print(f"response_model round trip (avoided by returning bytes): {round_trip:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
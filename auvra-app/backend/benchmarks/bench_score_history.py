@@ -0,0 +1,78 @@
+"""
+Benchmark: score history page latency vs history length (SQLite backend)
+Writes synthetic histories of increasing length (one assessment a day on
+average) and times the newest page, a page deep in the history (keyset
+cursor) and the auto-resolution page the trend screen loads.
+
+Usage: python benchmarks/bench_score_history.py [page_size]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.assessment_store import PendingAssessment, SQLiteAssessmentBackend
+from services.hormone_scorer import INITIAL_HORMONE_SCORES
+from services.score_history import choose_resolution
+
+LENGTHS = (10, 1_000, 10_000, 50_000)
+REPEAT = 200
+
+
+def write_history(backend, user_id, length, rng):
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    records = [
+        PendingAssessment(
+            f"{user_id}-{i}", user_id,
+            (start + timedelta(days=i, minutes=rng.randint(0, 1439))).isoformat(),
+            "{}", b"{}",
+            {h: rng.randint(0, 20) for h in INITIAL_HORMONE_SCORES}
+        )
+        for i in range(length)
+    ]
+    for i in range(0, length, 1_000):
+        backend.write_batch(records[i:i + 1_000])
+
+
+def timed_us(fn):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - started) / REPEAT * 1e6
+
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(42)
+    backend = SQLiteAssessmentBackend(os.path.join(tempfile.mkdtemp(), "history.db"))
+    for length in LENGTHS:
+        write_history(backend, f"user{length}", length, rng)
+
+    print(f"page size {page_size}; times in us per query")
+    print(f"{'history':>8} {'newest raw':>11} {'deep raw':>10} {'auto':>12}")
+    for length in LENGTHS:
+        user_id = f"user{length}"
+        newest = backend.score_history(user_id, "raw", None, page_size)
+        middle = backend.score_history(user_id, "raw", None, length // 2 + 1)[-1].key
+
+        def auto():
+            summary = backend.history_summary(user_id)
+            return backend.score_history(user_id, choose_resolution(summary, page_size), None, page_size)
+
+        resolution = choose_resolution(backend.history_summary(user_id), page_size)
+        print(
+            f"{length:>8,} "
+            f"{timed_us(lambda: backend.score_history(user_id, 'raw', None, page_size)):>11.0f} "
+            f"{timed_us(lambda: backend.score_history(user_id, 'raw', middle, page_size)):>10.0f} "
+            f"{timed_us(auto):>7.0f} ({resolution})"
+        )
+        assert len(newest) == min(length, page_size)
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: assessment stage graph, inline vs thread-pool scheduling
+Runs the same requests with stage_workers=0 (every stage on the request thread)
+and with a stage pool, first with the fallback LLM and then with the LLM call
+replaced by a fixed sleep so network latency can overlap answer scoring.
+Prints mean per-stage timings from StageStats.
+
+Usage: python benchmarks/bench_stage_graph.py [requests] [llm_latency_ms]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.assessment_service import AssessmentService
+from tests.test_thread_safety import comparable, random_request
+
+
+def make_requests(count):
+    rng = random.Random(42)
+    requests = []
+    for _ in range(count):
+        request = random_request(rng)
+        request.diagnosed_conditions.others_input = "PCOS"  # every request has an LLM stage
+        requests.append(request)
+    return requests
+
+
+def with_llm_latency(service, seconds):
+    process = service.llm_service.process_both_others_inputs
+
+    def slow(*args, **kwargs):
+        time.sleep(seconds)
+        return process(*args, **kwargs)
+    service.llm_service.process_both_others_inputs = slow
+    return service
+
+
+def timed(service, requests):
+    started = time.perf_counter()
+    results = [comparable(service.process_complete_assessment(r)) for r in requests]
+    return results, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 2.0) / 1000
+    requests = make_requests(count)
+    slow_requests = requests[:max(1, count // 10)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inline = AssessmentService(gemini_api_key=None, stage_workers=0)
+        pooled = AssessmentService(gemini_api_key=None, stage_workers=4)
+        expected, inline_time = timed(inline, requests)
+        results, pooled_time = timed(pooled, requests)
+        assert results == expected, "stage pool results differ"
+
+        slow_inline = with_llm_latency(AssessmentService(gemini_api_key=None, stage_workers=0), latency)
+        slow_pooled = with_llm_latency(AssessmentService(gemini_api_key=None, stage_workers=4), latency)
+        _, slow_inline_time = timed(slow_inline, slow_requests)
+        _, slow_pooled_time = timed(slow_pooled, slow_requests)
+
+    print(f"requests:                      {count:,}")
+    print(f"inline stages:                 {inline_time / count * 1e6:,.0f} us/req")
+    print(f"stage pool:                    {pooled_time / count * 1e6:,.0f} us/req")
+    print(f"inline, LLM +{latency * 1000:.1f}ms:          {slow_inline_time / len(slow_requests) * 1e6:,.0f} us/req")
+    print(f"stage pool, LLM +{latency * 1000:.1f}ms:      {slow_pooled_time / len(slow_requests) * 1e6:,.0f} us/req")
+    print("\nmean stage time (stage pool, fallback LLM):")
+    for name, stat in pooled.stage_stats.snapshot().items():
+        print(f"  {name:<16} {stat['mean_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: re-opening a stored assessment
+  rebuild - parse stored JSON, construct AssessmentResponse, serialize again
+            (what GET /api/v1/assessments/{id} did before storing response bytes)
+  bytes   - read the stored canonical bytes and ETag, return them as-is
+Measured at the store level and end to end through the ASGI app (the rebuild
+path is mounted on a benchmark-only route with response_model validation).
+
+Usage: python benchmarks/bench_stored_retrieval.py [assessments] [lookups]
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["ASSESSMENT_STORE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import httpx
+from httpx import ASGITransport
+
+from app import app, assessment_service, assessment_store
+from models.schemas import AssessmentResponse
+from tests.test_thread_safety import random_request
+
+
+@app.get("/bench/rebuild/{assessment_id}", response_model=AssessmentResponse)
+async def rebuild_assessment(assessment_id: str):
+    return AssessmentResponse(**assessment_store.get(assessment_id).response)
+
+
+def per_call_us(fn, ids):
+    started = time.perf_counter()
+    for assessment_id in ids:
+        fn(assessment_id)
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+async def endpoint_us(url, ids):
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        started = time.perf_counter()
+        for assessment_id in ids:
+            resp = await client.get(url.format(assessment_id))
+            assert resp.status_code == 200
+        return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    rng = random.Random(42)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ids = [
+            assessment_service.process_complete_assessment(random_request(rng)).assessment_metadata.assessment_id
+            for _ in range(count)
+        ]
+    assessment_store.flush()
+    sample = [rng.choice(ids) for _ in range(lookups)]
+
+    def rebuild(assessment_id):
+        model = AssessmentResponse(**assessment_store.get(assessment_id).response)
+        return json.dumps(model.model_dump(mode="json")).encode("utf-8")
+
+    def stored_bytes(assessment_id):
+        return assessment_store.get_response(assessment_id).body
+
+    assert json.loads(rebuild(ids[0])) == json.loads(stored_bytes(ids[0]))
+
+    print(f"stored assessments: {count:,}, lookups: {lookups:,}")
+    print(f"store, rebuild:     {per_call_us(rebuild, sample):8.1f} us")
+    print(f"store, bytes:       {per_call_us(stored_bytes, sample):8.1f} us")
+    print(f"ASGI, rebuild:      {asyncio.run(endpoint_us('/bench/rebuild/{}', sample)):8.1f} us")
+    print(f"ASGI, bytes:        {asyncio.run(endpoint_us('/api/v1/assessments/{}', sample)):8.1f} us")
+    assessment_store.close()
+
+
+if __name__ == "__main__":
+    main()
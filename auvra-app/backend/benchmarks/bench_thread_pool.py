@@ -0,0 +1,51 @@
+"""
+Benchmark: assessment throughput on a thread pool with shared pipeline components
+Runs the same requests serially and through ThreadPoolExecutor, checks results match
+
+Usage: python benchmarks/bench_thread_pool.py [requests] [workers]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.assessment_service import AssessmentService
+from tests.test_thread_safety import comparable, random_request
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    rng = random.Random(42)
+    requests = [random_request(rng) for _ in range(count)]
+    service = AssessmentService(gemini_api_key=None)
+
+    # The pipeline logs heavily; keep terminal I/O out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        started = time.perf_counter()
+        serial = [service.process_complete_assessment(r) for r in requests]
+        serial_time = time.perf_counter() - started
+        sink.seek(0)
+        sink.truncate()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pooled = list(pool.map(service.process_complete_assessment, requests))
+        pooled_time = time.perf_counter() - started
+
+    assert [comparable(r) for r in serial] == [comparable(r) for r in pooled], "thread pool results differ"
+
+    print(f"assessments:          {count:,}")
+    print(f"serial:               {serial_time:.3f}s ({count / serial_time:,.0f}/s)")
+    print(f"thread pool ({workers:>2}):     {pooled_time:.3f}s ({count / pooled_time:,.0f}/s)")
+    print(f"ratio:                {serial_time / pooled_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
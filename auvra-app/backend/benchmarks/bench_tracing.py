@@ -0,0 +1,102 @@
+"""
+Benchmark: tracing overhead per request
+Times what an unsampled request pays (the middleware pass-through and one
+current_span() check per instrumented call) and a complete assessment through
+the ASGI app with tracing off, on but unsampled, and sampled into memory.
+
+Usage: python benchmarks/bench_tracing.py [requests]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ASSESSMENT_STORE_URL", "memory://")
+import httpx
+
+from benchmarks.payloads import PayloadGenerator
+from services.tracing import MemorySpanExporter, Tracer, TracingMiddleware, current_span
+
+REPEAT = 200_000
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+def passthrough_us(app) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/assess", "headers": []}
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            await app(scope, None, None)
+        return (time.perf_counter() - started) / REPEAT * 1e6
+
+    return asyncio.run(run())
+
+
+def check_us() -> float:
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        if current_span() is not None:
+            raise AssertionError
+    return (time.perf_counter() - started) / REPEAT * 1e6
+
+
+async def assess_ms(client, bodies):
+    times = []
+    for body in bodies:
+        started = time.perf_counter()
+        resp = await client.post("/api/v1/assess", json=body)
+        times.append(time.perf_counter() - started)
+        assert resp.status_code == 200, resp.text
+    return statistics.median(times) * 1000
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    direct = passthrough_us(noop_app)
+    disabled = passthrough_us(TracingMiddleware(noop_app, Tracer()))
+    unsampled = passthrough_us(TracingMiddleware(noop_app, Tracer(MemorySpanExporter(), sample_rate=0.0)))
+    check = check_us()
+    print("unsampled request overhead (us)")
+    print(f"  middleware, tracing off:      {disabled - direct:6.2f}")
+    print(f"  middleware, rate 0:           {unsampled - direct:6.2f}")
+    print(f"  current_span() check (each):  {check:6.3f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+        from benchmarks.suite import stub_llm
+        stub_llm(app_module.assessment_service)
+    tracer = app_module.tracer
+    bodies = PayloadGenerator(7, free_text_rate=0.5).payloads(requests)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            results = {}
+            for label, exporter, rate in (
+                ("off", None, 1.0), ("rate 0", MemorySpanExporter(), 0.0), ("sampled", MemorySpanExporter(), 1.0)
+            ):
+                tracer.exporter, tracer.sample_rate = exporter, rate
+                await assess_ms(client, bodies[:20])  # warm up
+                results[label] = (await assess_ms(client, bodies), exporter)
+            return results
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run())
+    print(f"\nPOST /api/v1/assess, median of {requests} (ms)")
+    for label, (median, exporter) in results.items():
+        spans = f"  {len(exporter.spans) / (requests + 20):.1f} spans/request" if exporter is not None else ""
+        print(f"  {label:8} {median:6.3f}{spans}")
+
+
+if __name__ == "__main__":
+    main()
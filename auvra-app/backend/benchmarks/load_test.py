@@ -0,0 +1,206 @@
+"""
+Load test: drive the assessment endpoint with synthetic payloads
+Runs `concurrency` closed-loop clients, each sending the next generated
+payload as soon as its previous request completes, for a number of requests
+or a duration, and reports throughput and latency percentiles.
+
+Targets:
+  (default)      the app in-process through httpx.ASGITransport
+  --url URL      a running server, e.g. http://127.0.0.1:8000
+  --uvicorn N    start `uvicorn app:app` with N workers on --port, test it, stop it
+
+Usage:
+  python benchmarks/load_test.py --concurrency 16 --requests 2000
+  python benchmarks/load_test.py --uvicorn 4 --concurrency 64 --duration 30 --params detail=scores
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import secrets
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(BACKEND_DIR)
+
+import httpx
+
+from benchmarks.payloads import PayloadGenerator
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for code, count in statuses.items() if code != 200),
+        "statuses": {str(code): count for code, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99": round(percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Dict[str, str],
+    generator: PayloadGenerator,
+    concurrency: int,
+    requests: Optional[int],
+    duration: Optional[float]
+) -> Dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    issued: Dict[str, str] = {}  # generated returning-user id -> id issued by the server
+    payloads = iter(generator)
+    remaining = [requests]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining[0] is not None:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+        return True
+
+    async def client_loop():
+        while take():
+            body = next(payloads)
+            if body.get("user_id"):
+                if body["user_id"] not in issued:
+                    issued[body["user_id"]] = (await client.post("/api/v1/users")).json()["user_id"]
+                body["user_id"] = issued[body["user_id"]]
+            started = time.perf_counter()
+            try:
+                resp = await client.post(path, params=params, json=body)
+                await resp.aread()
+                statuses[resp.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def uvicorn_server(workers: int, port: int):
+    """Start uvicorn on localhost and wait until /health answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+        # Every worker must accept the user ids the others issued
+        env={**os.environ, "USER_ID_SECRET": os.getenv("USER_ID_SECRET") or secrets.token_hex(16)}
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn did not answer /health within 10s")
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def main_async(args) -> Dict:
+    params = dict(item.split("=", 1) for item in args.params)
+    generator = PayloadGenerator(
+        args.seed, labs_rate=args.labs_rate, free_text_rate=args.free_text_rate,
+        returning_users=args.returning_users
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    load = dict(path=args.path, params=params, generator=generator, concurrency=args.concurrency,
+                requests=None if args.duration else args.requests, duration=args.duration)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            return await run_load(client, **load)
+
+    # In-process: keep the app's store in memory and its pipeline logs out of the report
+    os.environ.setdefault("ASSESSMENT_STORE_URL", "memory://")
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app, assessment_service
+        if args.stub_llm:
+            from benchmarks.suite import stub_llm
+            stub_llm(assessment_service)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=60) as client:
+            return await run_load(client, **load)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--duration", type=float, help="seconds to run (overrides --requests)")
+    parser.add_argument("--path", default="/api/v1/assess")
+    parser.add_argument("--params", nargs="*", default=[], metavar="KEY=VALUE", help="query parameters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--labs-rate", type=float, default=0.3)
+    parser.add_argument("--free-text-rate", type=float, default=0.2)
+    parser.add_argument("--returning-users", type=int, default=0)
+    parser.add_argument("--stub-llm", action="store_true", help="in-process only: fixed Gemini answers, no network")
+    parser.add_argument("--url", help="test a running server instead of the in-process app")
+    parser.add_argument("--uvicorn", type=int, metavar="WORKERS", help="start a local uvicorn to test")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    target = args.url or "in-process ASGI"
+    if args.uvicorn:
+        with uvicorn_server(args.uvicorn, args.port) as url:
+            args.url = url
+            target = f"uvicorn x{args.uvicorn} ({url})"
+            report = asyncio.run(main_async(args))
+    else:
+        report = asyncio.run(main_async(args))
+    report = {"target": target, "path": args.path, "concurrency": args.concurrency, **report}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    latency = report["latency_ms"]
+    print(f"target:       {report['target']}  {report['path']}  concurrency {report['concurrency']}")
+    print(f"requests:     {report['requests']:,} in {report['seconds']}s  ({report['errors']} errors: {report['statuses']})")
+    print(f"throughput:   {report['throughput_rps']:,} req/s")
+    print(f"latency (ms): mean {latency['mean']}  p50 {latency['p50']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  max {latency['max']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Synthetic assessment payloads
+Samples plausible CompleteAssessmentRequest bodies from a seed. Each user is
+drawn from a clinical profile (PCOS-like, thyroid-like, stress, ...) that
+raises the odds of the answers that usually go with it; labs, free text,
+period history and returning user ids are optional extras with their own
+rates. The same seed and date always give the same payloads.
+
+Usage: python benchmarks/payloads.py [count] [seed]   (prints JSON lines)
+"""
+
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.schemas import (
+    CompleteAssessmentRequest, CycleDetailsRequest, DiagnosedConditionsRequest,
+    HealthConcernsRequest, PeriodPatternRequest
+)
+from services.counterfactual_analyzer import CONCERN_CATEGORIES, _literal_values
+
+PERIOD_PATTERNS = _literal_values(PeriodPatternRequest, "period_pattern")
+BIRTH_CONTROLS = _literal_values(PeriodPatternRequest, "birth_control")
+CYCLE_LENGTHS = _literal_values(CycleDetailsRequest, "cycle_length")
+CONCERNS = {category: _literal_values(HealthConcernsRequest, category) for category in CONCERN_CATEGORIES}
+CONDITIONS = _literal_values(DiagnosedConditionsRequest, "conditions")
+
+# Answers not listed get weight 1 / rate 0.1, so new schema values are still sampled
+PERIOD_PATTERN_WEIGHTS = {"regular": 5, "irregular": 3, "occasional_skips": 2, "no_periods": 0.5, "not_sure": 1}
+BIRTH_CONTROL_WEIGHTS = {"none": 6, "hormonal_pills": 2, "hormonal_iud": 1, "copper_iud": 1}
+CYCLE_LENGTH_WEIGHTS = {"<21": 0.5, "21-25": 2, "26-30": 5, "31-35": 2, "35+": 1.5, "not_sure": 1}
+CONCERN_RATES = {
+    "irregular_periods": 0.25, "painful_periods": 0.35, "light_periods": 0.1, "heavy_periods": 0.2,
+    "bloating": 0.4, "hot_flashes": 0.05, "nausea": 0.1, "weight_difficulty": 0.3,
+    "recent_weight_gain": 0.2, "menstrual_headaches": 0.2,
+    "hirsutism": 0.1, "hair_thinning": 0.15, "adult_acne": 0.25,
+    "mood_swings": 0.35, "stress": 0.45, "fatigue": 0.45,
+}
+CONDITION_RATES = {
+    "pcos": 0.08, "pcod": 0.03, "endometriosis": 0.04, "dysmenorrhea": 0.06, "amenorrhea": 0.01,
+    "menorrhagia": 0.02, "metrorrhagia": 0.01, "pms": 0.08, "pmdd": 0.02,
+    "hashimotos": 0.02, "hypothyroidism": 0.04,
+}
+
+# profile -> (weight, multipliers for answer rates/weights)
+PROFILES: Dict[str, Tuple[float, Dict[str, float]]] = {
+    "baseline": (5, {}),
+    "pcos_like": (2, {
+        "irregular": 3, "occasional_skips": 2, "35+": 4, "irregular_periods": 3, "hirsutism": 5,
+        "adult_acne": 2.5, "weight_difficulty": 2, "hair_thinning": 2, "pcos": 6, "pcod": 4,
+    }),
+    "thyroid_like": (1, {
+        "fatigue": 1.8, "weight_difficulty": 2, "hair_thinning": 3, "heavy_periods": 2,
+        "hashimotos": 8, "hypothyroidism": 8,
+    }),
+    "stress": (1.5, {"stress": 2, "fatigue": 1.6, "mood_swings": 1.8, "occasional_skips": 2, "pms": 2}),
+    "estrogen_dominance": (1, {
+        "heavy_periods": 3, "painful_periods": 2, "bloating": 2, "menstrual_headaches": 2.5,
+        "endometriosis": 5, "menorrhagia": 5, "pmdd": 3,
+    }),
+}
+
+# Lab panels people usually bring, with plausible conventional-unit ranges
+LAB_PANELS = {
+    "androgen": ("total_testosterone", "free_testosterone", "dhea_s", "lh", "fsh", "shbg"),
+    "thyroid": ("tsh", "free_t3", "free_t4"),
+    "metabolic": ("fasting_insulin", "hba1c", "fasting_glucose"),
+    "cycle": ("estradiol", "progesterone", "lh", "fsh"),
+    "stress": ("am_cortisol",),
+}
+LAB_RANGES = {
+    "total_testosterone": (10, 110), "free_testosterone": (0.3, 9), "dhea_s": (50, 520),
+    "lh": (1.5, 25), "fsh": (2, 14), "shbg": (15, 140), "tsh": (0.3, 9),
+    "free_t3": (2, 4.6), "free_t4": (0.6, 2), "fasting_insulin": (2, 30),
+    "hba1c": (4.4, 6.8), "fasting_glucose": (68, 130), "am_cortisol": (4, 28),
+    "estradiol": (20, 420), "progesterone": (0.1, 22),
+}
+
+DIAGNOSED_FREE_TEXT = (
+    "insulin resistance", "borderline thyroid, not on medication", "adenomyosis",
+    "prediabetes diagnosed last year", "fibroids", "low iron / anemia", "ovarian cyst",
+)
+HEALTH_FREE_TEXT = (
+    "always cold and tired", "hair falling out after stopping the pill", "night sweats",
+    "spotting between periods", "sugar cravings before my period", "poor sleep and anxiety",
+    "dark patches on my neck",
+)
+
+
+class PayloadGenerator:
+    """Reproducible stream of valid assessment payloads"""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        today: Optional[date] = None,
+        labs_rate: float = 0.3,
+        free_text_rate: float = 0.2,
+        history_rate: float = 0.3,
+        returning_users: int = 0,  # > 0: half the payloads carry one of this many user ids
+    ):
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.labs_rate = labs_rate
+        self.free_text_rate = free_text_rate
+        self.history_rate = history_rate
+        self.returning_users = returning_users
+        self._profiles = list(PROFILES)
+        self._profile_weights = [PROFILES[name][0] for name in self._profiles]
+
+    def payload(self) -> Dict:
+        """One JSON-ready request body"""
+        rng = self.rng
+        boosts = PROFILES[rng.choices(self._profiles, self._profile_weights)[0]][1]
+
+        def pick(values, weights):
+            return rng.choices(values, [weights.get(v, 1) * boosts.get(v, 1) for v in values])[0]
+
+        def sample(values, rates):
+            return [v for v in values if rng.random() < min(0.95, rates.get(v, 0.1) * boosts.get(v, 1))]
+
+        concerns = {category: sample(values, CONCERN_RATES) for category, values in CONCERNS.items()}
+        selected = [concern for values in concerns.values() for concern in values]
+        cycle_length = pick(CYCLE_LENGTHS, CYCLE_LENGTH_WEIGHTS)
+        date_not_sure = rng.random() < 0.1
+        last_period = self.today - timedelta(days=rng.randint(0, 45))
+
+        payload = {
+            "basic_info": {"name": rng.choice(("Ana", "Maya", "Priya", "Sofia", "Lena", "Aisha")), "age": rng.randint(18, 40)},
+            "period_pattern": {
+                "period_pattern": pick(PERIOD_PATTERNS, PERIOD_PATTERN_WEIGHTS),
+                "birth_control": pick(BIRTH_CONTROLS, BIRTH_CONTROL_WEIGHTS),
+            },
+            "cycle_details": {
+                "last_period_date": None if date_not_sure and rng.random() < 0.5 else last_period.isoformat(),
+                "date_not_sure": date_not_sure,
+                "cycle_length": cycle_length,
+                "period_history": self._period_history(last_period, cycle_length),
+            },
+            "health_concerns": {**concerns, "none": not selected},
+            "top_concern": {"top_concern": rng.choice(selected) if selected else "none"},
+            "diagnosed_conditions": {"conditions": sample(CONDITIONS, CONDITION_RATES)},
+        }
+        if rng.random() < self.free_text_rate:
+            if rng.random() < 0.5:
+                payload["diagnosed_conditions"]["others_input"] = rng.choice(DIAGNOSED_FREE_TEXT)
+            else:
+                payload["health_concerns"]["others"] = rng.choice(HEALTH_FREE_TEXT)
+        if rng.random() < self.labs_rate:
+            payload["lab_results"] = self._labs()
+        if self.returning_users and rng.random() < 0.5:
+            payload["user_id"] = f"user-{rng.randrange(self.returning_users)}"
+        return payload
+
+    def request(self) -> CompleteAssessmentRequest:
+        return CompleteAssessmentRequest(**self.payload())
+
+    def payloads(self, count: int) -> List[Dict]:
+        return [self.payload() for _ in range(count)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            yield self.payload()
+
+    def _period_history(self, last_period: date, cycle_length: str) -> List[str]:
+        rng = self.rng
+        if rng.random() >= self.history_rate:
+            return []
+        low, high = {"<21": (18, 21), "21-25": (21, 25), "31-35": (31, 35), "35+": (36, 60)}.get(cycle_length, (26, 30))
+        dates, current = [], last_period
+        for _ in range(rng.randint(2, 6)):
+            current -= timedelta(days=rng.randint(low, high))
+            dates.append(current.isoformat())
+        return dates
+
+    def _labs(self) -> Dict[str, float]:
+        rng = self.rng
+        panels = rng.sample(list(LAB_PANELS), rng.randint(1, 3))
+        analytes = dict.fromkeys(analyte for panel in panels for analyte in LAB_PANELS[panel])
+        labs = {}
+        for analyte in analytes:
+            low, high = LAB_RANGES[analyte]
+            labs[analyte] = round(rng.uniform(low, high), 2)
+        return labs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    generator = PayloadGenerator(seed)
+    for payload in generator.payloads(count):
+        print(json.dumps(payload))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Replay: run a corpus of recorded assessments through AssessmentService and
+compare with their golden outputs, field by field, and with their latency
+
+A corpus is JSON lines, one recorded assessment each:
+  {"id", "recorded_on": "YYYY-MM-DD", "request": CompleteAssessmentRequest,
+   "llm_responses": [diagnosed, health_concerns] (LLMScoringResponse or null),
+   "golden": AssessmentResponse, "latency_ms": float}
+
+Replays answer Gemini with the recorded responses, so only rule changes show
+up. Every date in the request and golden output is moved forward by the days
+since `recorded_on`, so cycle phases and next-period estimates still line up.
+Records run on --workers processes (the pipeline is CPU-bound); each request's
+latency is its fastest of --repeat runs, request to serialized JSON.
+
+Usage:
+  python benchmarks/replay.py record corpus.jsonl --from requests.jsonl      (anonymized request bodies)
+  python benchmarks/replay.py record corpus.jsonl --synthetic 500 --seed 1
+  python benchmarks/replay.py replay corpus.jsonl --workers 4 [--ignore confidence.score] [--json]
+
+`record` calls Gemini for "others" inputs when GEMINI_API_KEY is set (the
+rule-based fallback otherwise). `replay` exits with status 1 when any output differs.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.load_test import percentile
+from models.schemas import AssessmentResponse, CompleteAssessmentRequest, LLMScoringResponse
+from services.assessment_service import RESPONSE_FIELDS, AssessmentService
+
+# Different on every run by design
+IGNORED_FIELDS = ("assessment_metadata.assessment_id", "assessment_metadata.user_id")
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_MISSING = "<missing>"
+_DEVNULL = open(os.devnull, "w")  # the pipeline's logs
+
+
+def shift_dates(value: Any, days: int) -> Any:
+    """Copy of a JSON value with every YYYY-MM-DD string moved by `days`"""
+    if isinstance(value, dict):
+        return {key: shift_dates(item, days) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shift_dates(item, days) for item in value]
+    if days and isinstance(value, str) and _DATE.match(value):
+        return (date.fromisoformat(value) + timedelta(days=days)).isoformat()
+    return value
+
+
+def diff_outputs(golden: Any, actual: Any, ignore: Iterable[str] = IGNORED_FIELDS, path: str = "") -> List[Tuple[str, Any, Any]]:
+    """(path, golden, actual) for every differing leaf, paths like primary_imbalance.contributing_factors[2]"""
+    if path in ignore:
+        return []
+    if isinstance(golden, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in list(golden) + [key for key in actual if key not in golden]:
+            child = f"{path}.{key}" if path else key
+            if child in ignore:
+                continue
+            if key not in actual:
+                diffs.append((child, golden[key], _MISSING))
+            elif key not in golden:
+                diffs.append((child, _MISSING, actual[key]))
+            else:
+                diffs.extend(diff_outputs(golden[key], actual[key], ignore, child))
+        return diffs
+    if isinstance(golden, list) and isinstance(actual, list):
+        diffs = []
+        for i in range(max(len(golden), len(actual))):
+            child = f"{path}[{i}]"
+            if i >= len(actual):
+                diffs.append((child, golden[i], _MISSING))
+            elif i >= len(golden):
+                diffs.append((child, _MISSING, actual[i]))
+            else:
+                diffs.extend(diff_outputs(golden[i], actual[i], ignore, child))
+        return diffs
+    if isinstance(golden, float) and isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        return [] if math.isclose(golden, actual, rel_tol=1e-9, abs_tol=1e-12) else [(path, golden, actual)]
+    return [] if golden == actual and type(golden) is type(actual) else [(path, golden, actual)]
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ==================== RUNNING ONE ASSESSMENT ====================
+
+_local = threading.local()  # the LLM answers of the record this thread is replaying
+_service: Optional[AssessmentService] = None
+
+
+def _recorded_llm(diagnosed_input=None, health_concerns_input=None, user_context=None, trace_id=None):
+    return _local.llm_responses
+
+
+def _worker_service() -> AssessmentService:
+    """This process's service, with Gemini answered from the record being replayed"""
+    global _service
+    if _service is None:
+        with contextlib.redirect_stdout(_DEVNULL):
+            _service = AssessmentService(gemini_api_key=None)
+        _service.llm_service.process_both_others_inputs = _recorded_llm
+    return _service
+
+
+def _assess(service: AssessmentService, request: CompleteAssessmentRequest) -> Tuple[Dict[str, Any], tuple]:
+    """Serialized AssessmentResponse and the LLM answers it used"""
+    outputs = service.assess_outputs(request, RESPONSE_FIELDS + ("llm_responses",))
+    response = AssessmentResponse(**{field: outputs[field] for field in RESPONSE_FIELDS})
+    return response.model_dump(mode="json"), outputs["llm_responses"]
+
+
+def replay_record(record: Dict[str, Any], repeat: int = 3, ignore: Iterable[str] = IGNORED_FIELDS) -> Dict[str, Any]:
+    """Replay one record: its diffs against the golden output and its latency"""
+    days = (date.today() - date.fromisoformat(record["recorded_on"])).days
+    service = _worker_service()
+    _local.llm_responses = tuple(
+        LLMScoringResponse.model_validate(answer) if answer is not None else None
+        for answer in record.get("llm_responses") or (None, None)
+    )
+    result = {"id": record["id"], "recorded_ms": record.get("latency_ms")}
+    try:
+        request = CompleteAssessmentRequest(**shift_dates(record["request"], days))
+        timings = []
+        with contextlib.redirect_stdout(_DEVNULL):
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                output, _ = _assess(service, request)
+                json.dumps(output)
+                timings.append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        return {**result, "error": f"{type(e).__name__}: {e}", "diffs": [], "latency_ms": None}
+    golden = shift_dates(record["golden"], days) if record.get("golden") is not None else None
+    diffs = diff_outputs(golden, output, tuple(ignore)) if golden is not None else []
+    return {**result, "diffs": diffs, "latency_ms": round(min(timings), 3)}
+
+
+def replay_corpus(
+    records: List[Dict[str, Any]],
+    workers: int = 4,
+    repeat: int = 3,
+    ignore: Iterable[str] = IGNORED_FIELDS
+) -> List[Dict[str, Any]]:
+    """replay_record for every record, in `workers` processes (0 = in this process), in corpus order"""
+    args = (repeat, tuple(ignore))
+    if workers <= 0:
+        return [replay_record(record, *args) for record in records]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_service) as pool:
+        return list(pool.map(replay_record, records, *([arg] * len(records) for arg in args), chunksize=8))
+
+
+# ==================== RECORD ====================
+
+def anonymize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    payload = dict(payload)
+    payload["user_id"] = None
+    payload["basic_info"] = {**payload["basic_info"], "name": "Anonymous"}
+    return payload
+
+
+def record_corpus(
+    payloads: Iterable[Dict[str, Any]],
+    service: AssessmentService,
+    workers: int = 4,
+    repeat: int = 3
+) -> List[Dict[str, Any]]:
+    """Run payloads through `service` (its Gemini or fallback) and keep the LLM answers
+    and outputs as golden; latency is then measured the way replay measures it"""
+    recorded_on = date.today().isoformat()
+    records = []
+    with contextlib.redirect_stdout(_DEVNULL):
+        for i, payload in enumerate(payloads):
+            request = CompleteAssessmentRequest(**anonymize(payload))
+            output, llm_responses = _assess(service, request)
+            records.append({
+                "id": f"r{i:05d}",
+                "recorded_on": recorded_on,
+                "request": request.model_dump(mode="json"),
+                "llm_responses": [answer.model_dump(mode="json") if answer is not None else None for answer in llm_responses],
+                "golden": output,
+            })
+    for record, result in zip(records, replay_corpus(records, workers, repeat)):
+        if result["diffs"] or result.get("error"):
+            raise RuntimeError(f"{record['id']} does not replay to its own output: {result.get('error') or result['diffs'][:3]}")
+        record["latency_ms"] = result["latency_ms"]
+    return records
+
+
+# ==================== REPORT ====================
+
+def report(results: List[Dict[str, Any]], show: int = 10) -> Dict[str, Any]:
+    differing = [r for r in results if r["diffs"]]
+    errors = [r for r in results if r.get("error")]
+    fields = Counter(re.sub(r"\[\d+\]", "[]", path) for r in differing for path, _, _ in r["diffs"])
+    deltas = sorted(
+        (r["latency_ms"] - r["recorded_ms"], r["id"]) for r in results
+        if r["latency_ms"] is not None and r.get("recorded_ms") is not None
+    )
+    summary = {
+        "requests": len(results),
+        "identical": len(results) - len(differing) - len(errors),
+        "differing": len(differing),
+        "errors": [{"id": r["id"], "error": r["error"]} for r in errors],
+        "fields": dict(fields.most_common()),
+        "examples": [
+            {"id": r["id"], "diffs": [{"field": p, "golden": g, "replay": a} for p, g, a in r["diffs"][:5]]}
+            for r in differing[:show]
+        ],
+    }
+    if deltas:
+        ordered = [delta for delta, _ in deltas]
+        summary["latency_ms"] = {
+            "recorded_median": round(statistics.median(r["recorded_ms"] for r in results if r.get("recorded_ms") is not None), 3),
+            "replay_median": round(statistics.median(r["latency_ms"] for r in results if r["latency_ms"] is not None), 3),
+            "delta_median": round(statistics.median(ordered), 3),
+            "delta_p95": round(percentile(ordered, 0.95), 3),
+            "slowest": [{"id": id_, "delta_ms": round(delta, 3)} for delta, id_ in reversed(deltas[-show:])],
+        }
+    return summary
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f"requests: {summary['requests']}  identical: {summary['identical']}  "
+          f"differing: {summary['differing']}  errors: {len(summary['errors'])}")
+    for error in summary["errors"][:10]:
+        print(f"  ERROR {error['id']}: {error['error']}")
+    if summary["fields"]:
+        print("\nfields that differ (requests):")
+        for field, count in summary["fields"].items():
+            print(f"  {field:<60} {count}")
+        print("\nexamples:")
+        for example in summary["examples"]:
+            for d in example["diffs"]:
+                print(f"  {example['id']}  {d['field']}: {json.dumps(d['golden'])} -> {json.dumps(d['replay'])}")
+    latency = summary.get("latency_ms")
+    if latency:
+        print(f"\nlatency (ms): recorded median {latency['recorded_median']}  replay median {latency['replay_median']}  "
+              f"delta median {latency['delta_median']:+}  p95 {latency['delta_p95']:+}")
+        print("largest slowdowns: " + ", ".join(f"{s['id']} {s['delta_ms']:+}" for s in latency["slowest"][:5]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="build a corpus from request bodies")
+    record.add_argument("corpus")
+    source = record.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from", dest="source", help="JSON lines of CompleteAssessmentRequest bodies")
+    source.add_argument("--synthetic", type=int, metavar="N", help="N payloads from benchmarks/payloads.py")
+    record.add_argument("--seed", type=int, default=0)
+    replay = commands.add_parser("replay", help="replay a corpus and compare")
+    replay.add_argument("corpus")
+    replay.add_argument("--ignore", nargs="*", default=[], metavar="FIELD", help="extra dotted fields to skip")
+    replay.add_argument("--json", action="store_true", help="print the report as JSON")
+    for command in (record, replay):
+        command.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="processes (0 = in-process)")
+        command.add_argument("--repeat", type=int, default=3, help="runs per request; the fastest is its latency")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        if args.source:
+            with open(args.source) as f:
+                payloads = [json.loads(line) for line in f if line.strip()]
+        else:
+            from benchmarks.payloads import PayloadGenerator
+            payloads = PayloadGenerator(args.seed, free_text_rate=0.3).payloads(args.synthetic)
+        with contextlib.redirect_stdout(_DEVNULL):
+            service = AssessmentService(os.getenv("GEMINI_API_KEY"))
+        records = record_corpus(payloads, service, args.workers, args.repeat)
+        with open(args.corpus, "w") as f:
+            for item in records:
+                f.write(json.dumps(item, separators=(",", ":")) + "\n")
+        print(f"recorded {len(records)} assessments to {args.corpus}")
+        return
+
+    results = replay_corpus(load_corpus(args.corpus), args.workers, args.repeat, IGNORED_FIELDS + tuple(args.ignore))
+    summary = report(results)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    sys.exit(1 if summary["differing"] or summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+"""
+Benchmark suite: scoring components, the full pipeline and the ASGI endpoint
+Each case times one call on a fixed set of seeded inputs (HormoneScorer per
+method, CycleCalculator, ConfidenceCalculator, ConflictDetector,
+ExplanationGenerator, process_complete_assessment with a stubbed LLM, and
+POST /api/v1/assess end to end). Results are saved per commit under
+benchmarks/results/ and compared with the stored baseline (benchmarks/baseline.json);
+medians slower than the baseline by more than --threshold are reported as
+regressions and make the run exit with status 1. Each case's tracemalloc peak
+per call is recorded too, and growth past the threshold is a regression as well.
+
+Usage:
+  python benchmarks/suite.py                     run, save results, compare with the baseline
+  python benchmarks/suite.py -k scorer.          only cases whose name contains "scorer."
+  python benchmarks/suite.py --save-baseline     run and store the results as the new baseline
+  python benchmarks/suite.py --compare OLD NEW   report between two saved result files (no run)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+# The ASGI cases import the app: keep its store in memory
+os.environ["ASSESSMENT_STORE_URL"] = "memory://"
+
+from models.schemas import HormoneImpact, LLMScoringResponse
+from services import memory_profile
+from services.assessment_service import RESPONSE_FIELDS, AssessmentService
+from services.cycle_calculator import CycleCalculator
+from services.explanation_generator import ExplanationGenerator
+from tests.test_thread_safety import random_request
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+INPUTS = 64  # seeded requests each case cycles through
+SAMPLE_SECONDS = 0.01  # calls per sample are calibrated to take at least this long
+
+STUB_LLM_RESPONSE = LLMScoringResponse(
+    hormone_impacts=[
+        HormoneImpact(hormone="thyroid", direction="low", score_weight=2,
+                      reasoning="Fatigue with cold intolerance commonly reflects low thyroid output"),
+        HormoneImpact(hormone="cortisol", direction="high", score_weight=1,
+                      reasoning="Poor sleep and stress point to raised cortisol levels"),
+    ],
+    overall_confidence="medium",
+    clinical_flags=["Consider a thyroid panel (TSH, free T4)"],
+    needs_medical_review=False
+)
+
+
+def stub_llm(service: AssessmentService) -> AssessmentService:
+    """Answer every "others" input with a fixed parsed Gemini response (no network)"""
+    def answer(diagnosed_input=None, health_concerns_input=None, user_context=None, trace_id=None):
+        return (STUB_LLM_RESPONSE if diagnosed_input else None,
+                STUB_LLM_RESPONSE if health_concerns_input else None)
+    service.llm_service.process_both_others_inputs = answer
+    return service
+
+
+def make_requests(count=INPUTS, seed=42):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        request = random_request(rng)
+        if rng.random() < 0.5:
+            request.diagnosed_conditions.others_input = "fatigue, always cold, poor sleep"
+        requests.append(request)
+    return requests
+
+
+class Inputs:
+    """Seeded requests and the intermediate values each component reads (built once)"""
+
+    def __init__(self):
+        self.requests = make_requests()
+        self.service = stub_llm(AssessmentService(gemini_api_key=None))
+        self.contexts = [self.service.assess_outputs(r, RESPONSE_FIELDS) for r in self.requests]
+
+    def cycle(self, items):
+        """Zero-argument function returning the next item, round robin"""
+        state = {"i": -1}
+
+        def next_item():
+            state["i"] = (state["i"] + 1) % len(items)
+            return items[state["i"]]
+        return next_item
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[Inputs], Callable[[], object]]  # returns the function to time
+
+
+CASES: List[Case] = []
+
+
+def case(name):
+    def register(setup):
+        CASES.append(Case(name, setup))
+        return setup
+    return register
+
+
+# ==================== HORMONE SCORER ====================
+# Methods that update the scoring state run on a fresh copy of a scored state
+# each call (repeated multipliers would overflow); scorer.state_copy is that cost.
+
+READ_ONLY_SCORER_METHODS = ("get_primary_secondary_imbalances", "get_hormone_breakdown")
+
+
+def _scorer_case(method, args):
+    def setup(inputs):
+        scorer = inputs.service.hormone_scorer
+        items = [(ctx["scoring"], ctx) for ctx in inputs.contexts]
+        items = [item for item in items if args(*item) is not None]
+        next_item = inputs.cycle(items)
+        bound = getattr(scorer, method)
+        copy_state = method not in READ_ONLY_SCORER_METHODS
+
+        def run():
+            state, ctx = next_item()
+            return bound(state.copy() if copy_state else state, *args(state, ctx))
+        return run
+    return setup
+
+
+SCORER_METHODS = {
+    "score_period_pattern": lambda s, ctx: (ctx["request"].period_pattern.period_pattern,),
+    "apply_birth_control_modifier": lambda s, ctx: (ctx["request"].period_pattern.birth_control,),
+    "score_cycle_length": lambda s, ctx: (ctx["request"].cycle_details.cycle_length,),
+    "score_health_concerns": lambda s, ctx: (ctx["request"].health_concerns, ctx["cycle_context"].current_phase),
+    "apply_top_concern_multiplier": lambda s, ctx: (
+        ctx["request"].top_concern.top_concern, ctx["request"].health_concerns),
+    "score_diagnosed_conditions": lambda s, ctx: (ctx["request"].diagnosed_conditions.conditions,),
+    # Without the phase, as /assess scores labs
+    "score_lab_results": lambda s, ctx: (ctx["request"].lab_results,) if ctx["request"].lab_results else None,
+    "calculate_final_scores": lambda s, ctx: (),
+    "get_primary_secondary_imbalances": lambda s, ctx: (),
+    "get_hormone_breakdown": lambda s, ctx: (ctx["primary_hormone"],),
+}
+for _method, _args in SCORER_METHODS.items():
+    case(f"scorer.{_method}")(_scorer_case(_method, _args))
+
+
+@case("scorer.state_copy")
+def _state_copy(inputs):
+    next_ctx = inputs.cycle(inputs.contexts)
+    return lambda: next_ctx()["scoring"].copy()
+
+
+@case("scorer.all_answer_steps")
+def _answer_scores(inputs):
+    next_ctx = inputs.cycle(inputs.contexts)
+    return lambda: inputs.service._stage_answer_scores(next_ctx())
+
+
+# ==================== OTHER COMPONENTS ====================
+
+@case("cycle.calculate_cycle_context")
+def _cycle_context(inputs):
+    calculator = CycleCalculator()
+    next_request = inputs.cycle(inputs.requests)
+
+    def run():
+        details = next_request().cycle_details
+        return calculator.calculate_cycle_context(details.last_period_date, details.cycle_length, details.date_not_sure)
+    return run
+
+
+@case("cycle.phase_calendar_90d")
+def _phase_calendar(inputs):
+    calculator = CycleCalculator()
+    items = [r.cycle_details for r in inputs.requests if r.cycle_details.last_period_date and
+             r.cycle_details.cycle_length != "not_sure"]
+    next_details = inputs.cycle(items)
+
+    def run():
+        details = next_details()
+        return calculator.phase_calendar(details.last_period_date, details.cycle_length, details.last_period_date, 90)
+    return run
+
+
+@case("confidence.calculate_confidence")
+def _confidence(inputs):
+    calculator = inputs.service.confidence_calculator
+    next_ctx = inputs.cycle(inputs.contexts)
+
+    def run():
+        ctx = next_ctx()
+        request = ctx["request"]
+        return calculator.calculate_confidence(
+            period_pattern=request.period_pattern.period_pattern,
+            last_period_date=request.cycle_details.last_period_date,
+            cycle_length=request.cycle_details.cycle_length,
+            date_not_sure=request.cycle_details.date_not_sure,
+            diagnosed_conditions=request.diagnosed_conditions.conditions,
+            top_concern_selected=True,
+            birth_control=request.period_pattern.birth_control,
+            symptoms_count=ctx["symptoms_count"],
+            symptom_clusters=ctx["symptom_clusters"],
+            labs_uploaded=ctx["labs_uploaded"],
+            labs_concordance=ctx["labs_concordance"],
+            conflicts_detected=len(ctx["conflicts"]),
+            llm_confidence=ctx["llm_confidence"]
+        )
+    return run
+
+
+@case("conflicts.detect_all_conflicts")
+def _conflicts(inputs):
+    detector = inputs.service.conflict_detector
+    next_ctx = inputs.cycle(inputs.contexts)
+
+    def run():
+        ctx = next_ctx()
+        return detector.detect_all_conflicts(
+            hormone_scores=ctx["scoring"].hormone_scores,
+            diagnosed_conditions=ctx["request"].diagnosed_conditions.conditions,
+            symptoms_by_hormone=ctx["symptom_clusters"],
+            labs_uploaded=ctx["labs_uploaded"],
+            labs_concordance=ctx["labs_concordance"],
+            birth_control=ctx["request"].period_pattern.birth_control
+        )
+    return run
+
+
+def _explanation_case(generator_factory):
+    def setup(inputs):
+        generator = generator_factory()
+        items = [
+            (hormone, ctx["scoring"].hormone_scores[hormone]["direction"],
+             ctx["scoring"].contributing_factors[hormone], ctx["labs_uploaded"])
+            for ctx in inputs.contexts
+            for hormone in [ctx["primary_hormone"]] + ctx["secondary_hormones"]
+        ]
+        next_item = inputs.cycle(items)
+        return lambda: generator.render(*next_item())
+    return setup
+
+
+case("explanations.render_cached")(_explanation_case(ExplanationGenerator))
+case("explanations.render_uncached")(_explanation_case(lambda: ExplanationGenerator(cache_size=0)))
+
+
+# ==================== PIPELINE AND ENDPOINT ====================
+
+@case("pipeline.process_complete_assessment")
+def _pipeline(inputs):
+    service = stub_llm(AssessmentService(gemini_api_key=None))
+    next_request = inputs.cycle(inputs.requests)
+    return lambda: service.process_complete_assessment(next_request())
+
+
+def _endpoint_case(params):
+    def setup(inputs):
+        import httpx
+        from httpx import ASGITransport
+        from app import app, assessment_service
+
+        stub_llm(assessment_service)
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
+        bodies = [json.loads(r.model_dump_json()) for r in inputs.requests]
+        next_body = inputs.cycle(bodies)
+
+        def run():
+            resp = loop.run_until_complete(client.post("/api/v1/assess", params=params, json=next_body()))
+            assert resp.status_code == 200, resp.text
+            return resp
+        return run
+    return setup
+
+
+case("asgi.assess")(_endpoint_case({}))
+case("asgi.assess_detail_scores")(_endpoint_case({"detail": "scores"}))
+
+
+# ==================== RUNNER ====================
+
+def measure(fn, repeat):
+    """Per-call times (us) of `repeat` samples, each long enough to time reliably.
+    Like timeit, the garbage collector is off while timing so earlier cases'
+    garbage is not collected on this one's clock."""
+    gc.collect()
+    gc.disable()
+    try:
+        return _measure(fn, repeat)
+    finally:
+        gc.enable()
+
+
+def _measure(fn, repeat):
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= SAMPLE_SECONDS:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(SAMPLE_SECONDS / elapsed * 1.2) + 1))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(min(samples), 3),
+        "iqr_us": round(quartiles[2] - quartiles[0], 3),
+        "calls_per_sample": number,
+        "samples": repeat
+    }
+
+
+def measure_memory(fn, calls=5):
+    """Median tracemalloc peak and net allocation of one call (traced separately from the timing)"""
+    gc.collect()
+    memory_profile.start_tracing()
+    try:
+        deltas = []
+        for _ in range(calls):
+            mark = memory_profile.begin()
+            fn()
+            deltas.append(memory_profile.delta(mark))
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": round(statistics.median(d.peak for d in deltas) / 1024, 2),
+        "allocated_kib": round(statistics.median(d.allocated for d in deltas) / 1024, 2)
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "."], cwd=os.path.dirname(BENCH_DIR),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(name_filter, repeat):
+    selected = [c for c in CASES if name_filter in c.name]
+    results = {}
+    # Pipeline logs go to /dev/null: a StringIO would keep growing and show up in the memory peaks
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            inputs = Inputs()
+        for bench in selected:
+            with contextlib.redirect_stdout(devnull):
+                fn = bench.setup(inputs)
+                fn()  # warm caches and lazy imports
+                results[bench.name] = measure(fn, repeat)
+                results[bench.name].update(measure_memory(fn))
+            result = results[bench.name]
+            print(f"  {bench.name:<44} {result['median_us']:>12,.2f} us {result['peak_kib']:>10,.1f} KiB peak", file=sys.stderr)
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpu": platform.machine()},
+        "results": results
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print a report; returns the names of the regressed cases"""
+    print(f"baseline {baseline['commit']} ({baseline['created_at'][:10]})  ->  current {current['commit']}")
+    if baseline.get("machine") != current.get("machine"):
+        print("note: runs come from different machines/Python versions; compare with care")
+    print(f"{'benchmark':<44} {'baseline':>12} {'current':>12} {'change':>8} {'peak KiB':>19}")
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<44} {'-':>12} {result['median_us']:>10,.2f}us {'new':>8}")
+            continue
+        change = result["median_us"] / before["median_us"] - 1
+        flags = []
+        if change > threshold:
+            flags.append("REGRESSION")
+            regressions.append(name)
+        elif change < -threshold:
+            flags.append("faster")
+        memory = ""
+        if "peak_kib" in before and "peak_kib" in result:
+            memory = f"{before['peak_kib']:>9,.1f} -> {result['peak_kib']:>6,.1f}"
+            # Peaks of a few KiB move with allocator noise: flag only growth past threshold and 4 KiB
+            grown = result["peak_kib"] - before["peak_kib"]
+            if grown > 4 and grown > threshold * before["peak_kib"]:
+                flags.append("MEMORY REGRESSION")
+                regressions.append(f"{name} (memory)")
+        flag = "  " + ", ".join(flags) if flags else ""
+        print(f"{name:<44} {before['median_us']:>10,.2f}us {result['median_us']:>10,.2f}us {change:>+7.1%} {memory:>19}{flag}")
+    missing = [name for name in baseline["results"] if name not in current["results"]]
+    if missing:
+        print(f"not run: {', '.join(missing)}")
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-k", "--filter", default="", help="run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=15, help="samples per case")
+    parser.add_argument("--threshold", type=float, default=0.15, help="median slowdown reported as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="result file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.load(open(path)) for path in args.compare)
+        sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+    current = run_suite(args.filter, args.repeat)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    result_path = os.path.join(RESULTS_DIR, f"{current['commit']}.json")
+    with open(result_path, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"results: {os.path.relpath(result_path)}\n")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline saved: {os.path.relpath(BASELINE_PATH)}")
+        return
+    if not os.path.exists(args.baseline):
+        print("no baseline yet (run with --save-baseline)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
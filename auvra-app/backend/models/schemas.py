@@ -3,7 +3,7 @@ Pydantic models for request/response validation
 Auvra Hormone Assessment System
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Literal, Optional, Dict
 from datetime import date
 
@@ -16,28 +16,29 @@ class HormoneImpact(BaseModel):
     score_weight: int = Field(ge=0, le=3)
     reasoning: str = Field(min_length=10, max_length=500)
     
-    @validator('reasoning')
-    def reasoning_must_be_clinical(cls, v):
+    @field_validator('reasoning')
+    @classmethod
+    def reasoning_must_be_clinical(cls, v: str) -> str:
         if len(v.split()) < 5:
             raise ValueError('Reasoning must be substantive (at least 5 words)')
         return v
 
 class LLMScoringResponse(BaseModel):
     """Response from Gemini API for 'Others' input processing"""
+    model_config = ConfigDict(extra='forbid')  # Reject any additional fields
+
     hormone_impacts: List[HormoneImpact]
     overall_confidence: Literal["high", "medium", "low"]
     clinical_flags: List[str] = []
     needs_medical_review: bool
     
-    @validator('hormone_impacts')
-    def no_duplicate_hormones(cls, v):
+    @field_validator('hormone_impacts')
+    @classmethod
+    def no_duplicate_hormones(cls, v: List[HormoneImpact]) -> List[HormoneImpact]:
         hormones = [impact.hormone for impact in v]
         if len(hormones) != len(set(hormones)):
             raise ValueError('Cannot score same hormone twice')
         return v
-    
-    class Config:
-        extra = 'forbid'  # Reject any additional fields
 
 # ==================== ASSESSMENT REQUEST MODELS ====================
 
@@ -58,6 +59,7 @@ class CycleDetailsRequest(BaseModel):
     last_period_date: Optional[date] = None
     date_not_sure: bool = False
     cycle_length: Literal["<21", "21-25", "26-30", "31-35", "35+", "not_sure"]
+    period_history: List[date] = Field(default=[], max_length=240)  # Earlier period start dates, any order
 
 class HealthConcernsRequest(BaseModel):
     """Question 4: Multi-select health concerns"""
@@ -96,9 +98,14 @@ class LabResultsRequest(BaseModel):
     estradiol: Optional[float] = None
     progesterone: Optional[float] = None
     shbg: Optional[float] = None
+    # Units: conventional (US) by default; "si" switches every analyte to its SI unit,
+    # and per-analyte overrides (e.g. {"estradiol": "pmol/L"}) take precedence
+    unit_system: Literal["conventional", "si"] = "conventional"
+    units: Dict[str, str] = {}
 
 class CompleteAssessmentRequest(BaseModel):
     """Complete assessment submission"""
+    user_id: Optional[str] = Field(default=None, min_length=1, max_length=64)  # Issued by POST /api/v1/users (returning users)
     basic_info: BasicInfoRequest
     period_pattern: PeriodPatternRequest
     cycle_details: CycleDetailsRequest
@@ -120,17 +127,27 @@ class HormoneScore(BaseModel):
     total: int
     direction: Literal["high", "low"]
     breakdown: HormoneBreakdown
+    population_percentile: Optional[int] = None  # % of assessments scoring lower; None until enough data
 
-class HormoneImbalance(BaseModel):
-    """Detailed hormone imbalance information"""
+class HormoneImbalanceBase(BaseModel):
+    """Hormone imbalance fields common to inline and content=refs replies"""
     hormone: str
     direction: Literal["high", "low"]
     total_score: int
     breakdown: HormoneBreakdown
     contributing_factors: List[str]
+
+class HormoneImbalance(HormoneImbalanceBase):
+    """Detailed hormone imbalance information"""
     explanation: str
     recommendations: Dict[str, List[str]]
 
+class HormoneImbalanceRefs(HormoneImbalanceBase):
+    """Hormone imbalance with its shared text blocks as hashes for GET /api/v1/content/{hash}"""
+    explanation_ref: str  # markdown template with {factors} / {factors_text} placeholders
+    explanation_values: Dict[str, str]  # placeholder -> this imbalance's text
+    recommendations_ref: str  # JSON: category -> recommendations
+
 class ConfidenceFactor(BaseModel):
     """Individual confidence calculation factor"""
     factor: str
@@ -163,6 +180,25 @@ class CycleContext(BaseModel):
     days_since_period: Optional[int] = None
     phase_confidence: Literal["high", "medium", "low"]
     estimated_next_period: Optional[date] = None
+    # Present when a period history was available
+    cycle_length_mean: Optional[float] = None
+    cycle_length_std: Optional[float] = None
+    luteal_length_estimate: Optional[int] = None
+    cycles_observed: Optional[int] = None
+
+class CycleCalendarDay(BaseModel):
+    """Forecast phase for a single day"""
+    date: date
+    phase: Optional[str] = None
+    cycle_day: Optional[int] = None
+
+class CycleCalendarResponse(BaseModel):
+    """Forecast phase calendar for one user"""
+    start_date: date
+    end_date: date
+    cycle_length_days: Optional[int] = None
+    next_period_date: Optional[date] = None
+    days: List[CycleCalendarDay]
 
 class UserProfile(BaseModel):
     """User profile summary"""
@@ -175,6 +211,7 @@ class UserProfile(BaseModel):
 class AssessmentMetadata(BaseModel):
     """Assessment metadata"""
     user_id: str
+    assessment_id: Optional[str] = None  # GET /api/v1/assessments/{assessment_id} when persisted
     assessment_date: date
     version: str
     disclaimer: str
@@ -197,3 +234,85 @@ class AssessmentResponse(BaseModel):
     conflicts: List[Conflict]
     clinical_flags: List[ClinicalFlag]
     next_steps: NextSteps
+
+class AssessmentResponseRefs(AssessmentResponse):
+    """Assessment result for ?content=refs: each imbalance's explanation/recommendations by hash"""
+    primary_imbalance: HormoneImbalanceRefs
+    secondary_imbalances: List[HormoneImbalanceRefs]
+
+# ==================== LAB EVALUATION MODELS ====================
+
+class LabFindingResult(BaseModel):
+    """Single lab value outside its reference range"""
+    analyte: str
+    hormone: str
+    points: int
+    direction: Optional[Literal["high", "low"]] = None
+    value: float  # canonical units
+    factor: str
+
+class LabPanelEvaluation(BaseModel):
+    """Lab contributions for one panel"""
+    from_labs: Dict[str, int]
+    findings: List[LabFindingResult]
+
+class LabBatchRequest(BaseModel):
+    """Batch of lab panels, optionally with the cycle phase each was drawn in"""
+    panels: List[LabResultsRequest] = Field(min_length=1)
+    cycle_phases: Optional[List[Optional[Literal["menstrual", "follicular", "luteal", "late_luteal"]]]] = None
+
+class LabBatchResponse(BaseModel):
+    """Evaluations in the same order as the submitted panels"""
+    evaluations: List[LabPanelEvaluation]
+
+# ==================== COUNTERFACTUAL ANALYSIS MODELS ====================
+
+class CounterfactualOutcome(BaseModel):
+    """Deterministic result of one (possibly perturbed) assessment"""
+    primary_hormone: str
+    primary_direction: Literal["high", "low"]
+    secondary_hormones: List[str]
+    confidence_level: Literal["high", "medium", "low"]
+    confidence_score: int
+
+class CounterfactualChange(BaseModel):
+    """Single-answer change and the result it would produce"""
+    question: str
+    action: Literal["replace", "add", "remove"]
+    original_value: Optional[str] = None
+    new_value: Optional[str] = None
+    outcome: CounterfactualOutcome
+    flips_primary: bool
+    flips_secondary: bool
+    flips_confidence: bool
+
+class CounterfactualResponse(BaseModel):
+    """Which single answers would change the assessment result"""
+    baseline: CounterfactualOutcome
+    perturbations_evaluated: int
+    changes: List[CounterfactualChange]
+
+# ==================== SCORE HISTORY MODELS ====================
+
+class ScorePoint(BaseModel):
+    """One point of a hormone's score series: an assessment (raw) or a week/month bucket"""
+    at: str  # assessment timestamp, bucket start date (week) or YYYY-MM (month)
+    score: float  # total (raw) or mean total over the bucket
+    min: int
+    max: int
+    count: int  # assessments in the point
+    assessment_id: Optional[str] = None  # raw points only
+
+class UserIdResponse(BaseModel):
+    """A newly issued user id"""
+    user_id: str
+
+class ScoreHistoryResponse(BaseModel):
+    """A page of a user's per-hormone score series, oldest to newest"""
+    user_id: str
+    resolution: Literal["raw", "week", "month"]
+    total_assessments: int
+    first_assessed_at: Optional[str] = None
+    last_assessed_at: Optional[str] = None
+    series: Dict[str, List[ScorePoint]]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the preceding (older) page
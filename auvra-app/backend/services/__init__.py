@@ -1,18 +1,28 @@
 """Services package"""
-from .hormone_scorer import HormoneScorer
+from .hormone_scorer import HormoneScorer, ScoringState
 from .llm_service import LLMService
 from .cycle_calculator import CycleCalculator
 from .confidence_calculator import ConfidenceCalculator
 from .conflict_detector import ConflictDetector
 from .explanation_generator import ExplanationGenerator
+from .counterfactual_analyzer import CounterfactualAnalyzer
+from .assessment_pipeline import Stage, StageStats
+from .assessment_store import AssessmentStore
+from .population_percentiles import PopulationPercentiles
 from .assessment_service import AssessmentService
 
 __all__ = [
     'HormoneScorer',
+    'ScoringState',
     'LLMService',
     'CycleCalculator',
     'ConfidenceCalculator',
     'ConflictDetector',
     'ExplanationGenerator',
+    'CounterfactualAnalyzer',
+    'Stage',
+    'StageStats',
+    'AssessmentStore',
+    'PopulationPercentiles',
     'AssessmentService'
 ]
@@ -0,0 +1,218 @@
+"""
+Assessment Pipeline Stages
+Each assessment step declares the values it reads and the outputs it produces,
+so a caller asking for a subset of outputs only runs the stages they need,
+and stages whose inputs are ready run side by side
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from services import memory_profile
+from services.memory_profile import StageMemoryStats
+from services.tracing import Span
+
+
+# Values placed in the context before any stage runs
+BASE_INPUTS = ("request", "options", "trace_id")
+
+
+class Stage(NamedTuple):
+    name: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    run: Callable[[Dict[str, Any]], Dict[str, Any]]  # context -> {output: value}
+    blocking: bool = False  # waits on I/O (LLM, storage): run on the executor, off the request thread
+
+
+class PipelineError(ValueError):
+    """Raised for unknown outputs or stages that do not produce what they declare"""
+
+
+def check_stages(stages: Sequence[Stage]) -> None:
+    """Reject duplicate stage names, outputs produced twice and inputs nothing produces"""
+    names = set()
+    produced = set(BASE_INPUTS)
+    for stage in stages:
+        if stage.name in names:
+            raise PipelineError(f"Duplicate stage '{stage.name}'")
+        names.add(stage.name)
+        for output in stage.outputs:
+            if output in produced:
+                raise PipelineError(f"Output '{output}' of stage '{stage.name}' is already produced")
+            produced.add(output)
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in produced]
+        if missing:
+            raise PipelineError(f"Stage '{stage.name}' reads {missing}, which no stage produces")
+
+
+def plan_stages(
+    stages: Sequence[Stage],
+    requested: Iterable[str],
+    available: Iterable[str] = ()
+) -> List[Stage]:
+    """Stages needed to produce the requested outputs, in declaration order.
+    Values already in `available` (e.g. a partly run context) are not recomputed.
+    """
+    return list(_plan(tuple(stages), tuple(requested), frozenset(available)))
+
+
+@lru_cache(maxsize=256)
+def _plan(stages: Tuple[Stage, ...], requested: Tuple[str, ...], available: frozenset) -> Tuple[Stage, ...]:
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            producers[output] = stage
+
+    needed = set()
+    pending = list(requested)
+    while pending:
+        name = pending.pop()
+        if name in BASE_INPUTS or name in available:
+            continue
+        stage = producers.get(name)
+        if stage is None:
+            raise PipelineError(f"No stage produces '{name}'")
+        if stage.name not in needed:
+            needed.add(stage.name)
+            pending.extend(stage.inputs)
+
+    return tuple(stage for stage in stages if stage.name in needed)
+
+
+class StageStats:
+    """Running per-stage call count, total and max duration (shared across requests)"""
+
+    def __init__(self):
+        self._stats: Dict[str, List[float]] = {}  # name -> [calls, total_s, max_s]
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                self._stats[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "mean_ms": round(total / calls * 1000, 3),
+                    "max_ms": round(longest * 1000, 3)
+                }
+                for name, (calls, total, longest) in self._stats.items()
+            }
+
+
+@lru_cache(maxsize=256)
+def _dependencies(
+    stages: Tuple[Stage, ...], available: frozenset
+) -> Tuple[Tuple[int, ...], Mapping[str, Tuple[int, ...]]]:
+    """Per stage, how many inputs are missing from `available`; per value, the stages waiting on it"""
+    missing_inputs = []
+    consumers: Dict[str, List[int]] = {}
+    for position, stage in enumerate(stages):
+        waiting_on = {name for name in stage.inputs if name not in available}
+        missing_inputs.append(len(waiting_on))
+        for name in waiting_on:
+            consumers.setdefault(name, []).append(position)
+    return tuple(missing_inputs), MappingProxyType({name: tuple(waiting) for name, waiting in consumers.items()})
+
+
+def _run_timed(
+    stage: Stage,
+    context: Dict[str, Any],
+    span: Optional[Span] = None,
+    memory: Optional[StageMemoryStats] = None
+) -> Tuple[Dict[str, Any], float]:
+    mark = memory_profile.begin() if memory is not None else None
+    started = time.perf_counter()
+    if span is None:
+        produced = stage.run(context)
+    else:
+        with span.child(stage.name, {"stage.blocking": stage.blocking}):
+            produced = stage.run(context)
+    elapsed = time.perf_counter() - started
+    if memory is not None:
+        memory.record(stage.name, memory_profile.delta(mark))
+    missing = [output for output in stage.outputs if output not in produced]
+    if missing:
+        raise PipelineError(f"Stage '{stage.name}' did not produce {sorted(missing)}")
+    return produced, elapsed
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    context: Dict[str, Any],
+    executor: Optional[Executor] = None,
+    stats: Optional[StageStats] = None,
+    span: Optional[Span] = None,
+    memory: Optional[StageMemoryStats] = None
+) -> Dict[str, Any]:
+    """Run planned stages as soon as their inputs are in the context.
+
+    Blocking stages are submitted to the executor as soon as they are ready, so
+    their I/O overlaps the CPU-bound stages, which run on the calling thread in
+    declaration order (threads would only contend for the GIL). Without an
+    executor every stage runs on the calling thread. Each stage's wall time is
+    stored in context["stage_timings"] (milliseconds) and recorded in stats;
+    with a (sampled) span, each stage also runs in a child span of it, and with
+    memory stats (tracemalloc tracing) its allocations are recorded there.
+    """
+    timings = context.setdefault("stage_timings", {})
+    stages = tuple(stages)
+    initial_missing, consumers = _dependencies(stages, frozenset(context))
+    missing_inputs = list(initial_missing)  # per stage: number of inputs not yet in the context
+    inline: List[int] = []  # heap of ready stage positions (declaration order)
+    running = {}  # future -> stage
+    remaining = len(stages)
+
+    def make_ready(position):
+        stage = stages[position]
+        if executor is not None and stage.blocking:
+            running[executor.submit(_run_timed, stage, context, span, memory)] = stage
+        else:
+            heapq.heappush(inline, position)
+
+    def finish(stage, produced, elapsed):
+        nonlocal remaining
+        remaining -= 1
+        context.update(produced)
+        timings[stage.name] = round(elapsed * 1000, 3)
+        if stats is not None:
+            stats.record(stage.name, elapsed)
+        for output in stage.outputs:
+            for position in consumers.get(output, ()):
+                missing_inputs[position] -= 1
+                if missing_inputs[position] == 0:
+                    make_ready(position)
+
+    for position, count in enumerate(missing_inputs):
+        if count == 0:
+            make_ready(position)
+
+    while inline or running:
+        if inline:
+            stage = stages[heapq.heappop(inline)]
+            finish(stage, *_run_timed(stage, context, span, memory))
+            done = [future for future in running if future.done()]
+        else:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            finish(running.pop(future), *future.result())
+
+    if remaining:
+        waiting = [stage.name for stage, count in zip(stages, missing_inputs) if count]
+        raise PipelineError(f"Stages {waiting} wait on inputs that are never produced")
+    return context
@@ -3,33 +3,168 @@ Main Assessment Service
 Orchestrates the complete hormone assessment workflow
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import uuid
 
 from models.schemas import *
-from services.hormone_scorer import HormoneScorer
-from services.cycle_calculator import CycleCalculator
+from services.hormone_scorer import HormoneScorer, ScoringState
+from services.cycle_calculator import CycleCalculator, CycleStatistics, CycleHistoryStore
 from services.confidence_calculator import ConfidenceCalculator
 from services.conflict_detector import ConflictDetector
 from services.explanation_generator import ExplanationGenerator
 from services.llm_service import LLMService
+from services.counterfactual_analyzer import CounterfactualAnalyzer
+from services.assessment_store import AssessmentStore
+from services.population_percentiles import PopulationPercentiles
+from services.assessment_pipeline import Stage, StageStats, check_stages, plan_stages, run_stages
+from services.tracing import current_span
+from services.memory_profile import StageMemoryStats, start_tracing
+
+
+# Top-level AssessmentResponse fields, each produced by a pipeline stage
+RESPONSE_FIELDS = tuple(AssessmentResponse.model_fields)
+
+# Outputs a caller may select (?fields=...); the hormone names are cheap score-only shortcuts
+SELECTABLE_FIELDS = RESPONSE_FIELDS + ("primary_hormone", "secondary_hormones")
+
+# First event of a streamed assessment: deterministic scores, available before the LLM answers
+PRELIMINARY_FIELDS = ("cycle_context", "primary_hormone", "secondary_hormones", "all_hormone_scores")
+
+# Named field sets (?detail=...); "scores" skips explanations, clinical flags and next steps
+DETAIL_FIELDS = {
+    "full": RESPONSE_FIELDS,
+    "scores": (
+        "assessment_metadata", "cycle_context", "primary_hormone", "secondary_hormones",
+        "all_hormone_scores", "confidence"
+    ),
+}
 
 
 class AssessmentService:
     """Main service for processing hormone assessments"""
     
-    def __init__(self, gemini_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        gemini_api_key: Optional[str] = None,
+        stage_workers: int = 0,
+        assessment_store: Optional[AssessmentStore] = None,
+        population: Optional[PopulationPercentiles] = None
+    ):
         """Initialize assessment service"""
         self.llm_service = LLMService(gemini_api_key)
         self.explanation_generator = ExplanationGenerator()
+        self.assessment_store = assessment_store  # complete assessments are persisted when set
+        # Returning users' cycle statistics, stored with their assessments when there is a store
+        self.cycle_history_store = CycleHistoryStore(backend=assessment_store.backend if assessment_store else None)
+        self.population = population  # hormone scores are ranked against past assessments when set
+        # Stateless components shared by all requests; per-request data lives in ScoringState
+        self.hormone_scorer = HormoneScorer()
+        self.cycle_calculator = CycleCalculator()
+        self.confidence_calculator = ConfidenceCalculator()
+        self.conflict_detector = ConflictDetector()
+        self.counterfactual_analyzer = CounterfactualAnalyzer(self)
+        self.stages = self._build_stages()
+        check_stages(self.stages)
+        # Blocking stages (the LLM call) run here while scoring continues (0 = run inline)
+        self.stage_executor = ThreadPoolExecutor(max_workers=stage_workers, thread_name_prefix="stage") if stage_workers else None
+        self.stage_stats = StageStats()
+        self.stage_memory: Optional[StageMemoryStats] = None  # set by enable_memory_profiling()
+    
+    def enable_memory_profiling(self) -> StageMemoryStats:
+        """Start tracemalloc and record each stage's allocations from now on (slows every allocation)"""
+        start_tracing()
+        if self.stage_memory is None:
+            self.stage_memory = StageMemoryStats()
+        return self.stage_memory
+    
+    def add_stage(self, stage: Stage) -> None:
+        """Plug in an extra stage; its outputs become available to assess_outputs"""
+        stages = self.stages + (stage,)
+        check_stages(stages)
+        self.stages = stages
+    
+    def analyze_counterfactuals(
+        self,
+        assessment_request: CompleteAssessmentRequest
+    ) -> CounterfactualResponse:
+        """Report which single-answer changes would alter primary/secondary imbalances or confidence"""
+        return self.counterfactual_analyzer.analyze(assessment_request)
     
     def process_complete_assessment(
         self, 
         assessment_request: CompleteAssessmentRequest
     ) -> AssessmentResponse:
         """Process complete hormone assessment"""
-        trace_id = str(uuid.uuid4())[:8]
+        outputs = self.assess_outputs(assessment_request, RESPONSE_FIELDS)
+        response = AssessmentResponse(**{field: outputs[field] for field in RESPONSE_FIELDS})
+        self._persist(assessment_request, response)
+        trace_id = outputs["trace_id"]
+        print(f"[FINAL][TRACE {trace_id}] Primary Hormone:", response.primary_imbalance.hormone, "direction:", response.primary_imbalance.direction, "score:", response.primary_imbalance.total_score)
+        print("[FINAL] Confidence Level:", response.confidence.level, "Score:", response.confidence.score)
+        print("[FINAL] Next Steps (immediate):", response.next_steps.immediate)
+        print(f"========== AUVRA ASSESSMENT END [TRACE {trace_id}] =========\n")
+        return response
+    
+    def assess_outputs(
+        self,
+        assessment_request: CompleteAssessmentRequest,
+        outputs: Iterable[str],
+        use_llm: bool = True
+    ) -> Dict[str, Any]:
+        """Run only the stages needed for the requested outputs.
+        Returns the pipeline context (request, trace_id, stage_timings and every computed output).
+        """
+        context = self._new_context(assessment_request, use_llm)
+        return self._run_outputs(context, outputs)
+    
+    def stream_assessment(
+        self,
+        assessment_request: CompleteAssessmentRequest,
+        use_llm: bool = True
+    ) -> Iterator[Tuple[str, Any]]:
+        """Yield ("scores", dict) as soon as deterministic scoring is done, then
+        ("result", AssessmentResponse) once the LLM and the remaining stages finish.
+        Both phases share one pipeline context, so no stage runs twice.
+        """
+        context = self._new_context(assessment_request, use_llm)
+        self._run_outputs(context, ("preliminary_scores",))
+        yield "scores", {
+            **context["preliminary_scores"],
+            "llm_pending": use_llm and any(self._others_inputs(assessment_request))
+        }
+        
+        self._run_outputs(context, RESPONSE_FIELDS)
+        response = AssessmentResponse(**{field: context[field] for field in RESPONSE_FIELDS})
+        self._persist(assessment_request, response)
+        print(f"========== AUVRA ASSESSMENT END [TRACE {context['trace_id']}] =========\n")
+        yield "result", response
+    
+    def _persist(self, assessment_request: CompleteAssessmentRequest, response: AssessmentResponse) -> None:
+        """Queue a complete assessment for storage (write-behind, never blocks the response),
+        add its scores to the population sketches and its period dates to the user's
+        cycle statistics. Partial and failed runs reach none of these."""
+        hormone_scores = {h: score.total for h, score in response.all_hormone_scores.items()}
+        period_dates = self._period_dates(assessment_request) if assessment_request.user_id else []
+        if period_dates:
+            self.cycle_history_store.record(assessment_request.user_id, period_dates)
+        if self.population is not None:
+            self.population.record(hormone_scores)
+        if self.assessment_store is not None:
+            self.assessment_store.save(
+                response.assessment_metadata.assessment_id,
+                assessment_request.user_id,
+                assessment_request,
+                response,
+                hormone_scores if assessment_request.user_id else None,
+                period_dates
+            )
+    
+    def _new_context(self, assessment_request: CompleteAssessmentRequest, use_llm: bool) -> Dict[str, Any]:
+        # Sampled requests log their OpenTelemetry trace id, so logs and spans line up
+        span = current_span()
+        trace_id = span.trace_id if span is not None else str(uuid.uuid4())[:8]
         print(f"\n========== AUVRA ASSESSMENT START [TRACE {trace_id}] ==========")
         print("[REQUEST] Basic Info:", assessment_request.basic_info.model_dump())
         print("[REQUEST] Period Pattern:", assessment_request.period_pattern.model_dump())
@@ -40,39 +175,133 @@ class AssessmentService:
             print("[REQUEST] Lab Results Provided:", assessment_request.lab_results.model_dump())
         else:
             print("[REQUEST] Lab Results: NONE")
-        
-        # Initialize services
-        hormone_scorer = HormoneScorer()
-        cycle_calculator = CycleCalculator()
-        confidence_calculator = ConfidenceCalculator()
-        conflict_detector = ConflictDetector()
+        return {
+            "request": assessment_request,
+            "options": {"use_llm": use_llm},
+            "trace_id": trace_id
+        }
+    
+    def _run_outputs(self, context: Dict[str, Any], outputs: Iterable[str]) -> Dict[str, Any]:
+        """Run the stages behind `outputs` that have not already run in this context"""
+        trace_id = context["trace_id"]
+        stages = plan_stages(self.stages, outputs, available=context)
+        print(f"[PIPELINE][{trace_id}] Stages:", [stage.name for stage in stages])
+        parent = current_span()
+        if parent is None:
+            run_stages(stages, context, executor=self.stage_executor, stats=self.stage_stats, memory=self.stage_memory)
+        else:
+            with parent.child("pipeline", {"pipeline.stages": len(stages)}) as span:
+                run_stages(
+                    stages, context, executor=self.stage_executor, stats=self.stage_stats,
+                    span=span, memory=self.stage_memory
+                )
+        print(f"[PIPELINE][{trace_id}] Stage timings (ms):", context["stage_timings"])
+        return context
+    
+    # ==================== PIPELINE STAGES ====================
+    
+    def _build_stages(self) -> Tuple[Stage, ...]:
+        """Assessment stages in execution order, with the values each reads and produces"""
+        return (
+            Stage("cycle_context", ("request",), ("cycle_context",), self._stage_cycle_context),
+            Stage("answer_scores", ("request", "cycle_context"), ("answer_scoring",), self._stage_answer_scores),
+            Stage(
+                "llm_others", ("request", "options", "cycle_context"), ("llm_responses",),
+                self._stage_llm_others, blocking=True
+            ),
+            Stage(
+                "preliminary_scores",
+                ("request", "cycle_context", "answer_scoring"),
+                ("preliminary_scores",),
+                self._stage_preliminary_scores
+            ),
+            Stage(
+                "final_scores",
+                ("request", "cycle_context", "answer_scoring", "llm_responses"),
+                ("scoring", "primary_hormone", "secondary_hormones", "labs_uploaded",
+                 "labs_concordance", "llm_confidence", "llm_flags"),
+                self._stage_final_scores
+            ),
+            Stage("symptom_counts", ("request", "scoring"), ("symptoms_count", "symptom_clusters"), self._stage_symptom_counts),
+            Stage(
+                "conflicts",
+                ("request", "scoring", "symptom_clusters", "labs_uploaded", "labs_concordance"),
+                ("conflicts",),
+                self._stage_conflicts
+            ),
+            Stage(
+                "base_confidence",
+                ("request", "symptoms_count", "symptom_clusters", "labs_uploaded", "labs_concordance",
+                 "llm_confidence"),
+                ("base_confidence",),
+                self._stage_base_confidence
+            ),
+            Stage("confidence", ("base_confidence", "conflicts"), ("confidence",), self._stage_confidence),
+            Stage(
+                "imbalances",
+                ("scoring", "primary_hormone", "secondary_hormones", "labs_uploaded"),
+                ("primary_imbalance", "secondary_imbalances"),
+                self._stage_imbalances
+            ),
+            Stage(
+                "clinical_flags",
+                ("request", "scoring", "labs_uploaded", "conflicts", "llm_flags"),
+                ("clinical_flags",),
+                self._stage_clinical_flags
+            ),
+            Stage(
+                "next_steps",
+                ("primary_hormone", "secondary_hormones", "labs_uploaded", "confidence"),
+                ("next_steps",),
+                self._stage_next_steps
+            ),
+            Stage("hormone_scores", ("scoring",), ("all_hormone_scores",), self._stage_hormone_scores),
+            Stage("user_profile", ("request",), ("user_profile",), self._stage_user_profile),
+            Stage("metadata", ("request",), ("assessment_metadata",), self._stage_metadata),
+        )
+    
+    def _stage_cycle_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        assessment_request = context["request"]
+        print("[STEP 4] Calculating cycle context...")
+        # Read-only: the dates are recorded in _persist once the assessment completes
+        cycle_statistics = self._cycle_statistics(assessment_request)
+        if cycle_statistics is not None:
+            print("[CYCLE HISTORY] Cycles:", cycle_statistics.count,
+                  "Mean:", round(cycle_statistics.mean, 1), "Std:", round(cycle_statistics.std, 1))
+        cycle_context = self.cycle_calculator.calculate_cycle_context(
+            assessment_request.cycle_details.last_period_date,
+            assessment_request.cycle_details.cycle_length,
+            assessment_request.cycle_details.date_not_sure,
+            cycle_statistics
+        )
+        print("[CYCLE CONTEXT] Phase:", cycle_context.current_phase,
+              "Days Since Period:", cycle_context.days_since_period,
+              "Estimated Next Period:", cycle_context.estimated_next_period)
+        return {"cycle_context": cycle_context}
+    
+    def _stage_answer_scores(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Deterministic scoring of the questionnaire answers (no LLM, no labs)"""
+        assessment_request = context["request"]
+        cycle_context = context["cycle_context"]
+        hormone_scorer = self.hormone_scorer
+        scoring = ScoringState()
         
         # Step 1: Score period pattern
         print("[STEP 1] Scoring period pattern:", assessment_request.period_pattern.period_pattern)
-        hormone_scorer.score_period_pattern(assessment_request.period_pattern.period_pattern)
+        hormone_scorer.score_period_pattern(scoring, assessment_request.period_pattern.period_pattern)
         
         # Step 2: Apply birth control modifier
         print("[STEP 2] Applying birth control modifier:", assessment_request.period_pattern.birth_control)
-        hormone_scorer.apply_birth_control_modifier(assessment_request.period_pattern.birth_control)
+        hormone_scorer.apply_birth_control_modifier(scoring, assessment_request.period_pattern.birth_control)
         
         # Step 3: Score cycle length
         print("[STEP 3] Scoring cycle length:", assessment_request.cycle_details.cycle_length)
-        hormone_scorer.score_cycle_length(assessment_request.cycle_details.cycle_length)
-        
-        # Step 4: Calculate cycle context
-        print("[STEP 4] Calculating cycle context...")
-        cycle_context = cycle_calculator.calculate_cycle_context(
-            assessment_request.cycle_details.last_period_date,
-            assessment_request.cycle_details.cycle_length,
-            assessment_request.cycle_details.date_not_sure
-        )
-        print("[CYCLE CONTEXT] Phase:", cycle_context.current_phase,
-              "Days Since Period:", cycle_context.days_since_period,
-              "Estimated Next Period:", cycle_context.estimated_next_period)
+        hormone_scorer.score_cycle_length(scoring, assessment_request.cycle_details.cycle_length)
         
         # Step 5: Score health concerns with cycle phase awareness
         print("[STEP 5] Scoring health concerns with cycle phase awareness (phase:", cycle_context.current_phase, ")")
         hormone_scorer.score_health_concerns(
+            scoring,
             assessment_request.health_concerns,
             cycle_context.current_phase
         )
@@ -80,6 +309,7 @@ class AssessmentService:
         # Step 6: Apply top concern multiplier
         print("[STEP 6] Applying top concern multiplier:", assessment_request.top_concern.top_concern)
         hormone_scorer.apply_top_concern_multiplier(
+            scoring,
             assessment_request.top_concern.top_concern,
             assessment_request.health_concerns
         )
@@ -87,67 +317,99 @@ class AssessmentService:
         # Step 7: Score diagnosed conditions
         print("[STEP 7] Scoring diagnosed conditions:", assessment_request.diagnosed_conditions.conditions)
         hormone_scorer.score_diagnosed_conditions(
+            scoring,
             assessment_request.diagnosed_conditions.conditions
         )
+        return {"answer_scoring": scoring}
+    
+    def _stage_llm_others(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Step 8: Process BOTH "Others" inputs with LLM in a SINGLE API call (if provided)"""
+        assessment_request = context["request"]
+        trace_id = context["trace_id"]
+        
+        diagnosed_others, health_others = self._others_inputs(assessment_request)
+        
+        if not (diagnosed_others or health_others):
+            return {"llm_responses": (None, None)}
+        if not context["options"]["use_llm"]:
+            print(f"[STEP 8][{trace_id}] Skipping LLM for 'others' inputs (use_llm=False)")
+            return {"llm_responses": (None, None)}
+        
+        print(f"[STEP 8][{trace_id}] Processing 'others' inputs with LLM")
+        if diagnosed_others:
+            print(f"  - diagnosed_conditions.others: {diagnosed_others}")
+        if health_others:
+            print(f"  - health_concerns.others: {health_others}")
+        
+        user_context = self._build_user_context(assessment_request, context["cycle_context"])
+        
+        # Single API call for both inputs
+        llm_responses = self.llm_service.process_both_others_inputs(
+            diagnosed_input=diagnosed_others,
+            health_concerns_input=health_others,
+            user_context=user_context,
+            trace_id=trace_id
+        )
+        return {"llm_responses": llm_responses}
+    
+    def _stage_preliminary_scores(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Answers and labs only: the scores a streamed assessment sends before the LLM answers"""
+        print("[PRELIMINARY] Scoring without LLM contributions...")
+        final = self._stage_final_scores({**context, "llm_responses": (None, None)})
+        return {
+            "preliminary_scores": {
+                "cycle_context": context["cycle_context"],
+                "primary_hormone": final["primary_hormone"],
+                "secondary_hormones": final["secondary_hormones"],
+                "all_hormone_scores": self._hormone_score_models(final["scoring"])
+            }
+        }
+    
+    def _stage_final_scores(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply LLM and lab contributions, finalize totals and pick imbalances"""
+        assessment_request = context["request"]
+        cycle_context = context["cycle_context"]
+        trace_id = context["trace_id"]
+        hormone_scorer = self.hormone_scorer
+        scoring = context["answer_scoring"].copy()  # answer-only scores stay available unchanged
         
-        # Step 8: Process BOTH "Others" inputs with LLM in a SINGLE API call (if provided)
         llm_confidence = None
-        clinical_flags: List[ClinicalFlag] = []
         llm_flags_raw: List[str] = []
-        
-        diagnosed_others = assessment_request.diagnosed_conditions.others_input if assessment_request.diagnosed_conditions.others_input else None
-        health_others = assessment_request.health_concerns.others.strip() if assessment_request.health_concerns.others and assessment_request.health_concerns.others.strip() else None
-        
-        if diagnosed_others or health_others:
-            print(f"[STEP 8][{trace_id}] Processing 'others' inputs with LLM")
-            if diagnosed_others:
-                print(f"  - diagnosed_conditions.others: {diagnosed_others}")
-            if health_others:
-                print(f"  - health_concerns.others: {health_others}")
-            
-            user_context = self._build_user_context(assessment_request, cycle_context)
-            
-            # Single API call for both inputs
-            llm_response_diagnosed, llm_response_health = self.llm_service.process_both_others_inputs(
-                diagnosed_input=diagnosed_others,
-                health_concerns_input=health_others,
-                user_context=user_context,
+        llm_response_diagnosed, llm_response_health = context["llm_responses"]
+        
+        # Apply scores from diagnosed conditions response
+        if llm_response_diagnosed:
+            llm_confidence, llm_flags = self.llm_service.apply_llm_scores(
+                llm_response_diagnosed, 
+                scoring,
+                assessment_request.diagnosed_conditions.others_input,
+                source="diagnosed_conditions",
                 trace_id=trace_id
             )
+            print(f"[LLM][{trace_id}] Diagnosed Conditions Confidence:", llm_confidence)
+            print(f"[LLM][{trace_id}] Diagnosed Conditions Flags:", llm_flags)
+            llm_flags_raw.extend(llm_flags)
+        
+        # Apply scores from health concerns response
+        if llm_response_health:
+            llm_confidence_hc, llm_flags_hc = self.llm_service.apply_llm_scores(
+                llm_response_health, 
+                scoring,
+                assessment_request.health_concerns.others.strip(),
+                source="health_concerns",
+                trace_id=trace_id
+            )
+            print(f"[LLM][{trace_id}] Health Concerns Confidence:", llm_confidence_hc)
+            print(f"[LLM][{trace_id}] Health Concerns Flags:", llm_flags_hc)
+            llm_flags_raw.extend(llm_flags_hc)
             
-            # Apply scores from diagnosed conditions response
-            if llm_response_diagnosed:
-                llm_confidence, llm_flags = self.llm_service.apply_llm_scores(
-                    llm_response_diagnosed, 
-                    hormone_scorer,
-                    diagnosed_others,
-                    source="diagnosed_conditions",
-                    trace_id=trace_id
-                )
-                print(f"[LLM][{trace_id}] Diagnosed Conditions Confidence:", llm_confidence)
-                print(f"[LLM][{trace_id}] Diagnosed Conditions Flags:", llm_flags)
-                llm_flags_raw.extend(llm_flags)
-            
-            # Apply scores from health concerns response
-            if llm_response_health:
-                llm_confidence_hc, llm_flags_hc = self.llm_service.apply_llm_scores(
-                    llm_response_health, 
-                    hormone_scorer,
-                    health_others,
-                    source="health_concerns",
-                    trace_id=trace_id
-                )
-                print(f"[LLM][{trace_id}] Health Concerns Confidence:", llm_confidence_hc)
-                print(f"[LLM][{trace_id}] Health Concerns Flags:", llm_flags_hc)
-                llm_flags_raw.extend(llm_flags_hc)
-                
-                # Use the more conservative (lower) confidence if both present
-                # Confidence levels: high > medium > low
-                if llm_confidence and llm_confidence_hc:
-                    confidence_order = {"low": 0, "medium": 1, "high": 2}
-                    llm_confidence = llm_confidence if confidence_order[llm_confidence] <= confidence_order[llm_confidence_hc] else llm_confidence_hc
-                elif llm_confidence_hc:
-                    llm_confidence = llm_confidence_hc
+            # Use the more conservative (lower) confidence if both present
+            # Confidence levels: high > medium > low
+            if llm_confidence and llm_confidence_hc:
+                confidence_order = {"low": 0, "medium": 1, "high": 2}
+                llm_confidence = llm_confidence if confidence_order[llm_confidence] <= confidence_order[llm_confidence_hc] else llm_confidence_hc
+            elif llm_confidence_hc:
+                llm_confidence = llm_confidence_hc
         
         # Step 9: Score lab results if provided
         labs_uploaded = assessment_request.lab_results is not None
@@ -155,62 +417,57 @@ class AssessmentService:
         
         if labs_uploaded:
             print("[STEP 9] Scoring lab results...")
-            hormone_scorer.score_lab_results(assessment_request.lab_results)
+            # Against the default (Day 3 / Day 19-22) ranges: the phase-specific ones are only
+            # applied when a caller states the phase a panel was drawn in (/api/v1/labs/evaluate)
+            hormone_scorer.score_lab_results(scoring, assessment_request.lab_results)
             print("[LABS] Post-scoring hormone 'from_labs' contributions:")
-            for h, data in hormone_scorer.hormone_scores.items():
+            for h, data in scoring.hormone_scores.items():
                 if data.get("from_labs", 0) > 0:
                     print(f"  - {h}: from_labs={data['from_labs']}, direction={data['direction']}")
             labs_concordance = self._calculate_lab_concordance(
-                hormone_scorer.hormone_scores,
-                hormone_scorer.contributing_factors
+                scoring.hormone_scores,
+                scoring.contributing_factors
             )
             print("[LABS] Concordance classification:", labs_concordance)
         
         # Step 10: Calculate final scores
         print("[STEP 10] Calculating final scores...")
-        hormone_scorer.calculate_final_scores()
+        hormone_scorer.calculate_final_scores(scoring)
         
         # Step 11: Identify primary and secondary imbalances
         print("[STEP 11] Determining primary and secondary imbalances...")
-        primary_hormone, secondary_hormones = hormone_scorer.get_primary_secondary_imbalances()
+        primary_hormone, secondary_hormones = hormone_scorer.get_primary_secondary_imbalances(scoring)
         print("[IMBALANCES] Primary:", primary_hormone, "Secondary:", secondary_hormones)
         
+        return {
+            "scoring": scoring,
+            "primary_hormone": primary_hormone,
+            "secondary_hormones": secondary_hormones,
+            "labs_uploaded": labs_uploaded,
+            "labs_concordance": labs_concordance,
+            "llm_confidence": llm_confidence,
+            "llm_flags": llm_flags_raw
+        }
+    
+    def _stage_symptom_counts(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 12: Count symptoms by hormone cluster
         print("[STEP 12] Counting symptoms by hormone cluster...")
-        symptoms_count = self._count_total_symptoms(assessment_request.health_concerns)
-        symptom_clusters = self._count_symptoms_by_hormone(hormone_scorer.contributing_factors)
+        symptoms_count = self._count_total_symptoms(context["request"].health_concerns)
+        symptom_clusters = self._count_symptoms_by_hormone(context["scoring"].contributing_factors)
         # symptom_clusters already contains counts per hormone (ints), so print directly
         print("[SYMPTOMS] Total:", symptoms_count, "Clusters:", symptom_clusters)
-        
-        # Step 13: Calculate confidence
-        print("[STEP 13] Calculating confidence score...")
-        confidence = confidence_calculator.calculate_confidence(
-            period_pattern=assessment_request.period_pattern.period_pattern,
-            last_period_date=assessment_request.cycle_details.last_period_date,
-            cycle_length=assessment_request.cycle_details.cycle_length,
-            date_not_sure=assessment_request.cycle_details.date_not_sure,
-            diagnosed_conditions=assessment_request.diagnosed_conditions.conditions,
-            top_concern_selected=True,
-            birth_control=assessment_request.period_pattern.birth_control,
-            symptoms_count=symptoms_count,
-            symptom_clusters=symptom_clusters,
-            labs_uploaded=labs_uploaded,
-            labs_concordance=labs_concordance,
-            conflicts_detected=0,  # Will update after conflict detection
-            llm_confidence=llm_confidence
-        )
-        print("[CONFIDENCE] Level:", confidence.level, "Score:", confidence.score)
-        for factor in confidence.calculation_breakdown:
-            print(f"  [CONFIDENCE FACTOR] {factor.factor}: {factor.points}")
-        
+        return {"symptoms_count": symptoms_count, "symptom_clusters": symptom_clusters}
+    
+    def _stage_conflicts(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 14: Detect conflicts
         print("[STEP 14] Detecting conflicts...")
-        conflicts = conflict_detector.detect_all_conflicts(
-            hormone_scores=hormone_scorer.hormone_scores,
+        assessment_request = context["request"]
+        conflicts = self.conflict_detector.detect_all_conflicts(
+            hormone_scores=context["scoring"].hormone_scores,
             diagnosed_conditions=assessment_request.diagnosed_conditions.conditions,
-            symptoms_by_hormone=symptom_clusters,
-            labs_uploaded=labs_uploaded,
-            labs_concordance=labs_concordance,
+            symptoms_by_hormone=context["symptom_clusters"],
+            labs_uploaded=context["labs_uploaded"],
+            labs_concordance=context["labs_concordance"],
             birth_control=assessment_request.period_pattern.birth_control
         )
         if conflicts:
@@ -219,42 +476,78 @@ class AssessmentService:
                 print("  -", c.description, "impact:", c.impact_on_confidence)
         else:
             print("[CONFLICTS] None detected")
-        
+        return {"conflicts": conflicts}
+    
+    def _stage_base_confidence(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Step 13: Calculate confidence
+        print("[STEP 13] Calculating confidence score...")
+        assessment_request = context["request"]
+        confidence = self.confidence_calculator.calculate_confidence(
+            period_pattern=assessment_request.period_pattern.period_pattern,
+            last_period_date=assessment_request.cycle_details.last_period_date,
+            cycle_length=assessment_request.cycle_details.cycle_length,
+            date_not_sure=assessment_request.cycle_details.date_not_sure,
+            diagnosed_conditions=assessment_request.diagnosed_conditions.conditions,
+            top_concern_selected=True,
+            birth_control=assessment_request.period_pattern.birth_control,
+            symptoms_count=context["symptoms_count"],
+            symptom_clusters=context["symptom_clusters"],
+            labs_uploaded=context["labs_uploaded"],
+            labs_concordance=context["labs_concordance"],
+            conflicts_detected=0,  # Conflicts are added as their own factor below
+            llm_confidence=context["llm_confidence"]
+        )
+        return {"base_confidence": confidence}
+    
+    def _stage_confidence(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Update confidence with conflict count
+        confidence = context["base_confidence"]
+        conflicts = context["conflicts"]
         if conflicts:
-            confidence.score += sum(c.impact_on_confidence for c in conflicts)
-            confidence.calculation_breakdown.append(
-                ConfidenceFactor(
-                    factor=f"{len(conflicts)} conflict(s) detected",
-                    points=sum(c.impact_on_confidence for c in conflicts)
-                )
-            )
-        
+            impact = sum(c.impact_on_confidence for c in conflicts)
+            confidence = confidence.model_copy(update={
+                "score": confidence.score + impact,
+                "calculation_breakdown": confidence.calculation_breakdown + [
+                    ConfidenceFactor(factor=f"{len(conflicts)} conflict(s) detected", points=impact)
+                ]
+            })
+        print("[CONFIDENCE] Level:", confidence.level, "Score:", confidence.score)
+        for factor in confidence.calculation_breakdown:
+            print(f"  [CONFIDENCE FACTOR] {factor.factor}: {factor.points}")
+        return {"confidence": confidence}
+    
+    def _stage_imbalances(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 15: Generate explanations and recommendations
+        scoring = context["scoring"]
+        labs_uploaded = context["labs_uploaded"]
+        primary_hormone = context["primary_hormone"]
         print("[STEP 15] Building explanations for primary hormone:", primary_hormone)
         primary_imbalance = self._build_hormone_imbalance(
             primary_hormone,
-            hormone_scorer,
+            scoring,
             labs_uploaded
         )
         
         secondary_imbalances = [
-            self._build_hormone_imbalance(h, hormone_scorer, labs_uploaded)
-            for h in secondary_hormones
+            self._build_hormone_imbalance(h, scoring, labs_uploaded)
+            for h in context["secondary_hormones"]
         ]
         if secondary_imbalances:
             print("[STEP 15] Secondary imbalances built:", [s.hormone for s in secondary_imbalances])
-        
+        return {"primary_imbalance": primary_imbalance, "secondary_imbalances": secondary_imbalances}
+    
+    def _stage_clinical_flags(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 16: Generate clinical flags
         print("[STEP 16] Generating clinical flags...")
         generated_flags = self._generate_clinical_flags(
-            hormone_scorer.hormone_scores,
-            assessment_request,
-            labs_uploaded,
-            conflicts
+            context["scoring"].hormone_scores,
+            context["request"],
+            context["labs_uploaded"],
+            context["conflicts"]
         )
+        clinical_flags: List[ClinicalFlag] = []
         # Normalize any plain string flags from LLM fallback into ClinicalFlag objects
-        for f in llm_flags_raw:
+        for f in context["llm_flags"]:
             # llm fallback returns strings; convert to ClinicalFlag
             if isinstance(f, str):
                 clinical_flags.append(
@@ -266,29 +559,42 @@ class AssessmentService:
                 )
         clinical_flags.extend(generated_flags)
         print("[FLAGS] Total clinical flags:", len(clinical_flags))
-        
+        return {"clinical_flags": clinical_flags}
+    
+    def _stage_next_steps(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 17: Generate next steps
         print("[STEP 17] Generating next steps...")
         next_steps = self._generate_next_steps(
-            primary_hormone,
-            secondary_hormones,
-            labs_uploaded,
-            confidence.level
+            context["primary_hormone"],
+            context["secondary_hormones"],
+            context["labs_uploaded"],
+            context["confidence"].level
         )
-        
+        return {"next_steps": next_steps}
+    
+    def _stage_hormone_scores(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 18: Build all hormone scores
         print("[STEP 18] Compiling all hormone scores...")
+        return {"all_hormone_scores": self._hormone_score_models(context["scoring"])}
+    
+    def _hormone_score_models(self, scoring: ScoringState) -> Dict[str, HormoneScore]:
         all_hormone_scores = {}
-        for hormone, data in hormone_scorer.hormone_scores.items():
+        population = self.population
+        for hormone, data in scoring.hormone_scores.items():
+            breakdown = self.hormone_scorer.get_hormone_breakdown(scoring, hormone)
             all_hormone_scores[hormone] = HormoneScore(
                 total=data["total"],
                 direction=data["direction"],
-                breakdown=hormone_scorer.get_hormone_breakdown(hormone)
+                breakdown=breakdown,
+                population_percentile=population.percentile(hormone, data["total"]) if population else None
             )
-            print(f"  [HORMONE SUMMARY] {hormone}: total={data['total']} direction={data['direction']} breakdown={hormone_scorer.get_hormone_breakdown(hormone)}")
-        
+            print(f"  [HORMONE SUMMARY] {hormone}: total={data['total']} direction={data['direction']} breakdown={breakdown}")
+        return all_hormone_scores
+    
+    def _stage_user_profile(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Step 19: Build user profile
         print("[STEP 19] Building user profile...")
+        assessment_request = context["request"]
         user_profile = UserProfile(
             age=assessment_request.basic_info.age,
             last_period_date=assessment_request.cycle_details.last_period_date,
@@ -296,31 +602,46 @@ class AssessmentService:
             birth_control=assessment_request.period_pattern.birth_control,
             diagnosed_conditions=assessment_request.diagnosed_conditions.conditions
         )
-        
-        # Step 20: Build complete response
-        print("[STEP 20] Finalizing assessment response...")
-        response = AssessmentResponse(
-            assessment_metadata=AssessmentMetadata(
-                user_id=str(uuid.uuid4()),
-                assessment_date=date.today(),
-                version="1.0",
-                disclaimer="This assessment is for educational purposes only and does not constitute medical diagnosis. Please consult a qualified healthcare provider for proper diagnosis and treatment."
-            ),
-            user_profile=user_profile,
-            cycle_context=cycle_context,
-            primary_imbalance=primary_imbalance,
-            secondary_imbalances=secondary_imbalances,
-            all_hormone_scores=all_hormone_scores,
-            confidence=confidence,
-            conflicts=conflicts,
-            clinical_flags=clinical_flags,
-            next_steps=next_steps
+        return {"user_profile": user_profile}
+    
+    def _stage_metadata(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Step 20: Build assessment metadata
+        assessment_metadata = AssessmentMetadata(
+            user_id=context["request"].user_id or str(uuid.uuid4()),
+            assessment_id=uuid.uuid4().hex,
+            assessment_date=date.today(),
+            version="1.0",
+            disclaimer="This assessment is for educational purposes only and does not constitute medical diagnosis. Please consult a qualified healthcare provider for proper diagnosis and treatment."
         )
-        print(f"[FINAL][TRACE {trace_id}] Primary Hormone:", response.primary_imbalance.hormone, "direction:", response.primary_imbalance.direction, "score:", response.primary_imbalance.total_score)
-        print("[FINAL] Confidence Level:", response.confidence.level, "Score:", response.confidence.score)
-        print("[FINAL] Next Steps (immediate):", response.next_steps.immediate)
-        print(f"========== AUVRA ASSESSMENT END [TRACE {trace_id}] =========\n")
-        return response
+        return {"assessment_metadata": assessment_metadata}
+    
+    def _others_inputs(self, assessment_request: CompleteAssessmentRequest) -> Tuple[Optional[str], Optional[str]]:
+        """Free-text "others" answers (diagnosed conditions, health concerns) the LLM interprets"""
+        diagnosed_others = assessment_request.diagnosed_conditions.others_input if assessment_request.diagnosed_conditions.others_input else None
+        health_others = assessment_request.health_concerns.others.strip() if assessment_request.health_concerns.others and assessment_request.health_concerns.others.strip() else None
+        return diagnosed_others, health_others
+    
+    def _cycle_statistics(self, request: CompleteAssessmentRequest) -> Optional[CycleStatistics]:
+        """Running cycle statistics from the submitted period history.
+        With a user_id, new dates are folded into a copy of the user's stored statistics
+        (O(1) per new date; nothing is stored, see _persist); without one they are
+        computed from this request.
+        The API only lets through user_ids it issued (app._require_issued_user_id).
+        """
+        dates = self._period_dates(request)
+        if request.user_id:
+            return self.cycle_history_store.peek(request.user_id, dates)
+        if not dates:
+            return None
+        return CycleStatistics.from_dates(dates)
+    
+    def _period_dates(self, request: CompleteAssessmentRequest) -> List[date]:
+        """Period start dates of a request: its history plus a confirmed last period date"""
+        cycle_details = request.cycle_details
+        dates = list(cycle_details.period_history)
+        if cycle_details.last_period_date and not cycle_details.date_not_sure:
+            dates.append(cycle_details.last_period_date)
+        return dates
     
     def _build_user_context(self, request: CompleteAssessmentRequest, cycle_context: CycleContext) -> dict:
         """Build user context for LLM"""
@@ -382,24 +703,19 @@ class AssessmentService:
     def _build_hormone_imbalance(
         self, 
         hormone: str, 
-        scorer: HormoneScorer, 
+        scoring: ScoringState, 
         has_labs: bool
     ) -> HormoneImbalance:
         """Build hormone imbalance object with explanation"""
         
-        data = scorer.hormone_scores[hormone]
+        data = scoring.hormone_scores[hormone]
         direction = data["direction"]
         
-        explanation = self.explanation_generator.generate_explanation(
-            hormone,
-            direction,
-            scorer.contributing_factors[hormone],
-            has_labs
-        )
-        
-        recommendations = self.explanation_generator.get_recommendations(
+        # Cached on (hormone, direction, has_labs, top factors); recommendations are shared read-only sets
+        explanation, recommendations = self.explanation_generator.render(
             hormone,
             direction,
+            scoring.contributing_factors[hormone],
             has_labs
         )
         
@@ -407,8 +723,8 @@ class AssessmentService:
             hormone=hormone,
             direction=direction,
             total_score=data["total"],
-            breakdown=scorer.get_hormone_breakdown(hormone),
-            contributing_factors=scorer.contributing_factors[hormone],
+            breakdown=self.hormone_scorer.get_hormone_breakdown(scoring, hormone),
+            contributing_factors=scoring.contributing_factors[hormone],
             explanation=explanation,
             recommendations=recommendations
         )
@@ -0,0 +1,682 @@
+"""
+Assessment Persistence
+Stores each completed assessment (request + response) through a bounded
+write-behind queue, so responses never wait on disk I/O, plus each returning
+user's score history (raw points and week/month rollups) and running cycle
+statistics, each worker's population score sketches and the content blocks
+behind ?content=refs hashes
+"""
+
+import bisect
+import json
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from services.content_store import ContentBlock, content_hash
+from services.cycle_calculator import CycleStatistics
+from services.score_history import (
+    ROLLUP_RESOLUTIONS, HistoryPoint, HistorySummary, RollupStats, fold_scores,
+    history_bucket, raw_point, rollup_point, split_raw_key
+)
+
+
+class StoredAssessment(NamedTuple):
+    assessment_id: str
+    user_id: Optional[str]
+    created_at: str  # ISO 8601, UTC
+    request: Dict
+    response: Dict
+
+
+class StoredResponse(NamedTuple):
+    body: bytes  # canonical JSON of the AssessmentResponse, exactly as first serialized
+    etag: str  # content hash of body (unquoted)
+
+
+class PendingAssessment(NamedTuple):
+    """Queued record, already serialized: holding the model trees until the writer
+    runs costs the request thread more (allocator/cache churn) than dumping them now"""
+    assessment_id: str
+    user_id: Optional[str]
+    created_at: str
+    request_json: str
+    response_body: bytes
+    hormone_scores: Optional[Dict[str, int]] = None  # set for users with a user_id (score history)
+    period_dates: Tuple[str, ...] = ()  # ISO dates folded into the user's cycle statistics
+
+    def materialize(self) -> StoredAssessment:
+        return StoredAssessment(
+            self.assessment_id,
+            self.user_id,
+            self.created_at,
+            json.loads(self.request_json),
+            json.loads(self.response_body)
+        )
+
+    def row(self) -> tuple:
+        """assessments table row: the record plus the response ETag"""
+        return (
+            self.assessment_id,
+            self.user_id,
+            self.created_at,
+            self.request_json,
+            self.response_body,
+            content_hash(self.response_body)
+        )
+
+
+class SketchShard(NamedTuple):
+    shard: str  # one per worker process
+    payload: str  # JSON: hormone -> KLLSketch.to_dict()
+    updated_at: str  # ISO 8601, UTC; also the compare-and-swap version
+
+
+def fold_period_dates(records: List[PendingAssessment]) -> Dict[str, List[date]]:
+    """user_id -> period start dates of its records, sorted (stored statistics ignore old ones)"""
+    grouped = defaultdict(list)
+    for record in records:
+        if record.user_id and record.period_dates:
+            grouped[record.user_id].extend(date.fromisoformat(d) for d in record.period_dates)
+    return {user_id: sorted(dates) for user_id, dates in grouped.items()}
+
+
+def rollup_batches(records: List[PendingAssessment]) -> Dict[Tuple[str, str, str], List[Dict[str, int]]]:
+    """(user_id, resolution, bucket) -> hormone scores of the records falling in it"""
+    grouped = defaultdict(list)
+    for record in records:
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket = history_bucket(record.created_at, resolution)
+            grouped[(record.user_id, resolution, bucket)].append(record.hormone_scores)
+    return grouped
+
+
+class AssessmentBackend(ABC):
+    """Storage interface: implement these methods to plug in another database"""
+
+    @abstractmethod
+    def write_batch(self, records: List[PendingAssessment]) -> None:
+        """Persist records (PendingAssessment.row()) in one commit, add the ones
+        carrying hormone_scores to their user's history and rollups, and fold
+        period_dates into their user's cycle statistics"""
+
+    @abstractmethod
+    def get(self, assessment_id: str) -> Optional[StoredAssessment]:
+        """Stored request and response, parsed; None if unknown"""
+
+    @abstractmethod
+    def get_response(self, assessment_id: str) -> Optional[StoredResponse]:
+        """Stored response bytes and ETag, without parsing"""
+
+    @abstractmethod
+    def history_summary(self, user_id: str) -> Optional[HistorySummary]:
+        """Count and date range of a user's stored scores; None if there are none"""
+
+    @abstractmethod
+    def score_history(
+        self, user_id: str, resolution: str, before: Optional[str], limit: int
+    ) -> List[HistoryPoint]:
+        """Up to `limit` points, newest first, strictly older than the `before` cursor key"""
+
+    @abstractmethod
+    def get_cycle_statistics(self, user_id: str) -> Optional[CycleStatistics]:
+        """A user's stored running cycle statistics; None if there are none"""
+
+    @abstractmethod
+    def load_sketches(self) -> List[SketchShard]:
+        """Every worker's persisted population sketch shard"""
+
+    @abstractmethod
+    def save_sketch(
+        self,
+        shard: str,
+        payload: str,
+        updated_at: str,
+        previous: Optional[str],
+        absorbed: Sequence[Tuple[str, str]] = ()
+    ) -> bool:
+        """Write a shard only if its stored updated_at is still `previous` (None: not
+        stored) and each absorbed (shard, updated_at) is unchanged; absorbed shards
+        are deleted in the same transaction. False (nothing written) otherwise."""
+
+    @abstractmethod
+    def save_blocks(self, blocks: Dict[str, ContentBlock]) -> None:
+        """Store content blocks by hash in one commit (a hash always names the same bytes)"""
+
+    @abstractmethod
+    def get_block(self, key: str) -> Optional[ContentBlock]:
+        """Content block stored by any worker; None if unknown"""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteAssessmentBackend(AssessmentBackend):
+    """Default backend: one SQLite file (WAL mode). Writes share one connection under
+    a lock; reads use a connection per thread, so they never queue behind a commit
+    (":memory:" has one database per connection, so there reads take the lock too)"""
+
+    def __init__(self, path: str = "assessments.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()  # guards _reader_conns only
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS assessments (
+                    assessment_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    created_at TEXT NOT NULL,
+                    request_json TEXT NOT NULL,
+                    response_json BLOB NOT NULL,
+                    response_etag TEXT
+                )"""
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(assessments)")}
+            if "response_etag" not in columns:
+                # Databases created before responses were served as stored bytes
+                self._conn.execute("ALTER TABLE assessments ADD COLUMN response_etag TEXT")
+            # Score history: clustered on (user, time) so a page is one index range scan
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS score_history (
+                    user_id TEXT NOT NULL,
+                    assessed_at TEXT NOT NULL,
+                    assessment_id TEXT NOT NULL,
+                    scores_json TEXT NOT NULL,
+                    PRIMARY KEY (user_id, assessed_at, assessment_id)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS score_rollups (
+                    user_id TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    stats_json TEXT NOT NULL,
+                    PRIMARY KEY (user_id, resolution, bucket)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS user_history (
+                    user_id TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    first_at TEXT NOT NULL,
+                    last_at TEXT NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS cycle_statistics (
+                    user_id TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    mean REAL NOT NULL,
+                    m2 REAL NOT NULL,
+                    last_period TEXT
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS population_sketches (
+                    shard TEXT PRIMARY KEY,
+                    sketch_json TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )"""
+            )
+            # Earlier versions stored rendered per-user explanations here; drop them
+            # rather than keep serving them to public caches
+            self._conn.execute("DROP TABLE IF EXISTS content_blocks")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS static_blocks (
+                    hash TEXT PRIMARY KEY,
+                    media_type TEXT NOT NULL,
+                    body BLOB NOT NULL
+                ) WITHOUT ROWID"""
+            )
+
+    def write_batch(self, records: List[PendingAssessment]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO assessments VALUES (?, ?, ?, ?, ?, ?)",
+                [record.row() for record in records]
+            )
+            added = []
+            for record in records:
+                if record.user_id and record.hormone_scores is not None:
+                    inserted = self._conn.execute(
+                        "INSERT OR IGNORE INTO score_history VALUES (?, ?, ?, ?)",
+                        (record.user_id, record.created_at, record.assessment_id,
+                         json.dumps(record.hormone_scores))
+                    ).rowcount
+                    if inserted:  # a re-written record is not counted twice
+                        added.append(record)
+            if added:
+                self._add_to_rollups(added)
+            # Read and written inside the batch's write transaction: atomic across workers
+            for user_id, dates in fold_period_dates(records).items():
+                row = self._conn.execute(
+                    "SELECT count, mean, m2, last_period FROM cycle_statistics WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                stats = _cycle_statistics(row) if row else CycleStatistics()
+                for period_start in dates:
+                    stats.add_period(period_start)
+                count, mean, m2, last_period = stats.state()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cycle_statistics VALUES (?, ?, ?, ?, ?)",
+                    (user_id, count, mean, m2, last_period.isoformat() if last_period else None)
+                )
+
+    def _add_to_rollups(self, records: List[PendingAssessment]) -> None:
+        for (user_id, resolution, bucket), scores in rollup_batches(records).items():
+            row = self._conn.execute(
+                "SELECT count, stats_json FROM score_rollups WHERE user_id = ? AND resolution = ? AND bucket = ?",
+                (user_id, resolution, bucket)
+            ).fetchone()
+            count, stats = fold_scores(row[0], json.loads(row[1]), scores) if row else fold_scores(0, {}, scores)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO score_rollups VALUES (?, ?, ?, ?, ?)",
+                (user_id, resolution, bucket, count, json.dumps(stats))
+            )
+        self._conn.executemany(
+            """INSERT INTO user_history VALUES (?, 1, ?, ?)
+               ON CONFLICT(user_id) DO UPDATE SET
+                   count = count + 1,
+                   first_at = min(first_at, excluded.first_at),
+                   last_at = max(last_at, excluded.last_at)""",
+            [(record.user_id, record.created_at, record.created_at) for record in records]
+        )
+
+    def _read(self, query: str, params: tuple = ()) -> List[tuple]:
+        """Rows of a read-only query, on this thread's own connection"""
+        if self.path == ":memory:":
+            with self._lock:
+                return self._conn.execute(query, params).fetchall()
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it; it is used by this thread alone
+            conn = self._readers.conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._readers_lock:
+                self._reader_conns.append(conn)
+        return conn.execute(query, params).fetchall()
+
+    def get(self, assessment_id: str) -> Optional[StoredAssessment]:
+        rows = self._read(
+            "SELECT assessment_id, user_id, created_at, request_json, response_json "
+            "FROM assessments WHERE assessment_id = ?",
+            (assessment_id,)
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return StoredAssessment(row[0], row[1], row[2], json.loads(row[3]), json.loads(row[4]))
+
+    def get_response(self, assessment_id: str) -> Optional[StoredResponse]:
+        rows = self._read(
+            "SELECT response_json, response_etag FROM assessments WHERE assessment_id = ?",
+            (assessment_id,)
+        )
+        if not rows:
+            return None
+        body, etag = rows[0]
+        body = body.encode("utf-8") if isinstance(body, str) else body  # TEXT rows from older databases
+        return StoredResponse(body, etag or content_hash(body))
+
+    def history_summary(self, user_id: str) -> Optional[HistorySummary]:
+        rows = self._read("SELECT count, first_at, last_at FROM user_history WHERE user_id = ?", (user_id,))
+        return HistorySummary(*rows[0]) if rows else None
+
+    def score_history(
+        self, user_id: str, resolution: str, before: Optional[str], limit: int
+    ) -> List[HistoryPoint]:
+        if resolution == "raw":
+            query = "SELECT assessed_at, assessment_id, scores_json FROM score_history WHERE user_id = ?"
+            params: tuple = (user_id,)
+            if before is not None:
+                query += " AND (assessed_at, assessment_id) < (?, ?)"
+                params += split_raw_key(before)
+            query += " ORDER BY assessed_at DESC, assessment_id DESC LIMIT ?"
+            rows = self._read(query, params + (limit,))
+            return [raw_point(at, assessment_id, json.loads(scores)) for at, assessment_id, scores in rows]
+
+        query = "SELECT bucket, count, stats_json FROM score_rollups WHERE user_id = ? AND resolution = ?"
+        params = (user_id, resolution)
+        if before is not None:
+            query += " AND bucket < ?"
+            params += (before,)
+        query += " ORDER BY bucket DESC LIMIT ?"
+        rows = self._read(query, params + (limit,))
+        return [rollup_point(bucket, count, json.loads(stats)) for bucket, count, stats in rows]
+
+    def get_cycle_statistics(self, user_id: str) -> Optional[CycleStatistics]:
+        rows = self._read("SELECT count, mean, m2, last_period FROM cycle_statistics WHERE user_id = ?", (user_id,))
+        return _cycle_statistics(rows[0]) if rows else None
+
+    def load_sketches(self) -> List[SketchShard]:
+        rows = self._read("SELECT shard, sketch_json, updated_at FROM population_sketches")
+        return [SketchShard(*row) for row in rows]
+
+    def save_sketch(
+        self,
+        shard: str,
+        payload: str,
+        updated_at: str,
+        previous: Optional[str],
+        absorbed: Sequence[Tuple[str, str]] = ()
+    ) -> bool:
+        with self._lock:
+            # IMMEDIATE takes the write lock before the checks: workers share the file
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT updated_at FROM population_sketches WHERE shard = ?", (shard,)
+                ).fetchone()
+                unchanged = (row[0] if row else None) == previous and all(
+                    self._conn.execute(
+                        "DELETE FROM population_sketches WHERE shard = ? AND updated_at = ?", other
+                    ).rowcount == 1
+                    for other in absorbed
+                )
+                if not unchanged:
+                    self._conn.rollback()
+                    return False
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO population_sketches VALUES (?, ?, ?)", (shard, payload, updated_at)
+                )
+                self._conn.commit()
+                return True
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def save_blocks(self, blocks: Dict[str, ContentBlock]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO static_blocks VALUES (?, ?, ?)",
+                [(key, block.media_type, block.body) for key, block in blocks.items()]
+            )
+
+    def get_block(self, key: str) -> Optional[ContentBlock]:
+        rows = self._read("SELECT media_type, body FROM static_blocks WHERE hash = ?", (key,))
+        return ContentBlock(rows[0][1], rows[0][0], f'"{key}"') if rows else None
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._reader_conns:
+                conn.close()
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryAssessmentBackend(AssessmentBackend):
+    """Process-local backend for tests and ephemeral deployments"""
+
+    def __init__(self):
+        self.rows: Dict[str, tuple] = {}
+        self.batches = 0
+        self._history: Dict[str, List[Tuple[str, str, Dict[str, int]]]] = defaultdict(list)  # sorted by time
+        self._rollups: Dict[Tuple[str, str], Dict[str, Tuple[int, RollupStats]]] = defaultdict(dict)
+        self._buckets: Dict[Tuple[str, str], List[str]] = defaultdict(list)  # sorted bucket keys
+        self._cycle_stats: Dict[str, CycleStatistics] = {}
+        self._sketches: Dict[str, SketchShard] = {}
+        self._blocks: Dict[str, ContentBlock] = {}
+        self._lock = threading.Lock()
+
+    def write_batch(self, records: List[PendingAssessment]) -> None:
+        with self._lock:
+            self.batches += 1
+            added = []
+            for record in records:
+                self.rows[record.assessment_id] = record.row()
+                if record.user_id and record.hormone_scores is not None:
+                    history = self._history[record.user_id]
+                    entry = (record.created_at, record.assessment_id, record.hormone_scores)
+                    position = bisect.bisect_left(history, entry[:2], key=lambda item: item[:2])
+                    if position < len(history) and history[position][:2] == entry[:2]:
+                        continue
+                    history.insert(position, entry)
+                    added.append(record)
+            for (user_id, resolution, bucket), scores in rollup_batches(added).items():
+                rollups = self._rollups[(user_id, resolution)]
+                if bucket not in rollups:
+                    bisect.insort(self._buckets[(user_id, resolution)], bucket)
+                count, stats = rollups.get(bucket, (0, {}))
+                rollups[bucket] = fold_scores(count, {h: list(v) for h, v in stats.items()}, scores)
+            for user_id, dates in fold_period_dates(records).items():
+                cycle_stats = self._cycle_stats.setdefault(user_id, CycleStatistics())
+                for period_start in dates:
+                    cycle_stats.add_period(period_start)
+
+    def get(self, assessment_id: str) -> Optional[StoredAssessment]:
+        with self._lock:
+            row = self.rows.get(assessment_id)
+        if row is None:
+            return None
+        return StoredAssessment(row[0], row[1], row[2], json.loads(row[3]), json.loads(row[4]))
+
+    def get_response(self, assessment_id: str) -> Optional[StoredResponse]:
+        with self._lock:
+            row = self.rows.get(assessment_id)
+        return None if row is None else StoredResponse(row[4], row[5])
+
+    def history_summary(self, user_id: str) -> Optional[HistorySummary]:
+        with self._lock:
+            history = self._history.get(user_id)
+            if not history:
+                return None
+            return HistorySummary(len(history), history[0][0], history[-1][0])
+
+    def score_history(
+        self, user_id: str, resolution: str, before: Optional[str], limit: int
+    ) -> List[HistoryPoint]:
+        with self._lock:
+            if resolution == "raw":
+                history = self._history.get(user_id, [])
+                end = len(history) if before is None else \
+                    bisect.bisect_left(history, split_raw_key(before), key=lambda item: item[:2])
+                return [raw_point(*entry) for entry in reversed(history[max(0, end - limit):end])]
+
+            buckets = self._buckets.get((user_id, resolution), [])
+            rollups = self._rollups[(user_id, resolution)]
+            end = len(buckets) if before is None else bisect.bisect_left(buckets, before)
+            return [
+                rollup_point(bucket, *rollups[bucket])
+                for bucket in reversed(buckets[max(0, end - limit):end])
+            ]
+
+    def get_cycle_statistics(self, user_id: str) -> Optional[CycleStatistics]:
+        with self._lock:
+            stats = self._cycle_stats.get(user_id)
+            return stats.copy() if stats is not None else None
+
+    def load_sketches(self) -> List[SketchShard]:
+        with self._lock:
+            return list(self._sketches.values())
+
+    def save_sketch(
+        self,
+        shard: str,
+        payload: str,
+        updated_at: str,
+        previous: Optional[str],
+        absorbed: Sequence[Tuple[str, str]] = ()
+    ) -> bool:
+        with self._lock:
+            current = self._sketches.get(shard)
+            if (current.updated_at if current else None) != previous:
+                return False
+            for other, version in absorbed:
+                if other not in self._sketches or self._sketches[other].updated_at != version:
+                    return False
+            for other, _ in absorbed:
+                del self._sketches[other]
+            self._sketches[shard] = SketchShard(shard, payload, updated_at)
+            return True
+
+    def save_blocks(self, blocks: Dict[str, ContentBlock]) -> None:
+        with self._lock:
+            for key, block in blocks.items():
+                self._blocks.setdefault(key, block)
+
+    def get_block(self, key: str) -> Optional[ContentBlock]:
+        with self._lock:
+            return self._blocks.get(key)
+
+
+def _cycle_statistics(row: tuple) -> CycleStatistics:
+    """CycleStatistics from a cycle_statistics (count, mean, m2, last_period) row"""
+    count, mean, m2, last_period = row
+    return CycleStatistics.from_state(count, mean, m2, date.fromisoformat(last_period) if last_period else None)
+
+
+def create_backend(url: str) -> AssessmentBackend:
+    """Backend from a URL: "sqlite:///relative.db", "sqlite:////absolute.db", "sqlite:///:memory:" or "memory://" """
+    if url.startswith("sqlite:///"):
+        return SQLiteAssessmentBackend(url[len("sqlite:///"):])
+    if url == "memory://":
+        return MemoryAssessmentBackend()
+    raise ValueError(f"Unsupported assessment store URL: {url}")
+
+
+class AssessmentStore:
+    """Write-behind assessment store.
+
+    save() only enqueues (never blocks); a writer thread drains the queue and
+    commits up to batch_size records per transaction, lingering max_delay
+    seconds after the first record so bursts share one commit (and the
+    writer wakes once per batch, not once per record). When the queue is full
+    the record is dropped and counted rather than delaying the response.
+    Records stay readable through get() while they wait to be written.
+    """
+
+    def __init__(
+        self,
+        backend: AssessmentBackend,
+        max_pending: int = 10_000,
+        batch_size: int = 256,
+        max_delay: float = 0.05
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Optional[PendingAssessment]]" = queue.Queue(maxsize=max_pending)
+        self._pending: Dict[str, PendingAssessment] = {}
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._writer = threading.Thread(target=self._drain, name="assessment-writer", daemon=True)
+        self._writer.start()
+
+    def save(
+        self,
+        assessment_id: str,
+        user_id: Optional[str],
+        request: BaseModel,
+        response: BaseModel,
+        hormone_scores: Optional[Dict[str, int]] = None,
+        period_dates: Sequence[date] = ()
+    ) -> bool:
+        """Queue an assessment for writing; False if the queue is full and it was dropped.
+        With a user_id, hormone_scores are added to the user's score history and
+        period_dates folded into their cycle statistics.
+        """
+        record = PendingAssessment(
+            assessment_id,
+            user_id,
+            datetime.now(timezone.utc).isoformat(),
+            request.model_dump_json(),
+            response.model_dump_json().encode("utf-8"),
+            hormone_scores,
+            tuple(d.isoformat() for d in period_dates)
+        )
+        with self._lock:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self._stats["dropped"] += 1
+                print(f"[STORE][WARN] Write queue full, assessment {assessment_id} not persisted")
+                return False
+            self._pending[assessment_id] = record
+            self._stats["queued"] += 1
+        return True
+
+    def get(self, assessment_id: str) -> Optional[StoredAssessment]:
+        with self._lock:
+            record = self._pending.get(assessment_id)
+        if record is not None:
+            return record.materialize()
+        return self.backend.get(assessment_id)
+
+    def get_response(self, assessment_id: str) -> Optional[StoredResponse]:
+        """Canonical response bytes and ETag, served as-is (no model construction)"""
+        with self._lock:
+            record = self._pending.get(assessment_id)
+        if record is not None:
+            return StoredResponse(record.response_body, content_hash(record.response_body))
+        return self.backend.get_response(assessment_id)
+
+    def history_summary(self, user_id: str) -> Optional[HistorySummary]:
+        """Assessment count and first/last timestamps of a user's written history"""
+        return self.backend.history_summary(user_id)
+
+    def score_history(
+        self, user_id: str, resolution: str, before: Optional[str] = None, limit: int = 100
+    ) -> List[HistoryPoint]:
+        """A page of a user's written score history, newest first (queued records appear once written)"""
+        return self.backend.score_history(user_id, resolution, before, limit)
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush, stop the writer thread and close the backend"""
+        self._queue.put(None)
+        self._writer.join()
+        self.backend.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Sleep rather than wait on the queue: a waiting writer is woken by every
+            # save() and steals the GIL from the request thread each time
+            if batch[0] is not None and self._queue.qsize() < self.batch_size:
+                time.sleep(self.max_delay)
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(records)
+            for _ in batch:
+                self._queue.task_done()
+            if len(records) < len(batch):
+                return  # close() sentinel
+
+    def _write(self, records: List[PendingAssessment]) -> None:
+        try:
+            self.backend.write_batch(records)
+            outcome = "written"
+        except Exception as e:
+            print(f"[STORE][ERROR] Batch of {len(records)} assessments not written: {e}")
+            outcome = "failed"
+        with self._lock:
+            self._stats[outcome] += len(records)
+            self._stats["batches"] += 1
+            for record in records:
+                if self._pending.get(record.assessment_id) is record:
+                    del self._pending[record.assessment_id]
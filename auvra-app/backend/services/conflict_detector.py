@@ -3,16 +3,153 @@ Conflict Detection Service
 Detects and reports conflicts in hormone assessments
 """
 
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Sequence, Tuple
 from models.schemas import Conflict
 
 
+HORMONAL_BIRTH_CONTROL = ("hormonal_pills", "hormonal_iud")
+
+LAB_MISMATCH_RECOMMENDATIONS = {
+    "thyroid": "Consider testing Free T3, thyroid antibodies (TPO, TG), or other causes of symptoms (iron deficiency, vitamin D, sleep apnea).",
+    "androgens": "Test free testosterone (more sensitive than total), DHEA-S, and consider checking SHBG which affects androgen bioavailability.",
+    "insulin": "Fasting insulin may be normal despite insulin resistance. Consider oral glucose tolerance test with insulin measurements or HOMA-IR calculation.",
+}
+
+
+def _lab_mismatch_rule(hormone: str) -> Dict:
+    return {
+        "id": f"lab_symptom_mismatch_{hormone}",
+        "triggers": ("labs:discordant",),
+        "when": lambda item, h=hormone: (
+            item["hormone_scores"].get(h, {}).get("from_symptoms", 0) >= 3
+            and item["hormone_scores"].get(h, {}).get("from_labs", 0) == 0
+        ),
+        "conflict": {
+            "type": "lab_symptom_mismatch",
+            "severity": "moderate",
+            "description": f"{hormone.capitalize()} symptoms present but lab results are within normal range",
+            "recommendation": LAB_MISMATCH_RECOMMENDATIONS.get(
+                hormone,
+                f"Consider additional testing for {hormone} or investigate other potential causes of your symptoms."
+            ),
+            "impact_on_confidence": -2
+        }
+    }
+
+
+# ==================== CONFLICT RULES ====================
+# A rule is a candidate when any of its "triggers" fired and all of its "requires"
+# fired; "when" is then evaluated on the item. Rules are reported in table order.
+
+CONFLICT_RULES = (
+    {
+        "id": "estrogen_direction",
+        "triggers": ("low:estrogen",),
+        "requires": ("high:estrogen",),
+        "conflict": {
+            "type": "hormone_direction",
+            "severity": "moderate",
+            "description": "Symptoms suggest both high estrogen (bloating, heavy periods) and low estrogen (light periods, hot flashes)",
+            "recommendation": "Test estradiol on Day 3-5 of cycle to clarify estrogen status. May indicate estrogen fluctuation throughout cycle.",
+            "impact_on_confidence": -2
+        }
+    },
+    {
+        "id": "cortisol_direction",
+        "triggers": ("low:cortisol",),
+        "requires": ("high:cortisol",),
+        "conflict": {
+            "type": "hormone_direction",
+            "severity": "moderate",
+            "description": "Symptoms suggest both high cortisol (stress, anxiety) and low cortisol (extreme fatigue)",
+            "recommendation": "Test AM and PM cortisol, or consider 4-point cortisol testing to assess HPA axis function throughout the day.",
+            "impact_on_confidence": -2
+        }
+    },
+    {
+        "id": "pcos_without_androgen_symptoms",
+        "triggers": ("condition:pcos",),
+        "when": lambda item: item["symptoms_by_hormone"].get("androgens", 0) == 0,
+        "conflict": {
+            "type": "diagnosis_mismatch",
+            "severity": "low",
+            "description": "PCOS diagnosed but no androgen-related symptoms (hirsutism, acne) reported",
+            "recommendation": "You may have lean PCOS (non-hyperandrogenic phenotype) or PCOS may be well-controlled. Consider testing free testosterone and DHEA-S to clarify.",
+            "impact_on_confidence": -1
+        }
+    },
+    {
+        "id": "thyroid_condition_without_symptoms",
+        "triggers": ("condition:hashimotos", "condition:hypothyroidism"),
+        "when": lambda item: item["symptoms_by_hormone"].get("thyroid", 0) == 0,
+        "conflict": {
+            "type": "diagnosis_mismatch",
+            "severity": "low",
+            "description": "Thyroid condition diagnosed but no thyroid-related symptoms (fatigue, weight gain, hair loss) reported",
+            "recommendation": "Your thyroid condition may be well-managed with medication. Ensure TSH is being monitored regularly (target: 0.5-2.0 mIU/L for optimal symptom relief).",
+            "impact_on_confidence": -1
+        }
+    },
+    {
+        "id": "endometriosis_without_estrogen_symptoms",
+        "triggers": ("condition:endometriosis",),
+        "when": lambda item: item["symptoms_by_hormone"].get("estrogen", 0) == 0,
+        "conflict": {
+            "type": "diagnosis_mismatch",
+            "severity": "low",
+            "description": "Endometriosis diagnosed but no estrogen-related symptoms reported",
+            "recommendation": "Endometriosis may be well-controlled with treatment. Continue monitoring symptoms, especially around menstruation.",
+            "impact_on_confidence": -1
+        }
+    },
+    *(_lab_mismatch_rule(h) for h in ("estrogen", "progesterone", "androgens", "insulin", "cortisol", "thyroid")),
+    {
+        "id": "birth_control_masking_pcos",
+        "triggers": ("condition:pcos",),
+        "requires": ("birth_control:hormonal",),
+        "conflict": {
+            "type": "diagnosis_mismatch",
+            "severity": "moderate",
+            "description": "On hormonal birth control with PCOS diagnosis - symptoms may be masked",
+            "recommendation": "Hormonal birth control suppresses natural hormone production and may mask underlying PCOS symptoms. Consider reassessment 3+ months after discontinuation if medically appropriate and trying to conceive.",
+            "impact_on_confidence": -1
+        }
+    },
+)
+
+
 class ConflictDetector:
-    """Detect conflicts in hormone assessment data"""
-    
-    def __init__(self):
-        self.conflicts = []
-    
+    """Detect conflicts in hormone assessment data.
+    Rule tables are frozen at construction and no per-request data is kept,
+    so one instance can be shared across requests and threads.
+    """
+
+    def __init__(self, rules: Sequence[Dict] = CONFLICT_RULES):
+        self.rules: Tuple[Mapping, ...] = tuple(
+            MappingProxyType({**rule, "conflict": MappingProxyType(dict(rule["conflict"]))})
+            for rule in rules
+        )
+
+        # Index: trigger key -> positions of rules it can activate
+        rule_index: Dict[str, List[int]] = {}
+        for position, rule in enumerate(self.rules):
+            for trigger in rule["triggers"]:
+                rule_index.setdefault(trigger, []).append(position)
+        self.rule_index: Mapping[str, Tuple[int, ...]] = MappingProxyType(
+            {trigger: tuple(positions) for trigger, positions in rule_index.items()}
+        )
+
+        # Only trigger keys some rule depends on are ever computed
+        keys = set(self.rule_index)
+        for rule in self.rules:
+            keys.update(rule.get("requires", ()))
+        self._condition_keys = MappingProxyType({k.split(":", 1)[1]: k for k in keys if k.startswith("condition:")})
+        self._direction_keys = tuple(
+            (k.split(":", 1)[1], f"{k.split(':', 1)[0]}_score", k)
+            for k in sorted(keys) if k.startswith(("high:", "low:"))
+        )
+
     def detect_all_conflicts(
         self,
         hormone_scores: Dict,
@@ -23,131 +160,67 @@ class ConflictDetector:
         birth_control: str
     ) -> List[Conflict]:
         """Detect all types of conflicts"""
-        
-        self.conflicts = []
-        
-        # 1. Hormone direction conflicts
-        self._check_hormone_direction_conflicts(hormone_scores)
-        
-        # 2. Symptom-diagnosis mismatch
-        self._check_diagnosis_symptom_mismatch(diagnosed_conditions, symptoms_by_hormone)
-        
-        # 3. Lab-symptom mismatch
-        if labs_uploaded and labs_concordance == "low":
-            self._check_lab_symptom_mismatch(hormone_scores)
-        
-        # 4. Birth control masking
-        if birth_control in ["hormonal_pills", "hormonal_iud"]:
-            self._check_birth_control_masking(diagnosed_conditions)
-        
-        return self.conflicts
-    
-    def _check_hormone_direction_conflicts(self, hormone_scores: Dict):
-        """Check for conflicting hormone directions"""
-        
-        # Estrogen: Check if both high and low signals present
-        if "estrogen" in hormone_scores:
-            high_score = hormone_scores["estrogen"].get("high_score", 0)
-            low_score = hormone_scores["estrogen"].get("low_score", 0)
-            
-            if high_score > 0 and low_score > 0:
-                self.conflicts.append(Conflict(
-                    type="hormone_direction",
-                    severity="moderate",
-                    description="Symptoms suggest both high estrogen (bloating, heavy periods) and low estrogen (light periods, hot flashes)",
-                    recommendation="Test estradiol on Day 3-5 of cycle to clarify estrogen status. May indicate estrogen fluctuation throughout cycle.",
-                    impact_on_confidence=-2
-                ))
-        
-        # Cortisol: Check if both high and low signals present
-        if "cortisol" in hormone_scores:
-            high_score = hormone_scores["cortisol"].get("high_score", 0)
-            low_score = hormone_scores["cortisol"].get("low_score", 0)
-            
-            if high_score > 0 and low_score > 0:
-                self.conflicts.append(Conflict(
-                    type="hormone_direction",
-                    severity="moderate",
-                    description="Symptoms suggest both high cortisol (stress, anxiety) and low cortisol (extreme fatigue)",
-                    recommendation="Test AM and PM cortisol, or consider 4-point cortisol testing to assess HPA axis function throughout the day.",
-                    impact_on_confidence=-2
-                ))
-    
-    def _check_diagnosis_symptom_mismatch(self, diagnosed_conditions: List[str], symptoms_by_hormone: Dict):
-        """Check for diagnosis-symptom mismatches"""
-        
-        # PCOS without androgen symptoms
-        if "pcos" in diagnosed_conditions:
-            androgen_symptoms = symptoms_by_hormone.get("androgens", 0)
-            if androgen_symptoms == 0:
-                self.conflicts.append(Conflict(
-                    type="diagnosis_mismatch",
-                    severity="low",
-                    description="PCOS diagnosed but no androgen-related symptoms (hirsutism, acne) reported",
-                    recommendation="You may have lean PCOS (non-hyperandrogenic phenotype) or PCOS may be well-controlled. Consider testing free testosterone and DHEA-S to clarify.",
-                    impact_on_confidence=-1
-                ))
-        
-        # Thyroid condition without thyroid symptoms
-        if any(cond in diagnosed_conditions for cond in ["hashimotos", "hypothyroidism"]):
-            thyroid_symptoms = symptoms_by_hormone.get("thyroid", 0)
-            if thyroid_symptoms == 0:
-                self.conflicts.append(Conflict(
-                    type="diagnosis_mismatch",
-                    severity="low",
-                    description="Thyroid condition diagnosed but no thyroid-related symptoms (fatigue, weight gain, hair loss) reported",
-                    recommendation="Your thyroid condition may be well-managed with medication. Ensure TSH is being monitored regularly (target: 0.5-2.0 mIU/L for optimal symptom relief).",
-                    impact_on_confidence=-1
-                ))
-        
-        # Endometriosis without estrogen symptoms
-        if "endometriosis" in diagnosed_conditions:
-            estrogen_symptoms = symptoms_by_hormone.get("estrogen", 0)
-            if estrogen_symptoms == 0:
-                self.conflicts.append(Conflict(
-                    type="diagnosis_mismatch",
-                    severity="low",
-                    description="Endometriosis diagnosed but no estrogen-related symptoms reported",
-                    recommendation="Endometriosis may be well-controlled with treatment. Continue monitoring symptoms, especially around menstruation.",
-                    impact_on_confidence=-1
-                ))
-    
-    def _check_lab_symptom_mismatch(self, hormone_scores: Dict):
-        """Check for lab-symptom discordance"""
-        
-        for hormone, data in hormone_scores.items():
-            symptom_score = data.get("from_symptoms", 0)
-            lab_score = data.get("from_labs", 0)
-            
-            # Symptoms present but labs normal
-            if symptom_score >= 3 and lab_score == 0:
-                hormone_name = hormone.capitalize()
-                
-                if hormone == "thyroid":
-                    recommendation = "Consider testing Free T3, thyroid antibodies (TPO, TG), or other causes of symptoms (iron deficiency, vitamin D, sleep apnea)."
-                elif hormone == "androgens":
-                    recommendation = "Test free testosterone (more sensitive than total), DHEA-S, and consider checking SHBG which affects androgen bioavailability."
-                elif hormone == "insulin":
-                    recommendation = "Fasting insulin may be normal despite insulin resistance. Consider oral glucose tolerance test with insulin measurements or HOMA-IR calculation."
-                else:
-                    recommendation = f"Consider additional testing for {hormone} or investigate other potential causes of your symptoms."
-                
-                self.conflicts.append(Conflict(
-                    type="lab_symptom_mismatch",
-                    severity="moderate",
-                    description=f"{hormone_name} symptoms present but lab results are within normal range",
-                    recommendation=recommendation,
-                    impact_on_confidence=-2
-                ))
-    
-    def _check_birth_control_masking(self, diagnosed_conditions: List[str]):
-        """Check if birth control may be masking symptoms"""
-        
-        if "pcos" in diagnosed_conditions:
-            self.conflicts.append(Conflict(
-                type="diagnosis_mismatch",
-                severity="moderate",
-                description="On hormonal birth control with PCOS diagnosis - symptoms may be masked",
-                recommendation="Hormonal birth control suppresses natural hormone production and may mask underlying PCOS symptoms. Consider reassessment 3+ months after discontinuation if medically appropriate and trying to conceive.",
-                impact_on_confidence=-1
-            ))
+
+        return self.detect_conflicts_batch([{
+            "hormone_scores": hormone_scores,
+            "diagnosed_conditions": diagnosed_conditions,
+            "symptoms_by_hormone": symptoms_by_hormone,
+            "labs_uploaded": labs_uploaded,
+            "labs_concordance": labs_concordance,
+            "birth_control": birth_control
+        }])[0]
+
+    def detect_conflicts_batch(self, items: Sequence[Dict]) -> List[List[Conflict]]:
+        """Detect conflicts for many assessments at once.
+
+        Each item carries the detect_all_conflicts arguments. Items are posted
+        under the trigger keys they fire, and each rule is evaluated only for
+        the items posted under its triggers.
+        """
+        rule_index = self.rule_index
+        postings: Dict[int, List[int]] = {}
+        fired_by_item = []
+        for i, item in enumerate(items):
+            fired = self._fired_triggers(item)
+            fired_by_item.append(fired)
+            for trigger in fired:
+                for position in rule_index.get(trigger, ()):
+                    postings.setdefault(position, []).append(i)
+
+        results: List[List[Conflict]] = [[] for _ in items]
+        for position in sorted(postings):
+            rule = self.rules[position]
+            requires = rule.get("requires", ())
+            when = rule.get("when")
+            conflict = rule["conflict"]
+            candidates = postings[position]
+            if len(rule["triggers"]) > 1:
+                # An item firing several triggers of the same rule is posted once per trigger
+                candidates = dict.fromkeys(candidates)
+            for i in candidates:
+                if requires and any(key not in fired_by_item[i] for key in requires):
+                    continue
+                if when is not None and not when(items[i]):
+                    continue
+                results[i].append(Conflict(**conflict))
+        return results
+
+    def _fired_triggers(self, item: Dict) -> List[str]:
+        """Trigger keys present in one assessment's inputs"""
+        condition_keys = self._condition_keys
+        fired = [condition_keys[c] for c in item["diagnosed_conditions"] if c in condition_keys]
+
+        hormone_scores = item["hormone_scores"]
+        for hormone, field, key in self._direction_keys:
+            data = hormone_scores.get(hormone)
+            if data and data.get(field, 0) > 0:
+                fired.append(key)
+
+        if item["labs_uploaded"] and item["labs_concordance"] == "low":
+            fired.append("labs:discordant")
+
+        if item["birth_control"] in HORMONAL_BIRTH_CONTROL:
+            fired.append("birth_control:hormonal")
+
+        # A condition listed twice fires its trigger once
+        return list(dict.fromkeys(fired))
@@ -0,0 +1,130 @@
+"""
+Content-Addressed Block Store
+Serves explanation templates and recommendation sets by hash so clients fetch each once.
+Blocks hold only static text shared by every user (the per-user factor list stays
+in the reply), so the set is bounded and safe for public caches. They are written
+through to the assessment backend, so a hash issued by one worker resolves on
+every worker sharing it
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional
+
+from services.explanation_generator import explanation_template, listed_factors, template_values
+
+if TYPE_CHECKING:
+    from services.assessment_store import AssessmentBackend
+
+TEXT_MEDIA_TYPE = "text/markdown; charset=utf-8"
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ContentBlock(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str  # strong ETag: the quoted content hash
+
+
+def content_hash(body: bytes) -> str:
+    """Stable hash of a block's bytes (first 128 bits of SHA-256, hex)"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class ContentStore:
+    """Hash -> block store: a bounded in-process cache (least recently used blocks
+    evicted) in front of the assessment backend.
+
+    Blocks are immutable, so a hash always names the same bytes. A block new to this
+    worker is written to the backend before its hash is returned (one commit per
+    reply); other workers, and this one after a restart or eviction, read it back
+    from there. Without a backend a hash only resolves on the worker that issued it.
+    """
+
+    def __init__(self, max_blocks: int = 20_000, backend: Optional["AssessmentBackend"] = None):
+        self.max_blocks = max_blocks
+        self.backend = backend
+        self._blocks: "OrderedDict[str, ContentBlock]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, body: bytes, media_type: str) -> str:
+        added: Dict[str, ContentBlock] = {}
+        key = self._add(body, media_type, added)
+        self._save(added)
+        return key
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode("utf-8"), TEXT_MEDIA_TYPE)
+
+    def put_json(self, value) -> str:
+        return self.put(_json_body(value), JSON_MEDIA_TYPE)
+
+    def get_cached(self, key: str) -> Optional[ContentBlock]:
+        """Block from this worker's cache only (never touches the backend)"""
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+            return block
+
+    def get(self, key: str) -> Optional[ContentBlock]:
+        block = self.get_cached(key)
+        if block is not None:
+            return block
+        if self.backend is None:
+            return None
+        block = self.backend.get_block(key)
+        if block is not None:
+            with self._lock:
+                self._cache(key, block)
+        return block
+
+    def externalize_imbalance(self, imbalance: Dict) -> Dict:
+        """Replace an imbalance's explanation/recommendations with content refs (in place).
+        The explanation ref names its template; explanation_values fills the template's
+        {placeholders} with this imbalance's factors"""
+        return self.externalize({"primary_imbalance": imbalance})["primary_imbalance"]
+
+    def externalize(self, response: Dict) -> Dict:
+        """Apply externalize_imbalance to every imbalance of a serialized AssessmentResponse
+        (or a field selection of one)"""
+        added: Dict[str, ContentBlock] = {}
+        imbalances = [response["primary_imbalance"]] if "primary_imbalance" in response else []
+        for imbalance in imbalances + list(response.get("secondary_imbalances", ())):
+            del imbalance["explanation"]
+            template = explanation_template(imbalance["hormone"], imbalance["direction"])
+            imbalance["explanation_ref"] = self._add(template.encode("utf-8"), TEXT_MEDIA_TYPE, added)
+            imbalance["explanation_values"] = template_values(*listed_factors(imbalance["contributing_factors"]))
+            imbalance["recommendations_ref"] = self._add(_json_body(imbalance.pop("recommendations")), JSON_MEDIA_TYPE, added)
+        self._save(added)
+        return response
+
+    def _add(self, body: bytes, media_type: str, added: Dict[str, ContentBlock]) -> str:
+        """Cache a block; blocks this worker had not cached are collected in `added`"""
+        key = content_hash(body)
+        with self._lock:
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+            else:
+                added[key] = self._cache(key, ContentBlock(body, media_type, f'"{key}"'))
+        return key
+
+    def _cache(self, key: str, block: ContentBlock) -> ContentBlock:
+        self._blocks[key] = block
+        if len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def _save(self, added: Dict[str, ContentBlock]) -> None:
+        if added and self.backend is not None:
+            try:
+                self.backend.save_blocks(added)
+            except Exception as e:
+                # Still served by this worker; others answer 404 until it is re-rendered
+                print(f"[CONTENT][ERROR] {len(added)} block(s) not persisted: {e}")
+
+
+def _json_body(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,285 @@
+"""
+Counterfactual Analysis Service
+Finds which single answers, if different, would change the assessment result
+"""
+
+from typing import Dict, List, Tuple, get_args
+
+from models.schemas import *
+from services.hormone_scorer import ScoringState
+
+
+SCORE_FIELDS = ("from_symptoms", "from_diagnosis", "from_labs", "high_score", "low_score")
+
+CONCERN_CATEGORIES = ("period_concerns", "body_concerns", "skin_hair_concerns", "mental_health_concerns")
+
+
+def _literal_values(model, field: str) -> Tuple[str, ...]:
+    """Allowed values of a Literal (or List[Literal]) schema field"""
+    annotation = model.model_fields[field].annotation
+    args = get_args(annotation)
+    if args and not isinstance(args[0], str):
+        args = get_args(args[0])
+    return tuple(args)
+
+
+class CounterfactualAnalyzer:
+    """Evaluate every single-answer perturbation of an assessment in one batched pass.
+
+    Each question's answer is scored once on an empty ScoringState and kept as a
+    sparse contribution. A perturbation swaps one contribution and recombines,
+    instead of re-running the whole pipeline. Free-text 'others' inputs are not
+    sent to the LLM here, so results reflect the deterministic scoring rules.
+    """
+
+    def __init__(self, assessment_service):
+        self.assessment_service = assessment_service
+        # Stateless components shared with the assessment pipeline
+        self.hormone_scorer = assessment_service.hormone_scorer
+        self.cycle_calculator = assessment_service.cycle_calculator
+        self.confidence_calculator = assessment_service.confidence_calculator
+        self.conflict_detector = assessment_service.conflict_detector
+
+        self.period_patterns = _literal_values(PeriodPatternRequest, "period_pattern")
+        self.birth_controls = _literal_values(PeriodPatternRequest, "birth_control")
+        self.cycle_lengths = _literal_values(CycleDetailsRequest, "cycle_length")
+        self.concern_options = {
+            category: _literal_values(HealthConcernsRequest, category)
+            for category in CONCERN_CATEGORIES
+        }
+        self.conditions = _literal_values(DiagnosedConditionsRequest, "conditions")
+        self.top_concerns = ("none",) + tuple(
+            value for category in CONCERN_CATEGORIES for value in self.concern_options[category]
+        )
+
+    def analyze(self, request: CompleteAssessmentRequest) -> CounterfactualResponse:
+        """Evaluate all single-answer perturbations of the request"""
+        cache: Dict[tuple, tuple] = {}  # contributions are only reused within one request
+        # Period history statistics depend only on whether the last date is trusted; a returning
+        # user's come from their stored history, as in /assess, but nothing is recorded
+        statistics = {
+            flag: self.assessment_service._cycle_statistics(request.model_copy(update={
+                "cycle_details": request.cycle_details.model_copy(update={"date_not_sure": flag})
+            }))
+            for flag in (False, True)
+        }
+        baseline_answers = self._extract_answers(request)
+        baseline = self._evaluate(request, baseline_answers, cache, statistics)
+
+        perturbations = self._enumerate_perturbations(baseline_answers)
+        changes = []
+        for question, action, original, new_value, answers in perturbations:
+            outcome = self._evaluate(request, answers, cache, statistics)
+            flips_primary = (
+                outcome.primary_hormone != baseline.primary_hormone
+                or outcome.primary_direction != baseline.primary_direction
+            )
+            flips_secondary = set(outcome.secondary_hormones) != set(baseline.secondary_hormones)
+            flips_confidence = outcome.confidence_level != baseline.confidence_level
+
+            if flips_primary or flips_secondary or flips_confidence:
+                changes.append(CounterfactualChange(
+                    question=question,
+                    action=action,
+                    original_value=original,
+                    new_value=new_value,
+                    outcome=outcome,
+                    flips_primary=flips_primary,
+                    flips_secondary=flips_secondary,
+                    flips_confidence=flips_confidence
+                ))
+
+        print(f"[COUNTERFACTUAL] Evaluated {len(perturbations)} perturbations, {len(changes)} change the result")
+        return CounterfactualResponse(
+            baseline=baseline,
+            perturbations_evaluated=len(perturbations),
+            changes=changes
+        )
+
+    # ==================== ANSWERS AND PERTURBATIONS ====================
+
+    def _extract_answers(self, request: CompleteAssessmentRequest) -> Dict:
+        """Collect the answers that are perturbed into a flat dict"""
+        answers = {
+            "period_pattern": request.period_pattern.period_pattern,
+            "birth_control": request.period_pattern.birth_control,
+            "cycle_length": request.cycle_details.cycle_length,
+            "date_not_sure": request.cycle_details.date_not_sure,
+            "top_concern": request.top_concern.top_concern,
+            "conditions": tuple(request.diagnosed_conditions.conditions),
+        }
+        for category in CONCERN_CATEGORIES:
+            answers[category] = tuple(getattr(request.health_concerns, category))
+        return answers
+
+    def _enumerate_perturbations(self, answers: Dict) -> List[tuple]:
+        """List (question, action, original, new_value, answers) for every single-answer change"""
+        perturbations = []
+
+        def replace(question, options):
+            original = answers[question]
+            for option in options:
+                if option != original:
+                    perturbations.append(
+                        (question, "replace", str(original), str(option), {**answers, question: option})
+                    )
+
+        def toggle(question, options):
+            selected = answers[question]
+            for option in options:
+                if option in selected:
+                    updated = tuple(v for v in selected if v != option)
+                    perturbations.append((question, "remove", option, None, {**answers, question: updated}))
+                else:
+                    perturbations.append((question, "add", None, option, {**answers, question: selected + (option,)}))
+
+        replace("period_pattern", self.period_patterns)
+        replace("birth_control", self.birth_controls)
+        replace("cycle_length", self.cycle_lengths)
+        replace("top_concern", self.top_concerns)
+        for category in CONCERN_CATEGORIES:
+            toggle(category, self.concern_options[category])
+        toggle("conditions", self.conditions)
+        replace("date_not_sure", (False, True))
+
+        return perturbations
+
+    # ==================== CONTRIBUTIONS ====================
+
+    def _contribution(self, cache: Dict[tuple, tuple], key: tuple, apply) -> tuple:
+        """Score one answer on an empty state and cache its sparse contribution"""
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        state = ScoringState()
+        apply(state)
+        deltas = tuple(
+            (hormone, field, data[field])
+            for hormone, data in state.hormone_scores.items()
+            for field in SCORE_FIELDS
+            if data.get(field, 0)
+        )
+        factors = tuple(
+            (hormone, factor)
+            for hormone, hormone_factors in state.contributing_factors.items()
+            for factor in hormone_factors
+        )
+        contribution = (deltas, factors)
+        cache[key] = contribution
+        return contribution
+
+    def _health_concerns(self, answers: Dict) -> HealthConcernsRequest:
+        return HealthConcernsRequest(
+            **{category: list(answers[category]) for category in CONCERN_CATEGORIES}
+        )
+
+    def _evaluate(
+        self,
+        request: CompleteAssessmentRequest,
+        answers: Dict,
+        cache: Dict[tuple, tuple],
+        statistics: Dict
+    ) -> CounterfactualOutcome:
+        """Combine cached contributions for one answer set and derive the outcome"""
+        last_period_date = request.cycle_details.last_period_date
+        cycle_context = self.cycle_calculator.calculate_cycle_context(
+            last_period_date,
+            answers["cycle_length"],
+            answers["date_not_sure"],
+            statistics[answers["date_not_sure"]]
+        )
+        phase = cycle_context.current_phase
+        concerns_key = tuple(tuple(sorted(answers[c])) for c in CONCERN_CATEGORIES)
+        health_concerns = self._health_concerns(answers)
+        scorer = self.hormone_scorer
+
+        symptom_parts = [
+            self._contribution(
+                cache,
+                ("period_pattern", answers["period_pattern"]),
+                lambda s: scorer.score_period_pattern(s, answers["period_pattern"])
+            ),
+            self._contribution(
+                cache,
+                ("cycle_length", answers["cycle_length"]),
+                lambda s: scorer.score_cycle_length(s, answers["cycle_length"])
+            ),
+            self._contribution(
+                cache,
+                ("health_concerns", concerns_key, phase),
+                lambda s: scorer.score_health_concerns(s, health_concerns, phase)
+            ),
+        ]
+        later_parts = [
+            self._contribution(
+                cache,
+                ("conditions", tuple(sorted(answers["conditions"]))),
+                lambda s: scorer.score_diagnosed_conditions(s, list(answers["conditions"]))
+            ),
+        ]
+        if request.lab_results is not None:
+            later_parts.append(self._contribution(
+                cache,
+                ("labs",),
+                # Default ranges, as /assess scores them
+                lambda s: scorer.score_lab_results(s, request.lab_results)
+            ))
+
+        # Recombine in pipeline order: symptoms, top concern boost, diagnosis, labs
+        state = ScoringState()
+        self._apply_parts(state, symptom_parts)
+        scorer.apply_top_concern_multiplier(state, answers["top_concern"], health_concerns)
+        self._apply_parts(state, later_parts)
+        scorer.apply_birth_control_modifier(state, answers["birth_control"])
+        scorer.calculate_final_scores(state)
+        primary, secondary = scorer.get_primary_secondary_imbalances(state)
+
+        service = self.assessment_service
+        labs_uploaded = request.lab_results is not None
+        labs_concordance = "none"
+        if labs_uploaded:
+            labs_concordance = service._calculate_lab_concordance(
+                state.hormone_scores,
+                state.contributing_factors
+            )
+        symptom_clusters = service._count_symptoms_by_hormone(state.contributing_factors)
+
+        confidence = self.confidence_calculator.calculate_confidence(
+            period_pattern=answers["period_pattern"],
+            last_period_date=last_period_date,
+            cycle_length=answers["cycle_length"],
+            date_not_sure=answers["date_not_sure"],
+            diagnosed_conditions=list(answers["conditions"]),
+            top_concern_selected=True,
+            birth_control=answers["birth_control"],
+            symptoms_count=service._count_total_symptoms(health_concerns),
+            symptom_clusters=symptom_clusters,
+            labs_uploaded=labs_uploaded,
+            labs_concordance=labs_concordance,
+            conflicts_detected=0
+        )
+        conflicts = self.conflict_detector.detect_all_conflicts(
+            hormone_scores=state.hormone_scores,
+            diagnosed_conditions=list(answers["conditions"]),
+            symptoms_by_hormone=symptom_clusters,
+            labs_uploaded=labs_uploaded,
+            labs_concordance=labs_concordance,
+            birth_control=answers["birth_control"]
+        )
+
+        return CounterfactualOutcome(
+            primary_hormone=primary,
+            primary_direction=state.hormone_scores[primary]["direction"],
+            secondary_hormones=secondary,
+            confidence_level=confidence.level,
+            confidence_score=confidence.score + sum(c.impact_on_confidence for c in conflicts)
+        )
+
+    def _apply_parts(self, state: ScoringState, parts: List[tuple]) -> None:
+        for deltas, factors in parts:
+            for hormone, field, value in deltas:
+                scores = state.hormone_scores[hormone]
+                scores[field] = scores.get(field, 0) + value
+            for hormone, factor in factors:
+                state.contributing_factors[hormone].append(factor)
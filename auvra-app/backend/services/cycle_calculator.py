@@ -3,9 +3,161 @@ Cycle Phase Calculator and Context Generator
 Calculates current cycle phase and provides phase-aware adjustments
 """
 
+import math
+import threading
+import time
+from collections import OrderedDict
 from datetime import date, timedelta
-from typing import Optional, Tuple
-from models.schemas import CycleContext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple, Union
+from models.schemas import CycleContext, CycleCalendarDay, CycleCalendarResponse
+
+if TYPE_CHECKING:
+    from services.assessment_store import AssessmentBackend
+
+# Ovulation day assumed without a period history (cycle-length buckets)
+DEFAULT_FOLLICULAR_END = 14
+
+
+class CycleStatistics:
+    """Running cycle-length statistics, updated in O(1) per new period start date.
+    
+    Uses Welford's algorithm for mean/variance so a returning user's history never
+    has to be re-read. Gaps outside MIN/MAX_CYCLE_DAYS (missed logging, amenorrhea)
+    move the last period forward without counting as a cycle.
+    """
+    
+    MIN_CYCLE_DAYS = 15
+    MAX_CYCLE_DAYS = 90
+    DEFAULT_LUTEAL_DAYS = 14
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.last_period: Optional[date] = None
+    
+    @classmethod
+    def from_state(cls, count: int, mean: float, m2: float, last_period: Optional[date]) -> "CycleStatistics":
+        """Statistics as stored by state()"""
+        stats = cls()
+        stats.count, stats.mean, stats._m2, stats.last_period = count, mean, m2, last_period
+        return stats
+    
+    def state(self) -> Tuple[int, float, float, Optional[date]]:
+        """(count, mean, M2, last_period): everything needed to resume the running statistics"""
+        return self.count, self.mean, self._m2, self.last_period
+    
+    @classmethod
+    def from_dates(cls, period_dates: Iterable[date]) -> "CycleStatistics":
+        stats = cls()
+        for period_start in sorted(set(period_dates)):
+            stats.add_period(period_start)
+        return stats
+    
+    def add_period(self, period_start: date) -> bool:
+        """Add a period start date; dates not after the last one are ignored"""
+        if self.last_period is not None:
+            if period_start <= self.last_period:
+                return False
+            length = (period_start - self.last_period).days
+            if self.MIN_CYCLE_DAYS <= length <= self.MAX_CYCLE_DAYS:
+                self.count += 1
+                delta = length - self.mean
+                self.mean += delta / self.count
+                self._m2 += delta * (length - self.mean)
+        self.last_period = period_start
+        return True
+    
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+    
+    @property
+    def luteal_estimate(self) -> int:
+        if self.count == 0:
+            return self.DEFAULT_LUTEAL_DAYS
+        return self.luteal_days(self.mean)
+    
+    @classmethod
+    def luteal_days(cls, cycle_length: float) -> int:
+        """Luteal length is fairly fixed (~14 days) but shortens in short cycles"""
+        return max(10, min(cls.DEFAULT_LUTEAL_DAYS, round(cycle_length / 2)))
+    
+    def regularity(self) -> str:
+        """Phase confidence from the number of observed cycles and their spread"""
+        if self.count >= 3 and self.std <= 2:
+            return "high"
+        if self.count >= 1 and self.std <= 4:
+            return "medium"
+        return "low"
+    
+    def copy(self) -> "CycleStatistics":
+        return CycleStatistics.from_state(*self.state())
+
+
+class CycleHistoryStore:
+    """Per-user running cycle statistics.
+    
+    With a backend the statistics are stored there (folded in by the assessment
+    writer, see AssessmentBackend.write_batch) and this is a cache in front of it:
+    least recently used users are evicted, and entries are re-read after
+    `cache_ttl` seconds, so another worker's updates show within that time.
+    Without one this in-memory LRU is the only copy.
+    """
+    
+    def __init__(
+        self,
+        backend: Optional["AssessmentBackend"] = None,
+        max_users: int = 100_000,
+        cache_ttl: float = 5.0
+    ):
+        self.backend = backend
+        self.max_users = max_users
+        self.cache_ttl = cache_ttl
+        self._stats: "OrderedDict[str, Tuple[CycleStatistics, float]]" = OrderedDict()  # (stats, loaded_at)
+        self._lock = threading.Lock()
+    
+    def record(self, user_id: str, period_dates: Iterable[date]) -> CycleStatistics:
+        """Fold any dates newer than the user's last period into their cached statistics
+        (the backend copy is updated by whoever persists the assessment)"""
+        stats = self._current(user_id)
+        for period_start in sorted(period_dates):
+            stats.add_period(period_start)
+        with self._lock:
+            self._cache(user_id, stats)
+        return stats.copy()
+    
+    def peek(self, user_id: str, period_dates: Iterable[date]) -> CycleStatistics:
+        """The statistics record() would return, without storing the dates"""
+        stats = self._current(user_id)
+        for period_start in sorted(period_dates):
+            stats.add_period(period_start)
+        return stats
+    
+    def _current(self, user_id: str) -> CycleStatistics:
+        """A copy of the user's statistics: cached, else read from the backend"""
+        with self._lock:
+            entry = self._stats.get(user_id)
+            if entry is not None and (self.backend is None or time.monotonic() - entry[1] < self.cache_ttl):
+                self._stats.move_to_end(user_id)
+                return entry[0].copy()
+        if self.backend is None:
+            return CycleStatistics()
+        stats = self.backend.get_cycle_statistics(user_id) or CycleStatistics()
+        with self._lock:
+            self._cache(user_id, stats.copy())
+        return stats
+    
+    def _cache(self, user_id: str, stats: CycleStatistics) -> None:
+        self._stats[user_id] = (stats, time.monotonic())
+        self._stats.move_to_end(user_id)
+        if len(self._stats) > self.max_users:
+            self._stats.popitem(last=False)
 
 
 class CycleCalculator:
@@ -23,11 +175,22 @@ class CycleCalculator:
         self, 
         last_period_date: Optional[date],
         cycle_length: str,
-        date_not_sure: bool = False
+        date_not_sure: bool = False,
+        statistics: Optional[CycleStatistics] = None
     ) -> CycleContext:
-        """Calculate current cycle phase and context"""
+        """Calculate current cycle phase and context.
+        When cycle statistics from a period history are available they replace the
+        bucketed cycle length for phase, next-period and confidence estimation.
+        """
+        
+        has_history = statistics is not None and statistics.count > 0
+        if date_not_sure:
+            last_period_date = None
+        if statistics is not None and statistics.last_period is not None:
+            if last_period_date is None or statistics.last_period > last_period_date:
+                last_period_date = statistics.last_period
         
-        if date_not_sure or not last_period_date:
+        if not last_period_date:
             return CycleContext(
                 current_phase=None,
                 days_since_period=None,
@@ -39,6 +202,21 @@ class CycleCalculator:
         today = date.today()
         days_since = (today - last_period_date).days
         
+        if has_history:
+            avg_cycle_days = round(statistics.mean)
+            luteal_days = statistics.luteal_estimate
+            phase = self._determine_phase(days_since, avg_cycle_days, avg_cycle_days - luteal_days)
+            return CycleContext(
+                current_phase=phase,
+                days_since_period=days_since,
+                phase_confidence=statistics.regularity(),
+                estimated_next_period=last_period_date + timedelta(days=avg_cycle_days),
+                cycle_length_mean=round(statistics.mean, 1),
+                cycle_length_std=round(statistics.std, 1),
+                luteal_length_estimate=luteal_days,
+                cycles_observed=statistics.count
+            )
+        
         # Parse cycle length
         avg_cycle_days = self._parse_cycle_length(cycle_length)
         
@@ -83,18 +261,97 @@ class CycleCalculator:
         }
         return mapping.get(cycle_length)
     
-    def _determine_phase(self, days_since: int, cycle_length: int) -> str:
-        """Determine cycle phase based on days since period"""
+    def _determine_phase(self, days_since: int, cycle_length: int, follicular_end: int = DEFAULT_FOLLICULAR_END) -> str:
+        """Determine cycle phase based on days since period.
+        follicular_end is the estimated ovulation day (cycle length minus luteal length).
+        """
         
         if days_since <= 7:
             return "menstrual"
-        elif days_since <= 14:
+        elif days_since <= follicular_end:
             return "follicular"
         elif days_since <= (cycle_length - 3):
             return "luteal"
         else:
             return "late_luteal"
     
+    def forecast_phases(
+        self,
+        last_period_dates: Sequence[Optional[date]],
+        cycle_lengths: Sequence[Union[int, str, None]],
+        start_date: date,
+        days: int,
+        follicular_ends: Optional[Sequence[Optional[int]]] = None
+    ) -> Tuple[List[List[Optional[str]]], List[Optional[date]]]:
+        """Forecast daily phases for many users over [start_date, start_date + days).
+        
+        Cycles are assumed to repeat at the given length. Each user's phases are a
+        slice of a precomputed phase cycle per (length, follicular end), offset by
+        the ordinal distance from the last period, so no per-day date math is done.
+        follicular_ends (cycle length minus luteal length, as calculate_cycle_context
+        uses with a period history) default to day 14.
+        Returns (phases per user, next period start on/after start_date per user).
+        """
+        start = start_date.toordinal()
+        all_phases = []
+        next_periods = []
+        if follicular_ends is None:
+            follicular_ends = [None] * len(last_period_dates)
+        
+        for last_period, length, follicular_end in zip(last_period_dates, cycle_lengths, follicular_ends):
+            if isinstance(length, str):
+                length = self._parse_cycle_length(length)
+            if last_period is None or not length:
+                all_phases.append([None] * days)
+                next_periods.append(None)
+                continue
+            
+            cycle = _phase_cycle(length, follicular_end or DEFAULT_FOLLICULAR_END)
+            offset = start - last_period.toordinal()
+            if offset >= 0:
+                shift = offset % length
+                tiled = cycle * ((shift + days) // length + 1)
+                all_phases.append(list(tiled[shift:shift + days]))
+                next_periods.append(date.fromordinal(start + (length - shift) % length))
+            else:
+                # Range starts before the last period: no phases until it begins
+                lead = min(-offset, days)
+                tiled = cycle * ((days - lead) // length + 1)
+                all_phases.append([None] * lead + list(tiled[:days - lead]))
+                next_periods.append(last_period)
+        
+        return all_phases, next_periods
+    
+    def phase_calendar(
+        self,
+        last_period_date: date,
+        cycle_length: Union[int, str],
+        start_date: date,
+        days: int,
+        follicular_end: Optional[int] = None
+    ) -> CycleCalendarResponse:
+        """Phase calendar for one user"""
+        (phases,), (next_period,) = self.forecast_phases(
+            [last_period_date], [cycle_length], start_date, days, [follicular_end]
+        )
+        length = self._parse_cycle_length(cycle_length) if isinstance(cycle_length, str) else cycle_length
+        
+        calendar = []
+        for offset, phase in enumerate(phases):
+            day = start_date + timedelta(days=offset)
+            cycle_day = None
+            if phase is not None:
+                cycle_day = (day - last_period_date).days % length + 1
+            calendar.append(CycleCalendarDay(date=day, phase=phase, cycle_day=cycle_day))
+        
+        return CycleCalendarResponse(
+            start_date=start_date,
+            end_date=start_date + timedelta(days=days - 1),
+            cycle_length_days=length,
+            next_period_date=next_period,
+            days=calendar
+        )
+    
     def is_phase_normal_symptom(self, symptom: str, phase: Optional[str]) -> bool:
         """Check if symptom is normal for given cycle phase"""
         
@@ -124,3 +381,10 @@ class CycleCalculator:
             return True
         
         return False
+
+
+@lru_cache(maxsize=1024)
+def _phase_cycle(cycle_length: int, follicular_end: int = DEFAULT_FOLLICULAR_END) -> Tuple[str, ...]:
+    """Phase for every day of a cycle of the given length and follicular end"""
+    calculator = CycleCalculator()
+    return tuple(calculator._determine_phase(day, cycle_length, follicular_end) for day in range(cycle_length))
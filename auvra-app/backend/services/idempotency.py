@@ -0,0 +1,105 @@
+"""
+Idempotent Request Replies
+Remembers the reply to each Idempotency-Key for a TTL, so a client retrying a
+request it never saw answered gets the original reply instead of a second run
+(and a second Gemini call)
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, NamedTuple, Tuple
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredReply(NamedTuple):
+    status_code: int
+    body: bytes
+    media_type: str
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when a key is reused with a different request"""
+
+
+class _Abandoned(Exception):
+    """Set on a key's reply when its first request was cancelled before replying"""
+
+
+class _Entry(NamedTuple):
+    fingerprint: str  # hash of what the key was first used with
+    reply: "asyncio.Future[StoredReply]"
+    expires_at: float  # time.monotonic()
+
+
+class IdempotencyStore:
+    """Bounded key -> reply store (first come, first evicted), used from the event loop.
+
+    The first request with a key runs compute(); duplicates arriving while it
+    runs await the same future, and later duplicates get the stored reply until
+    `ttl` seconds after the key was first seen. Failures are not stored: the
+    waiting duplicates get the same error and the next retry runs again. If the
+    first request is cancelled, one waiting duplicate computes in its place.
+    Replies live in this process only.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600.0, max_entries: int = 10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()  # insertion order == expiry order
+        self._stats = {"computed": 0, "replayed": 0, "waited": 0, "taken_over": 0, "conflicts": 0, "evicted": 0}
+
+    async def run(
+        self,
+        key: Hashable,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[StoredReply]]
+    ) -> Tuple[StoredReply, bool]:
+        """(reply, replayed); raises IdempotencyConflict if the key was used for another request"""
+        while True:
+            now = time.monotonic()
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if oldest.expires_at > now:
+                    break
+                self._entries.popitem(last=False)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                self._stats["conflicts"] += 1
+                raise IdempotencyConflict(key)
+            if entry.reply.done():
+                self._stats["replayed"] += 1
+            else:
+                self._stats["waited"] += 1
+            try:
+                # shield: a duplicate that disconnects must not cancel the first request's reply
+                return await asyncio.shield(entry.reply), True
+            except _Abandoned:
+                # The first request was cancelled; the first duplicate back here computes
+                self._stats["taken_over"] += 1
+
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future(), now + self.ttl)
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evicted"] += 1
+
+        self._stats["computed"] += 1
+        try:
+            reply = await compute()
+        except BaseException as e:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            # Cancelled (client gone, shutdown): waiting duplicates run it themselves
+            entry.reply.set_exception(e if isinstance(e, Exception) else _Abandoned(key))
+            entry.reply.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        entry.reply.set_result(reply)
+        return reply, False
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "entries": len(self._entries)}
@@ -0,0 +1,234 @@
+"""
+Lab Reference Engine
+Declarative analyte table with unit normalization and (optionally phase-specific)
+reference ranges, evaluated for one panel or a whole batch of panels at once
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class LabUnitError(ValueError):
+    """Raised when a lab value is reported in a unit we cannot convert"""
+
+
+# ==================== ANALYTE TABLE ====================
+# Values are scored in the canonical unit. Each conversion maps a unit to
+# (factor, offset) so that canonical = value * factor + offset.
+
+LAB_ANALYTES = {
+    "total_testosterone": {"unit": "ng/dL", "si_unit": "nmol/L", "conversions": {"nmol/L": (28.84, 0.0)}},
+    "free_testosterone": {"unit": "pg/mL", "si_unit": "pmol/L", "conversions": {"pmol/L": (0.2884, 0.0), "ng/dL": (10.0, 0.0)}},
+    "dhea_s": {"unit": "µg/dL", "si_unit": "µmol/L", "conversions": {"µmol/L": (36.81, 0.0)}},
+    "lh": {"unit": "mIU/mL", "si_unit": "IU/L", "conversions": {"IU/L": (1.0, 0.0)}},
+    "fsh": {"unit": "mIU/mL", "si_unit": "IU/L", "conversions": {"IU/L": (1.0, 0.0)}},
+    "tsh": {"unit": "mIU/L", "si_unit": "mIU/L", "conversions": {"µIU/mL": (1.0, 0.0)}},
+    "free_t3": {"unit": "pg/mL", "si_unit": "pmol/L", "conversions": {"pmol/L": (0.651, 0.0)}},
+    "free_t4": {"unit": "ng/dL", "si_unit": "pmol/L", "conversions": {"pmol/L": (0.0777, 0.0)}},
+    "fasting_insulin": {"unit": "µIU/mL", "si_unit": "pmol/L", "conversions": {"pmol/L": (0.144, 0.0), "mIU/L": (1.0, 0.0)}},
+    "hba1c": {"unit": "%", "si_unit": "mmol/mol", "conversions": {"mmol/mol": (0.09148, 2.152)}},
+    "fasting_glucose": {"unit": "mg/dL", "si_unit": "mmol/L", "conversions": {"mmol/L": (18.016, 0.0)}},
+    "am_cortisol": {"unit": "µg/dL", "si_unit": "nmol/L", "conversions": {"nmol/L": (0.03625, 0.0)}},
+    "estradiol": {"unit": "pg/mL", "si_unit": "pmol/L", "conversions": {"pmol/L": (0.2724, 0.0)}},
+    "progesterone": {"unit": "ng/mL", "si_unit": "nmol/L", "conversions": {"nmol/L": (0.3145, 0.0)}},
+    "shbg": {"unit": "nmol/L", "si_unit": "nmol/L", "conversions": {}},
+}
+
+# Derived analytes: (input analytes, formula over their canonical values)
+DERIVED_ANALYTES = {
+    "lh_fsh_ratio": (("lh", "fsh"), lambda lh, fsh: lh / fsh),
+}
+
+# ==================== SCORING RULES ====================
+# A rule matches when every comparison holds (gt/ge/lt/le). "phases" overrides
+# the comparisons for a cycle phase; None disables the rule in that phase.
+# "direction" feeds the high/low tally of bi-directional hormones.
+
+LAB_RULES = (
+    {"analyte": "free_testosterone", "hormone": "androgens", "points": 2, "gt": 2.0,
+     "factor": "Free testosterone elevated ({value} pg/mL)"},
+    {"analyte": "total_testosterone", "hormone": "androgens", "points": 2, "gt": 60,
+     "factor": "Total testosterone elevated ({value} ng/dL)"},
+    {"analyte": "dhea_s", "hormone": "androgens", "points": 2, "gt": 300,
+     "factor": "DHEA-S elevated ({value} µg/dL) - adrenal source"},
+    {"analyte": "lh_fsh_ratio", "hormone": "androgens", "points": 2, "gt": 2.5,
+     "factor": "LH:FSH ratio elevated ({value:.2f}) - PCOS indicator"},
+    {"analyte": "tsh", "hormone": "thyroid", "points": 2, "gt": 2.5, "le": 4.5,
+     "factor": "TSH subclinical range ({value} mIU/L)"},
+    {"analyte": "tsh", "hormone": "thyroid", "points": 3, "gt": 4.5,
+     "factor": "TSH elevated ({value} mIU/L) - hypothyroidism"},
+    {"analyte": "free_t3", "hormone": "thyroid", "points": 2, "lt": 2.5,
+     "factor": "Free T3 low ({value} pg/mL)"},
+    {"analyte": "free_t4", "hormone": "thyroid", "points": 1, "lt": 1.0,
+     "factor": "Free T4 low ({value} ng/dL)"},
+    {"analyte": "fasting_insulin", "hormone": "insulin", "points": 2, "gt": 6,
+     "factor": "Fasting insulin elevated ({value} µIU/mL)"},
+    {"analyte": "hba1c", "hormone": "insulin", "points": 2, "gt": 5.4,
+     "factor": "HbA1c prediabetic range ({value}%)"},
+    {"analyte": "fasting_glucose", "hormone": "insulin", "points": 1, "gt": 100,
+     "factor": "Fasting glucose elevated ({value} mg/dL)"},
+    {"analyte": "am_cortisol", "hormone": "cortisol", "points": 2, "direction": "high", "gt": 20,
+     "factor": "AM cortisol elevated ({value} µg/dL)"},
+    {"analyte": "am_cortisol", "hormone": "cortisol", "points": 2, "direction": "low", "lt": 6,
+     "factor": "AM cortisol low ({value} µg/dL)"},
+    # Default estradiol range is the Day 3 reference (30-100 pg/mL); early-follicular
+    # values around it are normal, so only the luteal phase raises the low bound
+    {"analyte": "estradiol", "hormone": "estrogen", "points": 2, "direction": "low", "lt": 30,
+     "phases": {"luteal": {"lt": 50}},
+     "factor": "Estradiol low ({value} pg/mL)"},
+    {"analyte": "estradiol", "hormone": "estrogen", "points": 2, "direction": "high", "gt": 100,
+     "phases": {"follicular": {"gt": 400}, "luteal": {"gt": 250}, "late_luteal": {"gt": 200}},
+     "factor": "Estradiol elevated ({value} pg/mL)"},
+    # Progesterone is only interpretable after ovulation (Day 19-22 reference)
+    {"analyte": "progesterone", "hormone": "progesterone", "points": 2, "lt": 5,
+     "phases": {"menstrual": None, "follicular": None},
+     "factor": "Progesterone low ({value} ng/mL)"},
+    {"analyte": "shbg", "hormone": "androgens", "points": 1, "lt": 30,
+     "factor": "Low SHBG ({value} nmol/L) - increases free androgens"},
+    {"analyte": "shbg", "hormone": "androgens", "points": -1, "gt": 100,
+     "factor": "High SHBG ({value} nmol/L) - decreases free androgens"},
+)
+
+COMPARISONS = {
+    "gt": lambda value, bound: value > bound,
+    "ge": lambda value, bound: value >= bound,
+    "lt": lambda value, bound: value < bound,
+    "le": lambda value, bound: value <= bound,
+}
+
+# A finding is (analyte, hormone, points, direction, value, factor text)
+LabFinding = Tuple[str, str, int, Optional[str], float, str]
+
+
+def normalize_unit(unit: str) -> str:
+    """Fold spelling variants (ug, mcg, μ, case) into one comparable key"""
+    unit = unit.strip().replace("μ", "µ").replace("mcg", "µg")
+    if unit[:1] in ("u", "U") and len(unit) > 1 and unit[1] in "gIimM":
+        unit = "µ" + unit[1:]
+    return unit.lower()
+
+
+class LabReferenceEngine:
+    """Evaluate lab panels against the declarative reference table"""
+
+    def __init__(self, analytes: Dict = LAB_ANALYTES, rules: Sequence[Dict] = LAB_RULES):
+        self.analytes = analytes
+        self.rules = tuple(rules)
+        # Pre-resolve every accepted unit spelling to its (factor, offset)
+        self._conversions = {}
+        for analyte, spec in analytes.items():
+            table = {normalize_unit(spec["unit"]): None}
+            for unit, conversion in spec["conversions"].items():
+                table[normalize_unit(unit)] = conversion
+            self._conversions[analyte] = table
+        # Pre-compile comparisons per phase so evaluation is a flat loop
+        self._compiled = [self._compile_rule(rule) for rule in self.rules]
+
+    def evaluate_panel(self, labs, cycle_phase: Optional[str] = None) -> List[LabFinding]:
+        """Evaluate a single panel"""
+        return self.evaluate_panels([labs], [cycle_phase])[0]
+
+    def evaluate_panels(
+        self,
+        panels: Sequence,
+        cycle_phases: Optional[Sequence[Optional[str]]] = None
+    ) -> List[List[LabFinding]]:
+        """Evaluate many panels in one column-wise pass over the rule table"""
+        count = len(panels)
+        phases = list(cycle_phases) if cycle_phases is not None else [None] * count
+        if len(phases) != count:
+            raise ValueError("cycle_phases must match the number of panels")
+        for panel in panels:
+            unknown = sorted(set(self._get(panel, "units") or ()) - set(self.analytes))
+            if unknown:
+                # A misspelt key would otherwise leave that analyte read in its default unit
+                raise LabUnitError(f"Unknown analyte(s) in units: {', '.join(unknown)}")
+
+        columns = {analyte: self._column(panels, analyte) for analyte in self.analytes}
+        for name, (inputs, formula) in DERIVED_ANALYTES.items():
+            columns[name] = [
+                None if None in args else formula(*args)
+                for args in zip(*(columns[analyte] for analyte in inputs))
+            ]
+
+        findings: List[List[LabFinding]] = [[] for _ in range(count)]
+        for rule, checks_by_phase in zip(self.rules, self._compiled):
+            values = columns[rule["analyte"]]
+            default_checks = checks_by_phase[None]
+            for i, value in enumerate(values):
+                if value is None:
+                    continue
+                checks = checks_by_phase.get(phases[i], default_checks)
+                if checks is None or not all(compare(value, bound) for compare, bound in checks):
+                    continue
+                findings[i].append((
+                    rule["analyte"],
+                    rule["hormone"],
+                    rule["points"],
+                    rule.get("direction"),
+                    value,
+                    rule["factor"].format(value=value)
+                ))
+        return findings
+
+    def summarize(self, findings: List[LabFinding]) -> Dict[str, int]:
+        """Total from_labs contribution per hormone"""
+        totals: Dict[str, int] = {}
+        for _, hormone, points, _, _, _ in findings:
+            totals[hormone] = totals.get(hormone, 0) + points
+        return totals
+
+    # ==================== HELPERS ====================
+
+    def _compile_rule(self, rule: Dict) -> Dict[Optional[str], Optional[List]]:
+        def compile_checks(spec):
+            if spec is None:
+                return None
+            return [(COMPARISONS[op], bound) for op, bound in spec.items() if op in COMPARISONS]
+
+        compiled = {None: compile_checks(rule)}
+        for phase, spec in rule.get("phases", {}).items():
+            compiled[phase] = compile_checks(spec)
+        return compiled
+
+    def _column(self, panels: Sequence, analyte: str) -> List[Optional[float]]:
+        """Canonical-unit values of one analyte across all panels"""
+        column = []
+        conversions = self._conversions[analyte]
+        for panel in panels:
+            value = self._get(panel, analyte)
+            # Missing and non-positive values carry no information
+            if not value or value <= 0:
+                column.append(None)
+                continue
+            unit = self._unit_for(panel, analyte)
+            if unit is None:
+                column.append(value)
+                continue
+            key = normalize_unit(unit)
+            if key not in conversions:
+                raise LabUnitError(f"Unsupported unit '{unit}' for {analyte}")
+            conversion = conversions[key]
+            if conversion is None:
+                column.append(value)
+            else:
+                factor, offset = conversion
+                column.append(round(value * factor + offset, 2))
+        return column
+
+    def _unit_for(self, panel, analyte: str) -> Optional[str]:
+        """Explicit per-analyte unit, else the SI unit when the panel is in SI"""
+        units = self._get(panel, "units") or {}
+        if analyte in units:
+            return units[analyte]
+        if self._get(panel, "unit_system") == "si":
+            return self.analytes[analyte]["si_unit"]
+        return None
+
+    def _get(self, panel, field: str):
+        if isinstance(panel, dict):
+            return panel.get(field)
+        return getattr(panel, field, None)
+
+
+# Rule tables are immutable, so one engine is shared by every scorer
+lab_reference_engine = LabReferenceEngine()
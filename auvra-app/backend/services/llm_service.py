@@ -10,6 +10,7 @@ from textwrap import shorten
 import google.generativeai as genai
 from models.schemas import LLMScoringResponse, HormoneImpact
 from pydantic import ValidationError
+from services.tracing import SpanKind, current_span
 
 
 class LLMService:
@@ -32,6 +33,25 @@ class LLMService:
             self.model = None
             print("WARNING: GEMINI_API_KEY not set - LLM features will use fallback")
     
+    def _generate(self, full_prompt: str):
+        """Call Gemini; on a sampled request the call is a CLIENT span with prompt size and token counts"""
+        span = current_span()
+        if span is None:
+            return self.model.generate_content(full_prompt)
+        attributes = {"gen_ai.system": "gemini", "gen_ai.request.model": self.model_name, "llm.prompt_chars": len(full_prompt)}
+        with span.child("llm.generate_content", attributes, kind=SpanKind.CLIENT) as call:
+            response = self.model.generate_content(full_prompt)
+            usage = getattr(response, "usage_metadata", None)
+            for attribute, field in (
+                ("gen_ai.usage.input_tokens", "prompt_token_count"),
+                ("gen_ai.usage.output_tokens", "candidates_token_count"),
+                ("llm.total_tokens", "total_token_count"),
+            ):
+                count = getattr(usage, field, None)
+                if isinstance(count, int):
+                    call.set_attribute(attribute, count)
+            return response
+    
     def build_system_prompt(self, user_context: dict) -> str:
         """Build comprehensive system prompt with user context"""
         
@@ -251,7 +271,7 @@ Analyze each input independently and avoid double-counting symptoms between them
             print("#" * 100)
 
             print("\n# Calling Gemini API... please wait...")
-            response = self.model.generate_content(full_prompt)
+            response = self._generate(full_prompt)
             response_text = response.text or ""
             print("# Gemini API responded successfully!\n")
             
@@ -410,7 +430,7 @@ Return your analysis as JSON following the required format above."""
             print("#" * 100)
 
             print("\n# Calling Gemini API... please wait...")
-            response = self.model.generate_content(full_prompt)
+            response = self._generate(full_prompt)
             response_text = response.text or ""
             print("# Gemini API responded successfully!\n")
             
@@ -612,8 +632,8 @@ Return your analysis as JSON following the required format above."""
             pass
         return result
     
-    def apply_llm_scores(self, llm_response: LLMScoringResponse, hormone_scorer, user_input: str, source: str = "others", trace_id: Optional[str] = None):
-        """Apply LLM-derived scores to hormone scorer"""
+    def apply_llm_scores(self, llm_response: LLMScoringResponse, scoring_state, user_input: str, source: str = "others", trace_id: Optional[str] = None):
+        """Apply LLM-derived scores to a request's ScoringState"""
         tag = f"[LLM][{trace_id}]" if trace_id else "[LLM]"
         print(f"{tag} Applying LLM-derived scores to hormone model...")
         for impact in llm_response.hormone_impacts:
@@ -621,20 +641,20 @@ Return your analysis as JSON following the required format above."""
             
             # Add to appropriate source (typically from_diagnosis for "others" input)
             if source == "others":
-                hormone_scorer.hormone_scores[hormone]["from_diagnosis"] += impact.score_weight
+                scoring_state.hormone_scores[hormone]["from_diagnosis"] += impact.score_weight
             else:
-                hormone_scorer.hormone_scores[hormone]["from_symptoms"] += impact.score_weight
+                scoring_state.hormone_scores[hormone]["from_symptoms"] += impact.score_weight
             
             # Track direction for bi-directional hormones
             if hormone in ["estrogen", "cortisol"]:
                 if impact.direction == "high":
-                    hormone_scorer.hormone_scores[hormone]["high_score"] += impact.score_weight
+                    scoring_state.hormone_scores[hormone]["high_score"] += impact.score_weight
                 else:
-                    hormone_scorer.hormone_scores[hormone]["low_score"] += impact.score_weight
+                    scoring_state.hormone_scores[hormone]["low_score"] += impact.score_weight
             
             # Add to contributing factors
             factor_text = f"Custom input: {user_input[:50]}... ({impact.reasoning})"
-            hormone_scorer.contributing_factors[hormone].append(factor_text)
+            scoring_state.contributing_factors[hormone].append(factor_text)
             print(f"  {tag} [APPLY→{hormone}] direction={impact.direction} +{impact.score_weight} reason={impact.reasoning}")
         
         return llm_response.overall_confidence, llm_response.clinical_flags
@@ -0,0 +1,80 @@
+"""
+Memory Profiling Mode
+With tracemalloc tracing, records per pipeline stage how much memory a stage
+leaves allocated (its outputs and anything else it keeps), how high traced
+memory climbed while it ran (temporary models, strings) and the net change in
+allocated blocks.
+
+tracemalloc slows every allocation and its peak is process-wide, so this is a
+diagnostic mode: figures from stages running side by side (STAGE_WORKERS, or
+concurrent requests) include each other's allocations.
+"""
+
+import sys
+import threading
+import tracemalloc
+from typing import Dict, List, NamedTuple
+
+
+class MemoryMark(NamedTuple):
+    traced: int  # bytes traced when the measurement began
+    blocks: int  # sys.getallocatedblocks()
+
+
+class MemoryDelta(NamedTuple):
+    allocated: int  # net bytes still allocated at the end
+    peak: int  # highest traced bytes above the start
+    blocks: int  # net allocated blocks
+
+
+def start_tracing(frames: int = 1) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def begin() -> MemoryMark:
+    """Start a measurement (resets tracemalloc's peak)"""
+    tracemalloc.reset_peak()
+    return MemoryMark(tracemalloc.get_traced_memory()[0], sys.getallocatedblocks())
+
+
+def delta(mark: MemoryMark) -> MemoryDelta:
+    current, peak = tracemalloc.get_traced_memory()
+    return MemoryDelta(current - mark.traced, max(0, peak - mark.traced), sys.getallocatedblocks() - mark.blocks)
+
+
+class StageMemoryStats:
+    """Running per-stage memory figures (shared across requests), like StageStats for time"""
+
+    def __init__(self):
+        self._stats: Dict[str, List[int]] = {}  # name -> [calls, allocated, peak, max_peak, blocks]
+        self._lock = threading.Lock()
+
+    def record(self, name: str, measured: MemoryDelta) -> None:
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                self._stats[name] = [1, measured.allocated, measured.peak, measured.peak, measured.blocks]
+            else:
+                entry[0] += 1
+                entry[1] += measured.allocated
+                entry[2] += measured.peak
+                entry[3] = max(entry[3], measured.peak)
+                entry[4] += measured.blocks
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "mean_allocated_kib": round(allocated / calls / 1024, 2),
+                    "mean_peak_kib": round(peak / calls / 1024, 2),
+                    "max_peak_kib": round(max_peak / 1024, 2),
+                    "mean_blocks": round(blocks / calls, 1)
+                }
+                for name, (calls, allocated, peak, max_peak, blocks) in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
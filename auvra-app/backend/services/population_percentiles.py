@@ -0,0 +1,191 @@
+"""
+Population Percentiles
+Per-hormone KLL sketches of every completed assessment's scores, used to tell a
+user what share of assessments scored lower than theirs. Each worker process
+keeps its own shard, persists it every `interval` seconds and merges the other
+workers' shards into the view it answers from, so the request path only does a
+table lookup.
+"""
+
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from services.assessment_store import AssessmentBackend
+from services.quantile_sketch import KLLSketch
+
+
+def percentile_table(sketch: KLLSketch) -> Tuple[int, Tuple[int, ...]]:
+    """(lowest score, percentile of each integer score from lowest to highest).
+    Hormone totals are small integers, so every query is one index lookup."""
+    low, high = int(sketch.min), int(sketch.max)
+    items = sketch.weighted_items()
+    below = []
+    position = seen = 0
+    for score in range(low, high + 1):
+        while position < len(items) and items[position][0] < score:
+            seen += items[position][1]
+            position += 1
+        below.append(round(100 * seen / sketch.n))
+    return low, tuple(below)
+
+
+def _copy(sketches: Dict[str, KLLSketch]) -> Dict[str, KLLSketch]:
+    return {hormone: KLLSketch.from_dict(sketch.to_dict()) for hormone, sketch in sketches.items()}
+
+
+def _merge(sketches: Dict[str, KLLSketch], others: Dict[str, KLLSketch]) -> None:
+    """Fold `others` into `sketches`, taking ownership of the sketches it adds"""
+    for hormone, other in others.items():
+        if hormone in sketches:
+            sketches[hormone].merge(other)
+        else:
+            sketches[hormone] = other
+
+
+class PopulationPercentiles:
+    """Population score sketches shared by the workers through the assessment backend.
+
+    record() adds a completed assessment to this worker's sketches. sync() (run
+    every `interval` seconds and on close) saves this worker's shard, absorbs
+    shards not updated for `stale_after` seconds (workers that have stopped),
+    and rebuilds the lookup tables from all shards. Answers therefore change
+    once per sync rather than with every assessment.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[AssessmentBackend] = None,
+        interval: float = 60.0,
+        stale_after: Optional[float] = None,
+        min_population: int = 100,
+        k: int = 200
+    ):
+        self.backend = backend
+        self.interval = interval
+        # A live worker saves every interval; a shard this old belongs to one that stopped
+        self.stale_after = stale_after if stale_after is not None else max(10 * interval, 600.0)
+        self.min_population = min_population  # fewer assessments than this: no percentiles
+        self.k = k
+        self.shard = uuid.uuid4().hex
+        self._saved: Dict[str, KLLSketch] = {}  # what our stored shard holds (plus absorbed shards)
+        self._fresh: Dict[str, KLLSketch] = {}  # assessments recorded since the last save
+        self._version: Optional[str] = None  # updated_at of our stored shard
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._tables: Mapping[str, Tuple[int, Tuple[int, ...]]] = MappingProxyType({})
+        self._stats = {"population": 0, "shards": 0, "syncs": 0, "synced_at": None}
+        self._stop = threading.Event()
+        self._syncer = None
+        if backend is not None and interval > 0:
+            self.sync()
+            self._syncer = threading.Thread(target=self._run, name="population-sync", daemon=True)
+            self._syncer.start()
+
+    def record(self, hormone_scores: Dict[str, int]) -> None:
+        """Add one completed assessment's hormone totals"""
+        with self._lock:
+            for hormone, total in hormone_scores.items():
+                sketch = self._fresh.get(hormone)
+                if sketch is None:
+                    sketch = self._fresh[hormone] = KLLSketch(self.k)
+                sketch.update(total)
+
+    def percentile(self, hormone: str, score: int) -> Optional[int]:
+        """Share (0-100) of the population scoring lower, as of the last sync"""
+        table = self._tables.get(hormone)
+        if table is None:
+            return None
+        low, below = table
+        index = score - low
+        if index < 0:
+            return 0
+        if index >= len(below):
+            return 100
+        return below[index]
+
+    def sync(self) -> None:
+        """Persist this worker's shard and refresh the view from every shard"""
+        with self._sync_lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        shards = self.backend.load_sketches() if self.backend is not None else []
+        now = datetime.now(timezone.utc)
+        stale_before = (now - timedelta(seconds=self.stale_after)).isoformat()
+        stale = [shard for shard in shards if shard.shard != self.shard and shard.updated_at < stale_before]
+
+        with self._lock:
+            fresh, self._fresh = self._fresh, {}
+        local = _copy(self._saved)
+        _merge(local, _copy(fresh))
+        for shard in stale:
+            self._merge_into(local, shard.payload)
+        if self.backend is not None:
+            updated_at = now.isoformat()
+            payload = json.dumps({hormone: sketch.to_dict() for hormone, sketch in local.items()})
+            absorbed = [(shard.shard, shard.updated_at) for shard in stale]
+            if not self.backend.save_sketch(self.shard, payload, updated_at, self._version, absorbed):
+                if self._stored_version() != self._version:
+                    # Another worker took our shard as stale: it has everything up to our last
+                    # save, so drop that rather than count it twice, but keep what came since
+                    print(f"[POPULATION][WARN] Shard {self.shard} was absorbed by another worker; resetting")
+                    self._saved = {}
+                    self._version = None
+                # Otherwise a stale shard changed under us; retry on the next sync
+                with self._lock:
+                    _merge(self._fresh, fresh)
+                return
+            self._version = updated_at
+            if stale:
+                print(f"[POPULATION] Absorbed {len(stale)} stale shard(s)")
+        self._saved = local  # absorbed shards were deleted from the backend: they live on in ours
+
+        view = _copy(local)
+        others = [shard for shard in shards if shard.shard != self.shard and shard not in stale]
+        for shard in others:
+            self._merge_into(view, shard.payload)
+        self._publish(view, shards=1 + len(others))
+
+    def close(self) -> None:
+        """Stop the sync thread and save this worker's shard one last time"""
+        if self._syncer is not None:
+            self._stop.set()
+            self._syncer.join()
+        if self.backend is not None:
+            self.sync()
+
+    def stats(self) -> Dict:
+        return dict(self._stats)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"[POPULATION][ERROR] Sync failed: {e}")
+
+    def _stored_version(self) -> Optional[str]:
+        for shard in self.backend.load_sketches():
+            if shard.shard == self.shard:
+                return shard.updated_at
+        return None
+
+    def _merge_into(self, sketches: Dict[str, KLLSketch], payload: str) -> None:
+        _merge(sketches, {hormone: KLLSketch.from_dict(data) for hormone, data in json.loads(payload).items()})
+
+    def _publish(self, view: Dict[str, KLLSketch], shards: int) -> None:
+        self._tables = MappingProxyType({
+            hormone: percentile_table(sketch)
+            for hormone, sketch in view.items()
+            if sketch.n >= self.min_population
+        })
+        self._stats = {
+            "population": max((sketch.n for sketch in view.values()), default=0),
+            "shards": shards,
+            "syncs": self._stats["syncs"] + 1,
+            "synced_at": datetime.now(timezone.utc).isoformat()
+        }
@@ -0,0 +1,207 @@
+"""
+On-Demand Profiling
+Profiles the next N assessments (or those started in the next T seconds) of
+this worker and aggregates them into one downloadable result:
+
+- "cprofile": deterministic cProfile of each profiled assessment's thread,
+  merged into a pstats file (`python -m pstats`, snakeviz, ...). One assessment
+  is profiled at a time: from Python 3.12 cProfile runs on sys.monitoring, which
+  allows a single active profiler per process. Assessments overlapping a
+  profiled one run unprofiled and do not count towards the capture
+- "sample": a sampler thread records the stacks of the threads running
+  profiled assessments every `sample_interval` seconds, as collapsed stacks
+  (flamegraph.pl, speedscope)
+
+While no capture is open the request path reads one attribute.
+"""
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+MODES = ("cprofile", "sample")
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a capture is started while another one is open"""
+
+
+class ProfileResult(NamedTuple):
+    body: bytes
+    media_type: str
+    filename: str
+
+
+class _Capture:
+    def __init__(self, mode: str, assessments: Optional[int], seconds: Optional[float], sample_interval: float):
+        self.mode = mode
+        self.assessments = assessments
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + seconds if seconds is not None else None
+        self.seconds = seconds
+        self.sample_interval = sample_interval
+        self.claimed = 0  # assessments admitted to the capture
+        self.profiled = 0  # of those, finished
+        self.finished_at: Optional[float] = None
+        self.stats: Optional[pstats.Stats] = None  # cprofile: merged so far
+        self.stacks: Counter = Counter()  # sample: collapsed stack -> samples
+        self.samples = 0
+        self.threads: Counter = Counter()  # thread ident -> profiled assessments running on it
+        self.stop = threading.Event()
+        self.sampler: Optional[threading.Thread] = None
+
+    def wants_more(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+        return self.assessments is None or self.claimed < self.assessments
+
+
+class ProfileCapture:
+    """One capture at a time per worker process; thread-safe"""
+
+    def __init__(self, sample_interval: float = 0.005):
+        self.sample_interval = sample_interval
+        self.capturing = False  # the only thing the request path reads while idle
+        self._capture: Optional[_Capture] = None
+        self._lock = threading.Lock()
+
+    def start(self, mode: str = "cprofile", assessments: Optional[int] = None, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Open a capture for `assessments` assessments and/or `seconds` seconds, whichever ends first"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}'")
+        if assessments is None and seconds is None:
+            raise ValueError("Give a number of assessments, a number of seconds, or both")
+        with self._lock:
+            self._expire()
+            if self.capturing:
+                raise ProfilerBusy("A capture is already running")
+            capture = _Capture(mode, assessments, seconds, self.sample_interval)
+            if mode == "sample":
+                capture.sampler = threading.Thread(target=self._sample, args=(capture,), name="profile-sampler", daemon=True)
+                capture.sampler.start()
+            self._capture = capture
+            self.capturing = True
+            return self._status(capture)
+
+    def run(self, fn: Callable, *args):
+        """fn(*args), profiled when an open capture still wants assessments"""
+        capture = self._claim() if self.capturing else None
+        if capture is None:
+            return fn(*args)
+
+        if capture.mode == "sample":
+            ident = threading.get_ident()
+            with self._lock:
+                capture.threads[ident] += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    capture.threads[ident] -= 1
+                    if not capture.threads[ident]:
+                        del capture.threads[ident]
+                    self._finished(capture)
+
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args)
+        finally:
+            profile.create_stats()
+            with self._lock:
+                if capture.stats is None:
+                    capture.stats = pstats.Stats(profile)
+                else:
+                    capture.stats.add(profile)
+                self._finished(capture)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            if self._capture is None:
+                return {"state": "idle"}
+            return self._status(self._capture)
+
+    def result(self) -> Optional[ProfileResult]:
+        """The finished capture's file, or None while capturing or before any capture"""
+        with self._lock:
+            self._expire()
+            capture = self._capture
+            if capture is None or capture.finished_at is None:
+                return None
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(capture.started_at))
+            if capture.mode == "cprofile":
+                stats = capture.stats.stats if capture.stats is not None else {}
+                return ProfileResult(marshal.dumps(stats), "application/octet-stream", f"profile-{stamp}.pstats")
+            lines = [f"{stack} {count}" for stack, count in capture.stacks.most_common()]
+            return ProfileResult("\n".join(lines).encode("utf-8"), "text/plain; charset=utf-8", f"profile-{stamp}.folded")
+
+    def _claim(self) -> Optional[_Capture]:
+        with self._lock:
+            capture = self._capture
+            if not self.capturing or capture is None or not capture.wants_more():
+                self._expire()
+                return None
+            if capture.mode == "cprofile" and capture.claimed > capture.profiled:
+                return None  # another assessment holds the process's only profiler
+            capture.claimed += 1
+            return capture
+
+    def _finished(self, capture: _Capture) -> None:
+        """An admitted assessment is done (lock held)"""
+        capture.profiled += 1
+        self._expire()
+
+    def _expire(self) -> None:
+        """Close the open capture once it wants no more assessments and none is running (lock held)"""
+        capture = self._capture
+        if not self.capturing or capture is None:
+            return
+        if capture.wants_more() or capture.profiled < capture.claimed:
+            return
+        capture.finished_at = time.time()
+        capture.stop.set()
+        self.capturing = False
+
+    def _status(self, capture: _Capture) -> Dict[str, Any]:
+        status = {
+            "state": "done" if capture.finished_at is not None else "capturing",
+            "mode": capture.mode,
+            "assessments": capture.assessments,
+            "seconds": capture.seconds,
+            "profiled": capture.profiled,
+            "running": capture.claimed - capture.profiled,
+            "started_at": capture.started_at,
+            "finished_at": capture.finished_at,
+        }
+        if capture.mode == "sample":
+            status["samples"] = capture.samples
+        return status
+
+    def _sample(self, capture: _Capture) -> None:
+        while not capture.stop.wait(capture.sample_interval):
+            with self._lock:
+                self._expire()  # a time-boxed capture ends even without traffic
+                threads = list(capture.threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            stacks = [_collapse(frames[ident]) for ident in threads if ident in frames]
+            with self._lock:
+                capture.samples += len(stacks)
+                capture.stacks.update(stacks)
+
+
+def _collapse(frame) -> str:
+    """Root-first "func (file:line);..." stack of a frame"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
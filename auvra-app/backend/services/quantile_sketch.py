@@ -0,0 +1,124 @@
+"""
+Streaming Quantile Sketch
+KLL sketch (Karnin, Lang, Liberty): a stack of compactors where level h holds
+items of weight 2^h. A full level is sorted and every other item (random
+offset) is promoted, so memory stays O(k) however many values are added and
+two sketches merge by concatenating their levels. Rank error is about 1.7/k.
+"""
+
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class KLLSketch:
+    """Mergeable approximate rank/quantile summary of a stream of numbers"""
+
+    def __init__(self, k: int = 200, c: float = 2 / 3):
+        self.k = k
+        self.c = c
+        self.n = 0  # values added (total weight of the retained items)
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.levels: List[List[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random = random.Random()
+
+    def _capacity(self, level: int) -> int:
+        # Top level holds k items, each level below c times fewer (at least 2)
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def _grow(self) -> None:
+        self.levels.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.n += 1
+        self._size += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold another sketch into this one (the other is left unchanged)"""
+        if other.n == 0:
+            return
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(items) for items in self.levels)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        # Compact the lowest full level, growing the stack when the top one fills
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self._grow()
+                items.sort()
+                leftover = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._random.getrandbits(1)::2])
+                self.levels[level] = leftover
+                self._size = sum(len(level_items) for level_items in self.levels)
+                if self._size < self._max_size:
+                    return
+
+    def weighted_items(self) -> List[Tuple[float, int]]:
+        """Retained (value, weight) pairs sorted by value; weights sum to n"""
+        return sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.levels)
+            for value in items
+        )
+
+    def rank(self, value: float) -> int:
+        """Estimated number of added values strictly below value"""
+        return sum(
+            len([item for item in items if item < value]) << level
+            for level, items in enumerate(self.levels)
+        )
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimated value below which `fraction` of the added values fall"""
+        if self.n == 0:
+            return None
+        target = fraction * self.n
+        seen = 0
+        for value, weight in self.weighted_items():
+            seen += weight
+            if seen > target:
+                return value
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "min": self.min, "max": self.max, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data["k"])
+        sketch.n = data["n"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.levels = [list(items) for items in data["levels"]]
+        sketch._size = sum(len(items) for items in sketch.levels)
+        sketch._max_size = sum(sketch._capacity(level) for level in range(len(sketch.levels)))
+        return sketch
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], k: int = 200) -> "KLLSketch":
+        sketch = cls(k=k)
+        for value in values:
+            sketch.update(value)
+        return sketch
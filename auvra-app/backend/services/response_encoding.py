@@ -0,0 +1,94 @@
+"""
+Response Encoding
+Serializes assessment replies straight to bytes, byte-for-byte what
+JSONResponse rendered before (json.dumps with compact separators): keys in
+model order, non-ASCII as raw UTF-8, control characters as \\u escapes.
+
+The one difference is floats outside [1e-4, 1e16), which these encoders write
+as 1e16 where json.dumps writes 1e+16. Response floats are cycle statistics
+rounded to 0.1 days, so they never get there.
+
+Clients may ask for MessagePack or CBOR instead (Accept header). The binary
+encodings carry the same data as the JSON (dates as ISO strings), so a
+client decodes the same structure whichever it asks for.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+import cbor2
+import msgpack
+import orjson
+from pydantic import BaseModel
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {
+    JSON_MEDIA_TYPE: orjson.dumps,
+    MSGPACK_MEDIA_TYPE: msgpack.packb,
+    CBOR_MEDIA_TYPE: cbor2.dumps,
+}
+
+# Accept values -> the media type replied with (MessagePack has gone by several names)
+_ACCEPTED = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    CBOR_MEDIA_TYPE: CBOR_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+}
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept: Optional[str]) -> str:
+    """Media type to reply with: the client's highest-q supported type (earliest on a tie).
+    JSON when there is no Accept header or nothing in it is supported, as before."""
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for entry in (accept or "").split(","):
+        media_type, _, params = entry.partition(";")
+        chosen = _ACCEPTED.get(media_type.strip().lower())
+        if chosen is None:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = chosen, q
+    return best
+
+
+def model_json(model: BaseModel) -> bytes:
+    """A response model as JSON, written by pydantic-core from the model itself (no intermediate dict)"""
+    return model.__pydantic_serializer__.to_json(model)
+
+
+def json_bytes(value: Any) -> bytes:
+    """JSON-compatible data (model_dump(mode="json"), jsonable_encoder output) as JSON"""
+    return orjson.dumps(value)
+
+
+def encode(value: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """JSON-compatible data in the negotiated encoding"""
+    return ENCODERS[media_type](value)
+
+
+def encode_model(model: BaseModel, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    if media_type == JSON_MEDIA_TYPE:
+        return model_json(model)
+    return ENCODERS[media_type](model.model_dump(mode="json"))
+
+
+def transcode(body: bytes, media_type: str) -> bytes:
+    """Stored JSON bytes in the negotiated encoding"""
+    if media_type == JSON_MEDIA_TYPE:
+        return body
+    return ENCODERS[media_type](orjson.loads(body))
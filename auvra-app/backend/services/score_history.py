@@ -0,0 +1,92 @@
+"""
+Per-User Score History
+Time buckets, rollup folding and resolution choice shared by the assessment
+store backends. Rollups (week/month) are maintained at write time, so a trend
+query reads one page of rows whatever the length of the history.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+RESOLUTIONS = ("raw", "week", "month")
+ROLLUP_RESOLUTIONS = ("week", "month")
+CURSOR_SEPARATOR = "|"
+
+# hormone -> [sum, min, max] of totals within a bucket
+RollupStats = Dict[str, List[float]]
+
+
+class HistorySummary(NamedTuple):
+    count: int
+    first_at: str
+    last_at: str
+
+
+class HistoryPoint(NamedTuple):
+    at: str  # assessment timestamp (raw) or bucket start (week: Monday's date, month: YYYY-MM)
+    key: str  # keyset cursor for the page that ends here
+    count: int
+    scores: Dict[str, Tuple[float, int, int]]  # hormone -> (mean, min, max)
+    assessment_id: Optional[str] = None
+
+
+def history_bucket(assessed_at: str, resolution: str) -> str:
+    day = date.fromisoformat(assessed_at[:10])
+    if resolution == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return assessed_at[:7]
+
+
+def raw_key(assessed_at: str, assessment_id: str) -> str:
+    return f"{assessed_at}{CURSOR_SEPARATOR}{assessment_id}"
+
+
+def split_raw_key(key: str) -> Tuple[str, str]:
+    assessed_at, separator, assessment_id = key.partition(CURSOR_SEPARATOR)
+    if not separator:
+        raise ValueError(f"Invalid raw history cursor: {key!r}")
+    return assessed_at, assessment_id
+
+
+def fold_scores(count: int, stats: RollupStats, scores: Iterable[Dict[str, int]]) -> Tuple[int, RollupStats]:
+    """Add assessments' hormone totals to a bucket's (count, stats)"""
+    for hormone_scores in scores:
+        count += 1
+        for hormone, total in hormone_scores.items():
+            entry = stats.get(hormone)
+            if entry is None:
+                stats[hormone] = [total, total, total]
+            else:
+                entry[0] += total
+                entry[1] = min(entry[1], total)
+                entry[2] = max(entry[2], total)
+    return count, stats
+
+
+def rollup_point(bucket: str, count: int, stats: RollupStats) -> HistoryPoint:
+    return HistoryPoint(
+        at=bucket,
+        key=bucket,
+        count=count,
+        scores={hormone: (round(s / count, 2), lo, hi) for hormone, (s, lo, hi) in stats.items()}
+    )
+
+
+def raw_point(assessed_at: str, assessment_id: str, scores: Dict[str, int]) -> HistoryPoint:
+    return HistoryPoint(
+        at=assessed_at,
+        key=raw_key(assessed_at, assessment_id),
+        count=1,
+        scores={hormone: (total, total, total) for hormone, total in scores.items()},
+        assessment_id=assessment_id
+    )
+
+
+def choose_resolution(summary: HistorySummary, max_points: int) -> str:
+    """Finest resolution whose whole history fits in max_points (month otherwise)"""
+    if summary.count <= max_points:
+        return "raw"
+    span_days = (date.fromisoformat(summary.last_at[:10]) - date.fromisoformat(summary.first_at[:10])).days
+    if span_days // 7 + 2 <= max_points:
+        return "week"
+    return "month"
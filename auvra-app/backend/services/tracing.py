@@ -0,0 +1,325 @@
+"""
+Request Tracing
+Spans with the OpenTelemetry data model (trace/span ids, parent, kind, status,
+attributes), W3C `traceparent` propagation and an OTLP/JSON lines exporter.
+
+Only sampled requests get spans. Code on the request path asks current_span()
+and does nothing more when it is None, so an unsampled request costs a
+context-variable read per instrumented call.
+"""
+
+import contextvars
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SpanKind:
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class StatusCode:
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def current_span() -> Optional["Span"]:
+    """Innermost active span of this request, or None when it is not traced"""
+    return _current_span.get()
+
+
+def parse_traceparent(header: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, None if malformed"""
+    match = _TRACEPARENT.match(header.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 0x01)
+
+
+def _random_id(bits: int) -> str:
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation; `with span:` makes it the current span until it ends"""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "kind",
+        "start_ns", "end_ns", "attributes", "status", "status_message", "_token"
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = SpanKind.INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = StatusCode.UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._token = None
+
+    def child(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SpanKind.INTERNAL) -> "Span":
+        return Span(self.tracer, name, self.trace_id, self.span_id, kind, attributes)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, code: int, message: str = "") -> None:
+        self.status = code
+        self.status_message = message
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.export(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.attributes["exception.type"] = exc_type.__name__
+            self.set_status(StatusCode.ERROR, str(exc))
+        self.end()
+        _current_span.reset(self._token)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span as an OTLP/JSON Span object"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            encoded.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            encoded.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            encoded.append({"key": key, "value": {"stringValue": str(value)}})
+    return encoded
+
+
+class MemorySpanExporter:
+    """Keeps finished spans in a list (tests, benchmarks)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"exported": len(self.spans)}
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file as OTLP/JSON lines, one ExportTraceServiceRequest
+    per batch (the format of the OpenTelemetry Collector's file exporter/receiver).
+
+    Spans are queued on the request path and written by a background thread every
+    `flush_interval` seconds; past `max_queue` pending spans new ones are dropped.
+    """
+
+    def __init__(self, path: str, service_name: str = "auvra-api", flush_interval: float = 1.0, max_queue: int = 10_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self._queue: List[Span] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._stats = {"exported": 0, "dropped": 0, "batches": 0}
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self._stats["dropped"] += 1
+                return
+            self._queue.append(span)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if not batch:
+            return
+        request = {"resourceSpans": [{
+            "resource": self._resource,
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in batch]}],
+        }]}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"[TRACE][WARN] Could not write {len(batch)} spans to {self.path}: {e}")
+            with self._lock:
+                self._stats["dropped"] += len(batch)
+            return
+        with self._lock:
+            self._stats["exported"] += len(batch)
+            self._stats["batches"] += 1
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "queued": len(self._queue)}
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+
+class Tracer:
+    """Starts request traces. Disabled (no spans at all) without an exporter.
+
+    A request carrying a valid traceparent joins that trace and follows its
+    sampled flag; other requests start a trace with probability `sample_rate`.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._stats = {"sampled": 0, "unsampled": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_trace(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = SpanKind.SERVER
+    ) -> Optional[Span]:
+        """Root span of a request (not yet current), or None when the request is not sampled"""
+        if self.exporter is None:
+            return None
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = None, None, random.random() < self.sample_rate
+        if not sampled:
+            self._stats["unsampled"] += 1
+            return None
+        trace_id = trace_id or _random_id(128)
+        self._stats["sampled"] += 1
+        return Span(self, name, trace_id, parent_id, kind, attributes)
+
+    def export(self, span: Span) -> None:
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export(span)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"enabled": self.enabled, "sample_rate": self.sample_rate, **self._stats}
+        if self.exporter is not None:
+            stats["exporter"] = self.exporter.stats()
+        return stats
+
+
+class TracingMiddleware:
+    """ASGI middleware: a SERVER span per sampled HTTP request, current while the app handles it.
+    Unsampled requests are passed straight through.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+        self._route_paths: Dict[Any, str] = {}  # endpoint -> route template, for span names
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.tracer.exporter is None:
+            return await self.app(scope, receive, send)
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        method = scope["method"]
+        span = self.tracer.start_trace(method, traceparent, {"http.method": method, "http.target": scope["path"]})
+        if span is None:
+            return await self.app(scope, receive, send)
+
+        async def send_traced(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.set_status(StatusCode.ERROR)
+            await send(message)
+
+        with span:
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                # The router has matched by now: name the span after the route template
+                route = self._route_path(scope)
+                if route is not None:
+                    span.name = f"{method} {route}"
+                    span.attributes["http.route"] = route
+
+    def _route_path(self, scope) -> Optional[str]:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return None
+        if endpoint not in self._route_paths:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._route_paths[endpoint] = route.path
+        return self._route_paths.get(endpoint)
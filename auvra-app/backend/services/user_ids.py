@@ -0,0 +1,38 @@
+"""
+Server-Issued User Ids
+A user_id unlocks that user's score history, so clients cannot pick one:
+ids are random and carry an HMAC of their random part. Any worker sharing
+the secret verifies them without a lookup; an id that was never issued
+(guessed, made up, or from a client-chosen scheme) fails verification.
+"""
+
+import hashlib
+import hmac
+import secrets
+from typing import Optional
+
+TOKEN_BYTES = 16  # 128 random bits
+SIGNATURE_CHARS = 32
+
+
+class UserIds:
+    """Issues and verifies user ids of the form <random>.<signature>"""
+
+    def __init__(self, secret: Optional[str] = None):
+        # Without a shared secret, ids are only valid on this worker until it restarts
+        self.ephemeral = not secret
+        self._key = (secret or secrets.token_hex(32)).encode("utf-8")
+
+    def issue(self) -> str:
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        return f"{token}.{self._sign(token)}"
+
+    def verify(self, user_id: Optional[str]) -> bool:
+        """True only for ids issued with this secret"""
+        if not user_id:
+            return False
+        token, _, signature = user_id.rpartition(".")
+        return bool(token) and hmac.compare_digest(signature.encode("utf-8"), self._sign(token).encode("utf-8"))
+
+    def _sign(self, token: str) -> str:
+        return hmac.new(self._key, token.encode("utf-8"), hashlib.sha256).hexdigest()[:SIGNATURE_CHARS]
@@ -0,0 +1,6 @@
+import os
+
+# Set before any test imports app: keep the test run from creating assessments.db
+# in the working directory and from syncing population sketches in the background
+os.environ.setdefault("ASSESSMENT_STORE_URL", "memory://")
+os.environ.setdefault("POPULATION_SYNC_SECONDS", "0")
@@ -0,0 +1,68 @@
+import sys, os
+import contextlib
+import io
+import json
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_service
+from models.schemas import CompleteAssessmentRequest
+from tests.test_assess import valid_payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_scores_are_yielded_before_the_llm_runs(monkeypatch):
+    calls = []
+    process = assessment_service.llm_service.process_both_others_inputs
+
+    def recording(*args, **kwargs):
+        calls.append(kwargs["diagnosed_input"])
+        return process(*args, **kwargs)
+    monkeypatch.setattr(assessment_service.llm_service, "process_both_others_inputs", recording)
+
+    request = CompleteAssessmentRequest(**valid_payload())
+    with contextlib.redirect_stdout(io.StringIO()):
+        stream = assessment_service.stream_assessment(request)
+        event, scores = next(stream)
+        assert event == "scores" and scores["llm_pending"] is True
+        assert calls == []
+        event, result = next(stream)
+        assert event == "result" and calls == ["PCOS"]
+        assert next(stream, None) is None
+    assert result.cycle_context == scores["cycle_context"]
+
+
+@pytest.mark.anyio
+async def test_stream_final_event_matches_assess():
+    payload = valid_payload()
+    payload["diagnosed_conditions"]["others_input"] = None  # deterministic, so both events agree
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        full = (await client.post("/api/v1/assess", json=payload)).json()
+        resp = await client.post("/api/v1/assess/stream", json=payload)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+
+    (first, scores), (last, result) = parse_events(resp.text)
+    assert (first, last) == ("scores", "result")
+    assert scores["llm_pending"] is False
+    assert scores["primary_hormone"] == full["primary_imbalance"]["hormone"]
+    assert scores["secondary_hormones"] == [s["hormone"] for s in full["secondary_imbalances"]]
+    assert scores["all_hormone_scores"] == full["all_hormone_scores"]
+    for response in (result, full):
+        response["assessment_metadata"].pop("user_id")
+        response["assessment_metadata"].pop("assessment_id")
+    assert result == full
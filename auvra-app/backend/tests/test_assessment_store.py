@@ -0,0 +1,192 @@
+import sys, os
+import asyncio
+import contextlib
+import io
+import random
+import sqlite3
+import threading
+import time
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app
+from services.assessment_service import AssessmentService
+from services.assessment_store import (
+    AssessmentBackend, AssessmentStore, MemoryAssessmentBackend, SQLiteAssessmentBackend, create_backend
+)
+from tests.test_assess import valid_payload
+from tests.test_thread_safety import random_request
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def assess(service, count, seed=1):
+    rng = random.Random(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [service.process_complete_assessment(random_request(rng)) for _ in range(count)]
+
+
+class GatedBackend(MemoryAssessmentBackend):
+    """Memory backend whose writes wait until the test opens the gate"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def write_batch(self, rows):
+        self.gate.wait()
+        super().write_batch(rows)
+
+
+def test_writes_are_batched_and_readable_while_pending():
+    backend = GatedBackend()
+    store = AssessmentStore(backend, batch_size=64)
+    service = AssessmentService(gemini_api_key=None, assessment_store=store)
+    responses = assess(service, 40)
+
+    # Nothing is written yet, but every assessment can already be re-opened
+    assert backend.rows == {}
+    first = responses[0].assessment_metadata.assessment_id
+    assert store.get(first).response == responses[0].model_dump(mode="json")
+
+    pending_response = store.get_response(first)
+
+    backend.gate.set()
+    store.flush()
+    assert store.get_response(first) == pending_response  # same bytes and ETag once written
+    assert len(backend.rows) == 40
+    assert backend.batches < 40  # queued records share commits
+    assert store.stats()["written"] == 40 and store.stats()["pending"] == 0
+    assert store.get(first).response == responses[0].model_dump(mode="json")
+    store.close()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    backend = GatedBackend()
+    store = AssessmentStore(backend, max_pending=5, batch_size=1)
+    service = AssessmentService(gemini_api_key=None, assessment_store=store)
+
+    started = time.perf_counter()
+    assess(service, 20)
+    assert time.perf_counter() - started < 5  # the blocked writer never stalls the pipeline
+
+    stats = store.stats()
+    assert stats["dropped"] > 0 and stats["queued"] + stats["dropped"] == 20
+    backend.gate.set()
+    store.close()
+    assert len(backend.rows) == stats["queued"]
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = tmp_path / "assessments.db"
+    store = AssessmentStore(create_backend(f"sqlite:///{path}"))
+    service = AssessmentService(gemini_api_key=None, assessment_store=store)
+    response = assess(service, 1)[0]
+    store.close()
+
+    reopened = SQLiteAssessmentBackend(str(path))
+    stored = reopened.get(response.assessment_metadata.assessment_id)
+    assert stored.response == response.model_dump(mode="json")
+    assert stored.request["basic_info"]["name"] == "Stress"
+    assert reopened.get("missing") is None
+    assert reopened.get_response(response.assessment_metadata.assessment_id).body == \
+        response.model_dump_json().encode()
+    reopened.close()
+
+
+def test_sqlite_reads_do_not_wait_for_a_commit(tmp_path):
+    path = tmp_path / "assessments.db"
+    store = AssessmentStore(create_backend(f"sqlite:///{path}"))
+    service = AssessmentService(gemini_api_key=None, assessment_store=store)
+    assessment_id = assess(service, 1)[0].assessment_metadata.assessment_id
+    store.flush()
+
+    # As if the writer were in the middle of a long batch commit
+    with store.backend._lock:
+        started = time.perf_counter()
+        reader = threading.Thread(target=lambda: store.backend.get_response(assessment_id))
+        reader.start()
+        reader.join(timeout=1)
+        assert not reader.is_alive()
+        assert time.perf_counter() - started < 0.5
+    assert store.backend.get_response(assessment_id) is not None
+    store.close()
+
+
+@pytest.mark.anyio
+async def test_store_reads_run_off_the_event_loop(monkeypatch):
+    import app as app_module
+
+    def slow_get_response(assessment_id):
+        time.sleep(0.3)
+        return None
+
+    monkeypatch.setattr(app_module.assessment_store, "get_response", slow_get_response)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.get("/api/v1/assessments/slow")
+    ticker.cancel()
+    assert resp.status_code == 404
+    assert ticks >= 10
+
+
+def test_backends_must_implement_the_whole_interface():
+    class WriteOnly(AssessmentBackend):
+        def write_batch(self, records):
+            pass
+
+    with pytest.raises(TypeError, match="get_response"):
+        WriteOnly()
+
+
+def test_sqlite_upgrades_databases_without_etags(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE assessments (assessment_id TEXT PRIMARY KEY, user_id TEXT, created_at TEXT NOT NULL, "
+        "request_json TEXT NOT NULL, response_json TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO assessments VALUES ('old', NULL, '2025-01-01', '{}', '{\"a\":1}')")
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteAssessmentBackend(path)
+    stored = backend.get_response("old")
+    assert stored.body == b'{"a":1}' and len(stored.etag) == 32
+    backend.close()
+
+
+@pytest.mark.anyio
+async def test_get_assessment_endpoint():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        created = (await client.post("/api/v1/assess", json=valid_payload())).json()
+        assessment_id = created["assessment_metadata"]["assessment_id"]
+
+        resp = await client.get(f"/api/v1/assessments/{assessment_id}")
+        assert resp.status_code == 200
+        assert resp.json() == created
+        assert resp.headers["content-type"] == "application/json"
+        assert "private" in resp.headers["cache-control"]
+
+        etag = resp.headers["etag"]
+        not_modified = await client.get(f"/api/v1/assessments/{assessment_id}", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304 and not_modified.content == b""
+        changed = await client.get(f"/api/v1/assessments/{assessment_id}", headers={"If-None-Match": '"other"'})
+        assert changed.status_code == 200 and changed.content == resp.content
+
+        missing = await client.get("/api/v1/assessments/does-not-exist")
+        assert missing.status_code == 404
@@ -0,0 +1,63 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.conflict_detector import ConflictDetector, CONFLICT_RULES
+
+
+def item(**overrides):
+    base = {
+        "hormone_scores": {
+            "estrogen": {"high_score": 2, "low_score": 1, "from_symptoms": 4, "from_labs": 0},
+            "cortisol": {"high_score": 0, "low_score": 0, "from_symptoms": 1, "from_labs": 0},
+        },
+        "diagnosed_conditions": ["pcos", "hashimotos", "hypothyroidism"],
+        "symptoms_by_hormone": {"estrogen": 3},
+        "labs_uploaded": True,
+        "labs_concordance": "low",
+        "birth_control": "hormonal_pills",
+    }
+    base.update(overrides)
+    return base
+
+
+def test_batch_matches_single_detection():
+    items = [
+        item(),
+        item(diagnosed_conditions=[], labs_uploaded=False, birth_control="none"),
+        item(symptoms_by_hormone={"androgens": 2, "thyroid": 1}),
+    ]
+    detector = ConflictDetector()
+    batch = detector.detect_conflicts_batch(items)
+    for single_item, conflicts in zip(items, batch):
+        assert detector.detect_all_conflicts(**single_item) == conflicts
+
+    descriptions = [c.description for c in batch[0]]
+    assert len(descriptions) == 5  # estrogen direction, pcos, thyroid (once), estrogen labs, bc masking
+    assert sum("Thyroid condition" in d for d in descriptions) == 1
+    assert batch[1] == [ConflictDetector().detect_all_conflicts(**items[1])[0]]
+
+
+def test_repeated_conditions_report_each_conflict_once():
+    detector = ConflictDetector()
+    once = detector.detect_all_conflicts(**item(symptoms_by_hormone={}))
+    repeated = detector.detect_all_conflicts(**item(
+        symptoms_by_hormone={}, diagnosed_conditions=["pcos", "pcos", "hashimotos", "hashimotos", "hypothyroidism"]
+    ))
+    assert repeated == once
+    assert sum(c.impact_on_confidence for c in repeated) == sum(c.impact_on_confidence for c in once)
+    assert sum("PCOS diagnosed" in c.description for c in repeated) == 1
+
+
+def test_rules_only_evaluated_when_triggered():
+    calls = []
+    rules = CONFLICT_RULES + ({
+        "id": "probe",
+        "triggers": ("condition:pms",),
+        "when": lambda it: calls.append(it) or True,
+        "conflict": {"type": "diagnosis_mismatch", "severity": "low", "description": "probe",
+                     "recommendation": "probe", "impact_on_confidence": 0},
+    },)
+    detector = ConflictDetector(rules)
+    results = detector.detect_conflicts_batch([item(), item(diagnosed_conditions=["pms"])])
+    assert len(calls) == 1
+    assert results[1][-1].description == "probe"
+    assert all(c.description != "probe" for c in results[0])
@@ -0,0 +1,125 @@
+import sys, os
+import json
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, content_store
+from models.schemas import AssessmentResponseRefs
+from services.assessment_store import MemoryAssessmentBackend, SQLiteAssessmentBackend
+from services.content_store import ContentStore
+from services.explanation_generator import explanation_template
+from tests.test_assess import valid_payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def payload():
+    data = valid_payload()
+    data["diagnosed_conditions"]["others_input"] = None  # keep the LLM out of the comparison
+    return data
+
+
+@pytest.mark.anyio
+async def test_refs_mode_round_trips_to_inline_response():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        inline = (await client.post("/api/v1/assess", json=payload())).json()
+        resp = await client.post("/api/v1/assess", params={"content": "refs"}, json=payload())
+        assert resp.status_code == 200, resp.text
+        refs = resp.json()
+        assert len(resp.content) < len(json.dumps(inline))
+        AssessmentResponseRefs.model_validate(refs)  # the shape documented in OpenAPI
+
+        for inline_imbalance, ref_imbalance in zip(
+            [inline["primary_imbalance"]] + inline["secondary_imbalances"],
+            [refs["primary_imbalance"]] + refs["secondary_imbalances"]
+        ):
+            assert "explanation" not in ref_imbalance and "recommendations" not in ref_imbalance
+
+            explanation = await client.get(f"/api/v1/content/{ref_imbalance['explanation_ref']}")
+            assert explanation.status_code == 200
+            assert explanation.headers["content-type"].startswith("text/markdown")
+            # The block is the template; the reply carries this user's factors
+            assert explanation.text.format(**ref_imbalance["explanation_values"]) == inline_imbalance["explanation"]
+            assert explanation.headers["etag"] == f'"{ref_imbalance["explanation_ref"]}"'
+            assert "immutable" in explanation.headers["cache-control"]
+
+            recommendations = await client.get(f"/api/v1/content/{ref_imbalance['recommendations_ref']}")
+            assert recommendations.json() == inline_imbalance["recommendations"]
+
+        # Same content, same hash
+        again = (await client.post("/api/v1/assess", params={"content": "refs"}, json=payload())).json()
+        assert again["primary_imbalance"]["explanation_ref"] == refs["primary_imbalance"]["explanation_ref"]
+
+
+@pytest.mark.anyio
+async def test_blocks_hold_no_user_data():
+    with_labs = payload()
+    with_labs["lab_results"] = {"total_testosterone": 97.3, "fasting_insulin": 23.4}
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        plain = (await client.post("/api/v1/assess", params={"content": "refs"}, json=payload())).json()
+        labs = (await client.post("/api/v1/assess", params={"content": "refs"}, json=with_labs)).json()
+        factors = [f for i in [labs["primary_imbalance"]] + labs["secondary_imbalances"] for f in i["contributing_factors"]]
+        assert any("97.3" in factor for factor in factors)
+
+        for imbalance in [labs["primary_imbalance"]] + labs["secondary_imbalances"]:
+            block = (await client.get(f"/api/v1/content/{imbalance['explanation_ref']}")).text
+            assert not any(factor in block for factor in factors)
+            assert "{factors" in block
+        # The lab value travels in the reply only
+        assert any("97.3" in i["explanation_values"]["factors"] for i in [labs["primary_imbalance"]] + labs["secondary_imbalances"])
+        assert labs["primary_imbalance"]["explanation_ref"] == plain["primary_imbalance"]["explanation_ref"]
+
+
+@pytest.mark.anyio
+async def test_content_conditional_get_and_unknown_hash():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        refs = (await client.post("/api/v1/assess", params={"content": "refs"}, json=payload())).json()
+        url = f"/api/v1/content/{refs['primary_imbalance']['explanation_ref']}"
+        etag = (await client.get(url)).headers["etag"]
+
+        not_modified = await client.get(url, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        missing = await client.get("/api/v1/content/" + "0" * 32)
+        assert missing.status_code == 404
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryAssessmentBackend(),
+    lambda tmp_path: SQLiteAssessmentBackend(str(tmp_path / "content.db")),
+])
+def test_hashes_resolve_on_every_worker_sharing_the_backend(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    issuing, other = ContentStore(max_blocks=2, backend=backend), ContentStore(max_blocks=2, backend=backend)
+    hormones = ["androgens", "thyroid", "insulin"]
+    imbalances = [
+        {"hormone": hormone, "direction": "high", "contributing_factors": ["Acne"],
+         "explanation": "rendered", "recommendations": {"diet": [f"item {i}"]}}
+        for i, hormone in enumerate(hormones)
+    ]
+    issuing.externalize({"primary_imbalance": imbalances[0], "secondary_imbalances": imbalances[1:]})
+
+    for i, imbalance in enumerate(imbalances):
+        assert other.get(imbalance["explanation_ref"]).body == explanation_template(hormones[i], "high").encode()
+        # Also past the issuing worker's own (bounded) cache
+        assert json.loads(issuing.get(imbalance["recommendations_ref"]).body) == {"diet": [f"item {i}"]}
+    assert other.get("0" * 32) is None and ContentStore().get(imbalances[0]["explanation_ref"]) is None
+
+
+@pytest.mark.anyio
+async def test_content_is_served_from_the_shared_store(monkeypatch):
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        refs = (await client.post("/api/v1/assess", params={"content": "refs"}, json=payload())).json()
+        # As if another worker (empty cache) received the fetch
+        monkeypatch.setattr(content_store, "_blocks", type(content_store._blocks)())
+        block = await client.get(f"/api/v1/content/{refs['primary_imbalance']['explanation_ref']}")
+        assert block.status_code == 200 and block.headers["content-type"].startswith("text/markdown")
@@ -0,0 +1,120 @@
+import sys, os
+import contextlib
+import io
+from datetime import date, timedelta
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_service
+from models.schemas import CompleteAssessmentRequest
+from services.hormone_scorer import HormoneScorer, ScoringState
+from services.cycle_calculator import CycleCalculator
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def payload():
+    return {
+        "basic_info": {"name": "Asha", "age": 29},
+        "period_pattern": {"period_pattern": "irregular", "birth_control": "none"},
+        "cycle_details": {"last_period_date": "2025-10-01", "date_not_sure": False, "cycle_length": "35+"},
+        "health_concerns": {
+            "period_concerns": ["irregular_periods"],
+            "body_concerns": ["weight_difficulty", "bloating"],
+            "skin_hair_concerns": ["adult_acne"],
+            "mental_health_concerns": ["fatigue"],
+        },
+        "top_concern": {"top_concern": "weight_difficulty"},
+        "diagnosed_conditions": {"conditions": ["hypothyroidism"]},
+        "lab_results": {"tsh": 3.1, "fasting_insulin": 9.0},
+    }
+
+def brute_force_primary(request: CompleteAssessmentRequest):
+    """Re-run the deterministic scoring steps the way process_complete_assessment does"""
+    scorer = HormoneScorer()
+    state = ScoringState()
+    scorer.score_period_pattern(state, request.period_pattern.period_pattern)
+    scorer.apply_birth_control_modifier(state, request.period_pattern.birth_control)
+    scorer.score_cycle_length(state, request.cycle_details.cycle_length)
+    context = CycleCalculator().calculate_cycle_context(
+        request.cycle_details.last_period_date,
+        request.cycle_details.cycle_length,
+        request.cycle_details.date_not_sure
+    )
+    scorer.score_health_concerns(state, request.health_concerns, context.current_phase)
+    scorer.apply_top_concern_multiplier(state, request.top_concern.top_concern, request.health_concerns)
+    scorer.score_diagnosed_conditions(state, request.diagnosed_conditions.conditions)
+    if request.lab_results:
+        scorer.score_lab_results(state, request.lab_results)
+    scorer.calculate_final_scores(state)
+    return scorer.get_primary_secondary_imbalances(state)
+
+
+def test_baseline_matches_assess_for_lab_requests():
+    for days_ago in (1, 8, 20, 25):  # menstrual, follicular, luteal, late luteal
+        data = payload()
+        data["period_pattern"] = {"period_pattern": "regular", "birth_control": "none"}
+        data["cycle_details"] = {"last_period_date": str(date.today() - timedelta(days=days_ago)),
+                                 "date_not_sure": False, "cycle_length": "26-30"}
+        data["health_concerns"] = {"period_concerns": [], "body_concerns": ["bloating"],
+                                   "skin_hair_concerns": [], "mental_health_concerns": ["mood_swings"]}
+        data["top_concern"] = {"top_concern": "none"}
+        data["diagnosed_conditions"] = {"conditions": []}
+        data["lab_results"] = {"progesterone": 0.8, "estradiol": 40}
+        request = CompleteAssessmentRequest(**data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assessed = assessment_service.process_complete_assessment(request)
+            baseline = assessment_service.analyze_counterfactuals(request).baseline
+        assert baseline.primary_hormone == assessed.primary_imbalance.hormone
+        assert baseline.primary_direction == assessed.primary_imbalance.direction
+        assert baseline.secondary_hormones == [imbalance.hormone for imbalance in assessed.secondary_imbalances]
+        assert baseline.confidence_level == assessed.confidence.level
+
+
+def test_counterfactuals_match_full_rescoring():
+    request = CompleteAssessmentRequest(**payload())
+    result = assessment_service.analyze_counterfactuals(request)
+
+    assert (result.baseline.primary_hormone, result.baseline.secondary_hormones) == brute_force_primary(request)
+    assert result.perturbations_evaluated > 40
+
+    for change in result.changes:
+        data = payload()
+        if change.question in ("period_pattern", "birth_control"):
+            data["period_pattern"][change.question] = change.new_value
+        elif change.question == "cycle_length":
+            data["cycle_details"]["cycle_length"] = change.new_value
+        elif change.question == "date_not_sure":
+            data["cycle_details"]["date_not_sure"] = change.new_value == "True"
+        elif change.question == "top_concern":
+            data["top_concern"]["top_concern"] = change.new_value
+        else:
+            section = data["diagnosed_conditions"] if change.question == "conditions" else data["health_concerns"]
+            values = section[change.question]
+            if change.action == "add":
+                values.append(change.new_value)
+            else:
+                values.remove(change.original_value)
+        primary, secondary = brute_force_primary(CompleteAssessmentRequest(**data))
+        assert change.outcome.primary_hormone == primary
+        assert change.outcome.secondary_hormones == secondary
+
+
+@pytest.mark.anyio
+async def test_counterfactual_endpoint_200():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.post("/api/v1/assess/counterfactuals", json=payload())
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        assert data["baseline"]["primary_hormone"]
+        assert any(c["flips_primary"] for c in data["changes"])
+
+        bad_units = payload()
+        bad_units["lab_results"] = {"progesterone": 0.8, "units": {"progesterone": "furlongs"}}
+        for path in ("/api/v1/assess", "/api/v1/assess/counterfactuals"):
+            resp = await client.post(path, json=bad_units)
+            assert resp.status_code == 400 and resp.json()["detail"]["error"] == "Invalid lab units"
@@ -0,0 +1,68 @@
+import sys, os
+from datetime import date, timedelta
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_service
+from services.cycle_calculator import CycleCalculator, CycleStatistics
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_forecast_phases_projects_cycles():
+    calculator = CycleCalculator()
+    phases, next_periods = calculator.forecast_phases(
+        [date(2025, 10, 1), date(2025, 10, 20), None],
+        [28, "31-35", 28],
+        date(2025, 10, 10),
+        40
+    )
+    assert phases[0][0] == "follicular"          # cycle day 10
+    assert phases[0][19] == "menstrual"          # Oct 29, 28 days after Oct 1
+    assert next_periods[0] == date(2025, 10, 29)
+    assert phases[1][:10] == [None] * 10         # before the last period
+    assert phases[1][10] == "menstrual"
+    assert next_periods[1] == date(2025, 10, 20)
+    assert phases[2] == [None] * 40 and next_periods[2] is None
+
+
+@pytest.mark.anyio
+async def test_cycle_calendar_endpoint():
+    transport = ASGITransport(app=app)
+    params = {"last_period_date": "2025-10-01", "cycle_length": "26-30", "start_date": "2025-10-01", "days": 60}
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.get("/api/v1/cycle/calendar", params=params)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        assert len(data["days"]) == 60
+        assert data["days"][0] == {"date": "2025-10-01", "phase": "menstrual", "cycle_day": 1}
+        assert data["days"][28]["cycle_day"] == 1
+        assert data["next_period_date"] == "2025-10-01"
+
+        bad = await client.get("/api/v1/cycle/calendar", params={**params, "cycle_length": "not_sure"})
+        assert bad.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_calendar_agrees_with_assess_for_a_period_history():
+    last = date.today() - timedelta(days=17)  # cycle day 18
+    statistics = CycleStatistics.from_dates([last - timedelta(days=35 * i) for i in range(4)])
+    context = assessment_service.cycle_calculator.calculate_cycle_context(last, "35+", False, statistics)
+    assert context.current_phase == "follicular"  # ovulation ~day 21 of a 35-day cycle
+
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for extra in ({}, {"luteal_length": context.luteal_length_estimate}):
+            params = {"last_period_date": str(last), "cycle_length": "35", "days": 1, **extra}
+            today = (await client.get("/api/v1/cycle/calendar", params=params)).json()["days"][0]
+            assert (today["cycle_day"], today["phase"]) == (18, context.current_phase)
+
+        # A shorter luteal phase moves ovulation later
+        params = {"last_period_date": str(last), "cycle_length": "28", "days": 1}
+        assert (await client.get("/api/v1/cycle/calendar", params=params)).json()["days"][0]["phase"] == "luteal"
+        shorter = {**params, "luteal_length": 10}
+        assert (await client.get("/api/v1/cycle/calendar", params=shorter)).json()["days"][0]["phase"] == "follicular"
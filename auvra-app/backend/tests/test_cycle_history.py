@@ -0,0 +1,169 @@
+import sys, os
+import contextlib
+import io
+import statistics as stats
+from datetime import date, timedelta
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_service
+from models.schemas import CompleteAssessmentRequest
+from services.assessment_service import AssessmentService
+from services.assessment_store import AssessmentStore, MemoryAssessmentBackend, SQLiteAssessmentBackend
+from services.cycle_calculator import CycleCalculator, CycleStatistics, CycleHistoryStore
+from tests.test_content_refs import payload
+
+LENGTHS = [27, 29, 31, 28, 120, 30]  # 120 is a logging gap and must not count as a cycle
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def period_dates(start=date(2024, 1, 3)):
+    dates = [start]
+    for length in LENGTHS:
+        dates.append(dates[-1] + timedelta(days=length))
+    return dates
+
+
+def test_running_statistics_match_batch_computation():
+    cycle_stats = CycleStatistics.from_dates(reversed(period_dates()))
+    valid = [length for length in LENGTHS if length <= CycleStatistics.MAX_CYCLE_DAYS]
+    assert cycle_stats.count == len(valid)
+    assert abs(cycle_stats.mean - stats.mean(valid)) < 1e-9
+    assert abs(cycle_stats.variance - stats.variance(valid)) < 1e-9
+    assert cycle_stats.last_period == period_dates()[-1]
+    assert cycle_stats.luteal_estimate == 14
+
+
+def test_store_folds_only_new_dates():
+    store = CycleHistoryStore(max_users=2)
+    dates = period_dates()
+    store.record("u1", dates[:4])
+    incremental = store.record("u1", dates)  # full history resubmitted
+    batch = CycleStatistics.from_dates(dates)
+    assert (incremental.count, incremental.mean, incremental.variance) == (batch.count, batch.mean, batch.variance)
+
+    store.record("u2", dates[:2])
+    store.record("u3", dates[:2])
+    assert store.record("u1", []).count == 0  # evicted as least recently used
+
+    assert store.peek("u3", dates).count == batch.count
+    assert store.peek("u3", []).count == 1  # peek stores nothing
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryAssessmentBackend(),
+    lambda tmp_path: SQLiteAssessmentBackend(str(tmp_path / "cycles.db")),
+])
+def test_statistics_are_shared_through_the_backend(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    store = AssessmentStore(backend)
+    first, other = AssessmentService(assessment_store=store), AssessmentService(assessment_store=store)
+    other.cycle_history_store.cache_ttl = 0  # as if its cached entry had expired
+    dates = period_dates()
+    request = CompleteAssessmentRequest(**{
+        **payload(),
+        "user_id": "u1",
+        "cycle_details": {**payload()["cycle_details"], "last_period_date": str(dates[-1]),
+                          "period_history": [str(d) for d in dates[:-1]]}
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        first.process_complete_assessment(request)
+    store.flush()
+
+    batch = CycleStatistics.from_dates(dates)
+    stored = backend.get_cycle_statistics("u1")
+    assert stored.state() == batch.state()
+    # Another worker (or this one after a restart) sees the same statistics
+    later = request.model_copy(update={"cycle_details": request.cycle_details.model_copy(
+        update={"period_history": [], "last_period_date": None})})
+    assert other._cycle_statistics(later).state() == batch.state()
+    assert CycleHistoryStore(backend=backend).peek("u1", []).state() == batch.state()
+    assert backend.get_cycle_statistics("someone-else") is None
+    store.close()
+
+
+def test_cycle_context_uses_history():
+    last = date.today() - timedelta(days=20)
+    history = [last - timedelta(days=34 * i) for i in range(1, 4)]
+    context = CycleCalculator().calculate_cycle_context(
+        last, "26-30", False, CycleStatistics.from_dates(history + [last])
+    )
+    assert context.cycles_observed == 3
+    assert context.cycle_length_mean == 34.0
+    assert context.phase_confidence == "high"
+    assert context.current_phase == "follicular"  # ovulation ~day 20 in a 34-day cycle
+    assert context.estimated_next_period == last + timedelta(days=34)
+
+
+@pytest.mark.anyio
+async def test_stored_cycle_history_is_scoped_to_issued_user_ids():
+    first, later = payload(), payload()
+    last = date.fromisoformat(first["cycle_details"]["last_period_date"])
+    first["cycle_details"]["period_history"] = [str(last - timedelta(days=28 * i)) for i in range(1, 4)]
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        user_id = (await client.post("/api/v1/users")).json()["user_id"]
+        recorded = (await client.post("/api/v1/assess", json={**first, "user_id": user_id})).json()
+        assert recorded["cycle_context"]["cycles_observed"] == 3
+
+        # Kept between the user's assessments...
+        again = (await client.post("/api/v1/assess", json={**later, "user_id": user_id})).json()
+        assert again["cycle_context"]["cycles_observed"] == 3
+        # ...and neither readable nor extendable under an id the server did not issue
+        token, _, _ = user_id.rpartition(".")
+        for forged in (token, f"{token}.{'0' * 32}", "user-1"):
+            resp = await client.post("/api/v1/assess", json={**later, "user_id": forged})
+            assert resp.status_code == 403
+        anonymous = (await client.post("/api/v1/assess", json=later)).json()
+        assert not anonymous["cycle_context"]["cycles_observed"]
+
+
+@pytest.mark.anyio
+async def test_only_complete_assessments_extend_the_history():
+    with_history = payload()
+    last = date.fromisoformat(with_history["cycle_details"]["last_period_date"])
+    with_history["cycle_details"]["period_history"] = [str(last - timedelta(days=28 * i)) for i in range(1, 4)]
+    bad_units = {**with_history, "lab_results": {"progesterone": 0.8, "units": {"progesterone": "furlongs"}}}
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        user_id = (await client.post("/api/v1/users")).json()["user_id"]
+        failed = await client.post("/api/v1/assess", json={**bad_units, "user_id": user_id})
+        assert failed.status_code == 400
+        partial = await client.post("/api/v1/assess", params={"detail": "scores"}, json={**with_history, "user_id": user_id})
+        assert partial.json()["cycle_context"]["cycles_observed"] == 3  # computed for the reply...
+        assert assessment_service.cycle_history_store.peek(user_id, []).last_period is None  # ...not stored
+
+        await client.post("/api/v1/assess", json={**with_history, "user_id": user_id})
+        later = (await client.post("/api/v1/assess", json={**payload(), "user_id": user_id})).json()
+        assert later["cycle_context"]["cycles_observed"] == 3
+
+
+@pytest.mark.anyio
+async def test_counterfactuals_explain_the_stored_cycle_statistics():
+    first, later = payload(), payload()
+    last = date.fromisoformat(first["cycle_details"]["last_period_date"])
+    first["cycle_details"]["period_history"] = [str(last - timedelta(days=28 * i)) for i in range(1, 4)]
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        user_id = (await client.post("/api/v1/users")).json()["user_id"]
+        await client.post("/api/v1/assess", json={**first, "user_id": user_id})
+        explained = (await client.post("/api/v1/assess/counterfactuals", json={**later, "user_id": user_id})).json()
+        assessed = (await client.post("/api/v1/assess", json={**later, "user_id": user_id})).json()
+        assert assessed["cycle_context"]["cycles_observed"] == 3  # from the stored history
+        baseline = explained["baseline"]
+        assert (baseline["primary_hormone"], baseline["primary_direction"]) == \
+            (assessed["primary_imbalance"]["hormone"], assessed["primary_imbalance"]["direction"])
+        assert baseline["secondary_hormones"] == [i["hormone"] for i in assessed["secondary_imbalances"]]
+        assert (baseline["confidence_level"], baseline["confidence_score"]) == \
+            (assessed["confidence"]["level"], assessed["confidence"]["score"])
+        # The analyzer read the stored statistics without recording its request's dates
+        request = CompleteAssessmentRequest(**{**later, "user_id": user_id})
+        assert assessment_service._cycle_statistics(request).count == 3
+
+        forged = await client.post("/api/v1/assess/counterfactuals", json={**later, "user_id": "user-1"})
+        assert forged.status_code == 403
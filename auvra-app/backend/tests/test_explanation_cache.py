@@ -0,0 +1,33 @@
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.explanation_generator import ExplanationGenerator, RECOMMENDATION_SETS
+
+
+def test_render_is_cached_on_top_factors():
+    generator = ExplanationGenerator(cache_size=2)
+    factors = [f"factor {i}" for i in range(7)]
+
+    first = generator.render("androgens", "high", factors, False)
+    # Factors beyond the top five only contribute their count
+    second = generator.render("androgens", "high", factors[:5] + ["other a", "other b"], False)
+    assert first is second
+    assert "- ...and 2 additional indicators" in first[0]
+    assert generator.cache_stats()["hits"] == 1
+
+    # Single-direction hormones share one entry for both directions
+    generator.render("thyroid", "low", factors, True)
+    generator.render("thyroid", "high", factors, True)
+    stats = generator.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+
+def test_recommendation_sets_are_shared_and_read_only():
+    generator = ExplanationGenerator()
+    without_labs = generator.get_recommendations("androgens", "high", has_labs=False)
+    with_labs = generator.get_recommendations("androgens", "high", has_labs=True)
+    assert without_labs is RECOMMENDATION_SETS[("androgens", "high", False)]
+    assert len(without_labs["testing"]) == len(with_labs["testing"]) + 2
+    with pytest.raises(TypeError):
+        without_labs["testing"] = ()
+    assert generator.get_recommendations("unknown", "high")["testing"] == ()
@@ -0,0 +1,154 @@
+import sys, os
+import asyncio
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app
+from services.idempotency import IdempotencyConflict, IdempotencyStore, StoredReply
+from tests.test_content_refs import payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def reply(text):
+    return StoredReply(200, text.encode(), "application/json")
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_wait_for_one_computation():
+    store = IdempotencyStore()
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await release.wait()
+        return reply('{"n":1}')
+
+    tasks = [asyncio.create_task(store.run("key", "fp", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True, True, True, True]
+    assert {result for result, _ in results} == {reply('{"n":1}')}
+    assert store.stats()["waited"] == 4
+
+    # Later duplicates replay; another request under the same key is refused
+    assert await store.run("key", "fp", compute) == (reply('{"n":1}'), True)
+    with pytest.raises(IdempotencyConflict):
+        await store.run("key", "other", compute)
+
+
+@pytest.mark.anyio
+async def test_failures_are_not_stored_and_entries_expire_and_evict():
+    store = IdempotencyStore(ttl=0.05, max_entries=2)
+
+    async def fail():
+        raise RuntimeError("gemini timeout")
+
+    async def succeed():
+        return reply("{}")
+
+    with pytest.raises(RuntimeError):
+        await store.run("retry", "fp", fail)
+    assert await store.run("retry", "fp", succeed) == (reply("{}"), False)
+
+    await store.run("b", "fp", succeed)
+    await store.run("c", "fp", succeed)  # evicts "retry"
+    assert store.stats()["evicted"] == 1
+    assert (await store.run("retry", "fp", succeed))[1] is False
+
+    await asyncio.sleep(0.06)
+    assert (await store.run("c", "fp", succeed))[1] is False  # expired
+    assert store.stats()["entries"] == 1
+
+
+@pytest.mark.anyio
+async def test_duplicates_take_over_when_the_first_request_is_cancelled():
+    store = IdempotencyStore()
+    started, release = asyncio.Event(), asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        started.set()
+        await release.wait()
+        return reply(f'{{"n":{len(calls)}}}')
+
+    first = asyncio.create_task(store.run("key", "fp", compute))
+    await started.wait()
+    duplicates = [asyncio.create_task(store.run("key", "fp", compute)) for _ in range(3)]
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*duplicates)
+
+    assert first.cancelled()
+    assert len(calls) == 2  # one duplicate ran it again, the others waited for that run
+    assert [replayed for _, replayed in results] == [False, True, True]
+    assert {result for result, _ in results} == {reply('{"n":2}')}
+    assert store.stats()["taken_over"] == 3
+    assert await store.run("key", "fp", compute) == (reply('{"n":2}'), True)
+
+
+@pytest.mark.anyio
+async def test_assess_keys_are_scoped_per_client():
+    headers = {"Idempotency-Key": "scope-test-1"}
+    replies = []
+    for host in ("10.0.0.1", "10.0.0.2"):
+        transport = ASGITransport(app=app, client=(host, 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            replies.append(await client.post("/api/v1/assess", json=payload(), headers=headers))
+    assert [resp.status_code for resp in replies] == [200, 200]
+    assert all("idempotent-replayed" not in resp.headers for resp in replies)
+    assert replies[0].json()["assessment_metadata"]["assessment_id"] != \
+        replies[1].json()["assessment_metadata"]["assessment_id"]
+
+    # Issued user ids get their own key space, whatever address they come from
+    transport = ASGITransport(app=app, client=("10.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for _ in range(2):
+            user = payload()
+            user["user_id"] = (await client.post("/api/v1/users")).json()["user_id"]
+            resp = await client.post("/api/v1/assess", json=user, headers=headers)
+            assert resp.status_code == 200 and "idempotent-replayed" not in resp.headers
+
+
+@pytest.mark.anyio
+async def test_assess_replays_by_idempotency_key():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        headers = {"Idempotency-Key": "retry-test-1"}
+        concurrent = await asyncio.gather(*[
+            client.post("/api/v1/assess", json=payload(), headers=headers) for _ in range(3)
+        ])
+        assert all(resp.status_code == 200 for resp in concurrent)
+        assert len({resp.content for resp in concurrent}) == 1
+        assert sum("idempotent-replayed" not in resp.headers for resp in concurrent) == 1
+
+        retry = await client.post("/api/v1/assess", json=payload(), headers=headers)
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert retry.content == concurrent[0].content
+
+        fresh = await client.post("/api/v1/assess", json=payload())
+        assert fresh.json()["assessment_metadata"]["assessment_id"] != \
+            retry.json()["assessment_metadata"]["assessment_id"]
+
+        changed = payload()
+        changed["basic_info"]["age"] += 1
+        conflict = await client.post("/api/v1/assess", json=changed, headers=headers)
+        assert conflict.status_code == 422
+        assert conflict.json()["detail"]["idempotency_key"] == "retry-test-1"
+
+        scores_only = await client.post("/api/v1/assess", params={"detail": "scores"}, json=payload(), headers=headers)
+        assert scores_only.status_code == 422  # the query is part of the request too
+
+        too_long = await client.post("/api/v1/assess", json=payload(), headers={"Idempotency-Key": "k" * 300})
+        assert too_long.status_code == 400
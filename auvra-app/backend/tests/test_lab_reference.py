@@ -0,0 +1,75 @@
+import sys, os
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app
+from models.schemas import LabResultsRequest
+from services.lab_reference import lab_reference_engine, LabUnitError
+from tests.test_assess import valid_payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+CONVENTIONAL = {"total_testosterone": 75, "tsh": 3.2, "fasting_glucose": 110, "estradiol": 25, "am_cortisol": 4.5}
+SI = {"total_testosterone": 2.6, "tsh": 3.2, "fasting_glucose": 6.1, "estradiol": 92, "am_cortisol": 124, "unit_system": "si"}
+
+
+def test_si_panel_scores_like_conventional():
+    conventional = lab_reference_engine.evaluate_panel(LabResultsRequest(**CONVENTIONAL))
+    si = lab_reference_engine.evaluate_panel(LabResultsRequest(**SI))
+    assert lab_reference_engine.summarize(si) == lab_reference_engine.summarize(conventional)
+    assert [f[0] for f in si] == [f[0] for f in conventional]
+
+
+def test_unit_overrides_and_unknown_units():
+    labs = LabResultsRequest(estradiol=92, units={"estradiol": "pmol/l"})
+    assert lab_reference_engine.evaluate_panel(labs)[0][5] == "Estradiol low (25.06 pg/mL)"
+    with pytest.raises(LabUnitError):
+        lab_reference_engine.evaluate_panel(LabResultsRequest(tsh=3.0, units={"tsh": "furlongs"}))
+    with pytest.raises(LabUnitError, match="estradoil"):
+        lab_reference_engine.evaluate_panel(LabResultsRequest(estradiol=92, units={"estradoil": "pmol/L"}))
+
+
+def test_phase_specific_ranges():
+    labs = LabResultsRequest(progesterone=0.8, estradiol=180)
+    assert {f[0] for f in lab_reference_engine.evaluate_panel(labs)} == {"estradiol", "progesterone"}
+    assert lab_reference_engine.evaluate_panel(labs, "follicular") == []
+    # A normal early-follicular estradiol is not flagged in any phase but the luteal one
+    normal = LabResultsRequest(estradiol=60)
+    assert lab_reference_engine.evaluate_panel(normal) == lab_reference_engine.evaluate_panel(normal, "follicular") == []
+    assert [f[5] for f in lab_reference_engine.evaluate_panel(normal, "luteal")] == []
+    assert [f[5] for f in lab_reference_engine.evaluate_panel(LabResultsRequest(estradiol=40), "luteal")] == [
+        "Estradiol low (40.0 pg/mL)"
+    ]
+
+
+@pytest.mark.anyio
+async def test_lab_batch_endpoint():
+    transport = ASGITransport(app=app)
+    body = {"panels": [CONVENTIONAL, SI, {"tsh": 1.2}], "cycle_phases": [None, None, "luteal"]}
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.post("/api/v1/labs/evaluate", json=body)
+        assert resp.status_code == 200, resp.text
+        evaluations = resp.json()["evaluations"]
+        assert evaluations[0]["from_labs"] == evaluations[1]["from_labs"]
+        assert evaluations[2] == {"from_labs": {}, "findings": []}
+
+        bad = await client.post("/api/v1/labs/evaluate", json={"panels": [{"tsh": 3, "units": {"tsh": "furlongs"}}]})
+        assert bad.status_code == 400
+        misspelt = await client.post("/api/v1/labs/evaluate", json={"panels": [{"estradiol": 92, "units": {"estradoil": "pmol/L"}}]})
+        assert misspelt.status_code == 400 and "estradoil" in misspelt.text
+
+
+@pytest.mark.anyio
+async def test_assess_scores_labs_against_default_ranges():
+    # 40 pg/mL is only low against the luteal range; /assess does not apply phase ranges
+    data = valid_payload()
+    data["lab_results"] = {"estradiol": 40}
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.post("/api/v1/assess", json=data)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["all_hormone_scores"]["estrogen"]["breakdown"]["from_labs"] == 0
@@ -0,0 +1,42 @@
+import sys, os
+import random
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services import memory_profile
+from services.assessment_pipeline import plan_stages
+from services.assessment_service import RESPONSE_FIELDS, AssessmentService
+from services.memory_profile import MemoryDelta, StageMemoryStats
+from tests.test_thread_safety import random_request
+
+
+def test_stage_memory_stats_aggregate():
+    stats = StageMemoryStats()
+    stats.record("imbalances", MemoryDelta(allocated=2048, peak=4096, blocks=10))
+    stats.record("imbalances", MemoryDelta(allocated=0, peak=8192, blocks=-4))
+    assert stats.snapshot() == {"imbalances": {
+        "calls": 2, "mean_allocated_kib": 1.0, "mean_peak_kib": 6.0, "max_peak_kib": 8.0, "mean_blocks": 3.0
+    }}
+
+
+def test_memory_profiling_records_every_stage_that_ran():
+    service = AssessmentService(gemini_api_key=None)
+    request = random_request(random.Random(3))
+    was_tracing = tracemalloc.is_tracing()
+    try:
+        memory = service.enable_memory_profiling()
+        assert tracemalloc.is_tracing()
+        service.process_complete_assessment(request)
+
+        mark = memory_profile.begin()
+        kept = [bytes(64 * 1024)]
+        measured = memory_profile.delta(mark)
+        assert measured.allocated >= 64 * 1024 and measured.peak >= measured.allocated
+        del kept
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    snapshot = memory.snapshot()
+    assert set(snapshot) == {stage.name for stage in plan_stages(service.stages, RESPONSE_FIELDS)}
+    assert all(row["calls"] == 1 and row["mean_peak_kib"] >= 0 for row in snapshot.values())
+    assert snapshot["hormone_scores"]["mean_allocated_kib"] > 0  # the HormoneScore models it returns
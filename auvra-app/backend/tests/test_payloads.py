@@ -0,0 +1,53 @@
+import sys, os
+import httpx
+from datetime import date
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app
+from benchmarks.load_test import percentile, run_load
+from benchmarks.payloads import CONCERNS, CONDITIONS, PayloadGenerator
+from models.schemas import CompleteAssessmentRequest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_payloads_are_valid_reproducible_and_varied():
+    today = date(2025, 6, 1)
+    payloads = PayloadGenerator(seed=3, today=today, returning_users=20).payloads(1_000)
+    assert PayloadGenerator(seed=3, today=today, returning_users=20).payloads(1_000) == payloads
+    assert PayloadGenerator(seed=4, today=today).payloads(10) != payloads[:10]
+
+    requests = [CompleteAssessmentRequest(**payload) for payload in payloads]
+    seen = {concern for r in requests for category in CONCERNS for concern in getattr(r.health_concerns, category)}
+    assert seen == {concern for values in CONCERNS.values() for concern in values}
+    assert {c for r in requests for c in r.diagnosed_conditions.conditions} == set(CONDITIONS)
+    with_labs = sum(r.lab_results is not None for r in requests)
+    with_text = sum(bool(r.diagnosed_conditions.others_input or r.health_concerns.others) for r in requests)
+    assert 200 < with_labs < 400 and 100 < with_text < 300
+    assert any(r.cycle_details.period_history for r in requests)
+    assert len({r.user_id for r in requests if r.user_id}) <= 20
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 1.0) == 100
+    assert percentile([7.0], 0.95) == 7
+
+
+@pytest.mark.anyio
+async def test_load_harness_in_process():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        report = await run_load(
+            client, "/api/v1/assess", {"detail": "scores"}, PayloadGenerator(seed=1, free_text_rate=0),
+            concurrency=4, requests=20, duration=None
+        )
+    assert report["requests"] == 20 and report["errors"] == 0
+    latency = report["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
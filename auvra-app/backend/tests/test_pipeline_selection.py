@@ -0,0 +1,73 @@
+import sys, os
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_service
+from services.assessment_pipeline import PipelineError, plan_stages
+from tests.test_assess import valid_payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def payload():
+    data = valid_payload()
+    data["diagnosed_conditions"]["others_input"] = None  # keep the LLM out of the comparison
+    return data
+
+
+def test_score_outputs_skip_presentation_stages():
+    planned = [s.name for s in plan_stages(assessment_service.stages, ("primary_hormone", "confidence"))]
+    assert "final_scores" in planned and "confidence" in planned
+    for skipped in ("imbalances", "clinical_flags", "next_steps", "hormone_scores", "user_profile"):
+        assert skipped not in planned
+
+    with pytest.raises(PipelineError):
+        plan_stages(assessment_service.stages, ("not_a_field",))
+
+
+@pytest.mark.anyio
+async def test_field_selection_matches_full_response():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        full = (await client.post("/api/v1/assess", json=payload())).json()
+
+        resp = await client.post(
+            "/api/v1/assess", params={"fields": "all_hormone_scores,confidence,primary_hormone"}, json=payload()
+        )
+        assert resp.status_code == 200, resp.text
+        partial = resp.json()
+        assert list(partial) == ["all_hormone_scores", "confidence", "primary_hormone"]
+        assert partial["all_hormone_scores"] == full["all_hormone_scores"]
+        assert partial["confidence"] == full["confidence"]
+        assert partial["primary_hormone"] == full["primary_imbalance"]["hormone"]
+
+        scores = (await client.post("/api/v1/assess", params={"detail": "scores"}, json=payload())).json()
+        assert "primary_imbalance" not in scores and "next_steps" not in scores
+        assert scores["secondary_hormones"] == [s["hormone"] for s in full["secondary_imbalances"]]
+
+        bad = await client.post("/api/v1/assess", params={"fields": "confidence,bogus"}, json=payload())
+        assert bad.status_code == 400
+        assert bad.json()["detail"]["unknown"] == ["bogus"]
+
+
+@pytest.mark.anyio
+async def test_use_llm_false_never_calls_llm(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM called")
+    monkeypatch.setattr(assessment_service.llm_service, "process_both_others_inputs", fail)
+
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.post("/api/v1/assess", params={"use_llm": "false"}, json=valid_payload())
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["primary_imbalance"]["hormone"]
+
+        quick = valid_payload()
+        quick["use_llm"] = False
+        resp = await client.post("/api/v1/assess/quick", json=quick)
+        assert resp.status_code == 200, resp.text
+        assert set(resp.json()) == {"primary_hormone", "direction", "confidence", "score"}
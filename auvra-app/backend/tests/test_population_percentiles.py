@@ -0,0 +1,136 @@
+import sys, os
+import bisect
+import contextlib
+import io
+import random
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.assessment_service import AssessmentService
+from services.assessment_store import MemoryAssessmentBackend, SQLiteAssessmentBackend
+from services.population_percentiles import PopulationPercentiles
+from services.quantile_sketch import KLLSketch
+from tests.test_thread_safety import random_request
+
+
+def exact_below(values, score):
+    return bisect.bisect_left(values, score) / len(values)
+
+
+def test_sketch_ranks_stay_within_error_and_merge():
+    rng = random.Random(7)
+    values = [rng.randint(0, 60) for _ in range(50_000)]
+    whole = KLLSketch.from_values(values)
+    halves = KLLSketch.from_values(values[:20_000])
+    halves.merge(KLLSketch.from_values(values[20_000:]))
+    restored = KLLSketch.from_dict(whole.to_dict())
+
+    ordered = sorted(values)
+    for sketch in (whole, halves, restored):
+        assert sketch.n == len(values)
+        assert sum(weight for _, weight in sketch.weighted_items()) == len(values)
+        assert sum(len(items) for items in sketch.levels) < 1000
+        for score in range(0, 61, 5):
+            assert abs(sketch.rank(score) / len(values) - exact_below(ordered, score)) < 0.02
+
+
+def test_percentiles_wait_for_min_population_and_sync():
+    population = PopulationPercentiles(min_population=50)
+    for score in range(40):
+        population.record({"thyroid": score})
+    population.sync()
+    assert population.percentile("thyroid", 20) is None  # too few assessments to rank against
+
+    for score in range(40, 100):
+        population.record({"thyroid": score})
+    assert population.percentile("thyroid", 20) is None  # answers change on sync only
+    population.sync()
+    assert population.percentile("thyroid", 20) == 20
+    assert population.percentile("thyroid", -5) == 0
+    assert population.percentile("thyroid", 500) == 100
+    assert population.percentile("cortisol", 10) is None
+    assert population.stats()["population"] == 100
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryAssessmentBackend(),
+    lambda tmp_path: SQLiteAssessmentBackend(str(tmp_path / "population.db")),
+])
+def test_workers_share_shards_and_absorb_stopped_ones(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    first = PopulationPercentiles(backend, interval=0, stale_after=3600, min_population=1)
+    second = PopulationPercentiles(backend, interval=0, stale_after=3600, min_population=1)
+    for score in range(0, 50):
+        first.record({"androgens": score})
+    for score in range(50, 100):
+        second.record({"androgens": score})
+    first.sync()
+    second.sync()
+    first.sync()
+    for worker in (first, second):
+        assert worker.stats()["population"] == 100
+        assert worker.stats()["shards"] == 2
+        assert worker.percentile("androgens", 50) == 50
+
+    # A new worker treats both shards as stale and absorbs them exactly once
+    third = PopulationPercentiles(backend, interval=0, stale_after=0, min_population=1)
+    third.sync()
+    assert [shard.shard for shard in backend.load_sketches()] == [third.shard]
+    assert third.stats()["population"] == 100
+    third.sync()
+    assert third.stats()["population"] == 100
+
+    # The absorbed worker notices and starts over instead of double counting
+    with contextlib.redirect_stdout(io.StringIO()):
+        first.sync()
+    first.sync()
+    third.sync()
+    assert third.stats()["population"] == 100
+
+
+class RecordingWhileSaving(MemoryAssessmentBackend):
+    """Records one more assessment on `worker` while each of its shard saves is in flight"""
+    worker = None
+
+    def save_sketch(self, shard, *args, **kwargs):
+        if self.worker is not None and shard == self.worker.shard:
+            self.worker.record({"androgens": 1000})
+        return super().save_sketch(shard, *args, **kwargs)
+
+
+def test_absorbed_worker_keeps_assessments_recorded_after_its_last_save():
+    backend = RecordingWhileSaving()
+    first = backend.worker = PopulationPercentiles(backend, interval=0, stale_after=3600, min_population=1)
+    for score in range(50):
+        first.record({"androgens": score})
+    first.sync()  # saves 50; 1 more arrives during the save
+    third = PopulationPercentiles(backend, interval=0, stale_after=0, min_population=1)
+    third.sync()  # absorbs the saved 50
+
+    for score in range(50, 60):
+        first.record({"androgens": score})
+    with contextlib.redirect_stdout(io.StringIO()):
+        first.sync()  # finds its shard absorbed: drops the 50, keeps the 11 since and 1 more
+    backend.worker = None
+    first.sync()
+    third.stale_after = 3600
+    third.sync()
+    assert first.stats()["population"] == third.stats()["population"] == 50 + 1 + 10 + 1
+    assert third.stats()["shards"] == 2
+
+
+def test_assessments_are_annotated_and_recorded():
+    population = PopulationPercentiles(min_population=20)
+    service = AssessmentService(gemini_api_key=None, population=population)
+    rng = random.Random(3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = service.process_complete_assessment(random_request(rng))
+        for _ in range(30):
+            service.process_complete_assessment(random_request(rng))
+        population.sync()
+        after = service.process_complete_assessment(random_request(rng))
+
+    assert all(score.population_percentile is None for score in before.all_hormone_scores.values())
+    assert population.stats()["population"] == 31
+    for hormone, score in after.all_hormone_scores.items():
+        assert score.population_percentile == population.percentile(hormone, score.total)
+        assert 0 <= score.population_percentile <= 100
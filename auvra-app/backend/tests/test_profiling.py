@@ -0,0 +1,116 @@
+import sys, os
+import time
+import pstats
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import app as app_module
+from app import app
+from services.profiling import ProfileCapture, ProfilerBusy
+from tests.test_content_refs import payload
+
+ADMIN = {"Authorization": "Bearer test-admin-token"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "test-admin-token")
+    monkeypatch.setattr(app_module, "profile_capture", ProfileCapture())
+
+
+def slow_step():
+    time.sleep(0.05)
+    return "done"
+
+
+def test_sample_mode_collects_collapsed_stacks():
+    capture = ProfileCapture(sample_interval=0.001)
+    assert capture.run(slow_step) == "done"  # idle: not profiled
+    capture.start("sample", assessments=1)
+    with pytest.raises(ProfilerBusy):
+        capture.start("cprofile", seconds=1)
+
+    assert capture.run(slow_step) == "done"
+    assert not capture.capturing
+    status = capture.status()
+    assert status["state"] == "done" and status["profiled"] == 1 and status["samples"] > 10
+
+    result = capture.result()
+    assert result.filename.endswith(".folded")
+    lines = result.body.decode().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("slow_step (test_profiling.py:")
+    assert int(count) > 10
+
+
+def test_cprofile_mode_profiles_one_assessment_at_a_time():
+    capture = ProfileCapture()
+    capture.start("cprofile", assessments=2)
+    overlapping = []
+
+    def assessment():
+        # Runs while this one is profiled: must not start a second profiler
+        overlapping.append(capture.run(slow_step))
+        overlapping.append(capture.status()["running"])
+        return slow_step()
+
+    assert capture.run(assessment) == "done"
+    assert overlapping == ["done", 1]
+    assert capture.status()["profiled"] == 1 and capture.capturing
+    assert capture.run(slow_step) == "done"
+    assert capture.status()["state"] == "done" and capture.status()["profiled"] == 2
+
+
+def test_time_boxed_capture_ends_without_traffic():
+    capture = ProfileCapture()
+    capture.start("cprofile", seconds=0.01)
+    assert capture.result() is None
+    time.sleep(0.02)
+    assert capture.status()["state"] == "done"
+    assert capture.run(slow_step) == "done"
+    assert capture.status()["profiled"] == 0
+
+
+@pytest.mark.anyio
+async def test_admin_profile_endpoint_captures_next_assessments(admin_token, tmp_path):
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        assert (await client.post("/api/v1/admin/profile", params={"assessments": 2})).status_code == 401
+        wrong = {"Authorization": "Bearer nope"}
+        assert (await client.post("/api/v1/admin/profile", params={"assessments": 2}, headers=wrong)).status_code == 401
+        assert (await client.post("/api/v1/admin/profile", headers=ADMIN)).status_code == 400
+
+        started = await client.post("/api/v1/admin/profile", params={"assessments": 2}, headers=ADMIN)
+        assert started.status_code == 202 and started.json()["state"] == "capturing"
+        busy = await client.post("/api/v1/admin/profile", params={"seconds": 5}, headers=ADMIN)
+        assert busy.status_code == 409
+        assert (await client.get("/api/v1/admin/profile/download", headers=ADMIN)).status_code == 409
+
+        for _ in range(3):
+            assert (await client.post("/api/v1/assess", json=payload())).status_code == 200
+        status = (await client.get("/api/v1/admin/profile", headers=ADMIN)).json()
+        assert status["state"] == "done" and status["profiled"] == 2
+
+        resp = await client.get("/api/v1/admin/profile/download", headers=ADMIN)
+        assert resp.status_code == 200
+        assert resp.headers["content-disposition"].startswith('attachment; filename="profile-')
+        path = tmp_path / "assess.pstats"
+        path.write_bytes(resp.content)
+        stats = pstats.Stats(str(path))
+        calls = {func[2]: counts[1] for func, counts in stats.stats.items()}
+        assert calls["process_complete_assessment"] == 2
+
+
+@pytest.mark.anyio
+async def test_admin_endpoints_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", None)
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.get("/api/v1/admin/profile", headers=ADMIN)
+        assert resp.status_code == 403
@@ -0,0 +1,65 @@
+import sys, os
+import copy
+import contextlib
+import io
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from benchmarks.payloads import PayloadGenerator
+from benchmarks.replay import diff_outputs, record_corpus, replay_corpus, report, shift_dates
+from benchmarks.suite import STUB_LLM_RESPONSE
+from services.assessment_service import AssessmentService
+
+
+def corpus(count=6):
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AssessmentService(gemini_api_key=None)  # "others" answered by the rule-based fallback
+    payloads = PayloadGenerator(5, free_text_rate=1.0, history_rate=1.0).payloads(count)
+    return record_corpus(payloads, service, workers=0, repeat=1)
+
+
+def test_diff_and_date_shift():
+    golden = {"a": {"b": [1, 2.0, "x"], "c": "2026-01-31"}, "gone": 1}
+    actual = {"a": {"b": [1, 2.0000000000001, "y", 4], "c": "2026-01-31"}, "new": True}
+    assert diff_outputs(golden, actual, ignore=()) == [
+        ("a.b[2]", "x", "y"), ("a.b[3]", "<missing>", 4), ("gone", 1, "<missing>"), ("new", "<missing>", True)
+    ]
+    assert diff_outputs(golden, actual, ignore=("a.b", "gone", "new")) == []
+    assert diff_outputs({"n": 1}, {"n": True}, ignore=()) == [("n", 1, True)]
+    assert shift_dates({"d": ["2026-01-31", "note 2026-01-31"], "n": 3}, 1) == {"d": ["2026-02-01", "note 2026-01-31"], "n": 3}
+
+
+def test_replay_of_a_fresh_recording_is_identical_even_days_later():
+    records = corpus()
+    assert all(record["latency_ms"] > 0 for record in records)
+    assert any(any(record["llm_responses"]) for record in records)
+
+    # As if recorded 40 days ago
+    earlier = (date.fromisoformat(records[0]["recorded_on"]) - timedelta(days=40)).isoformat()
+    aged = [{**shift_dates(record, -40), "recorded_on": earlier} for record in records]
+    assert aged[0]["request"]["cycle_details"] != records[0]["request"]["cycle_details"]
+    results = replay_corpus(aged, workers=0, repeat=1)
+    summary = report(results)
+    assert summary["identical"] == len(records) and summary["differing"] == 0
+    assert set(summary["latency_ms"]) >= {"recorded_median", "replay_median", "delta_median", "delta_p95"}
+
+    # Runs the same in worker processes
+    assert report(replay_corpus(records[:3], workers=2, repeat=1))["identical"] == 3
+
+
+def test_replay_reports_changed_fields_and_llm_answers():
+    records = corpus()
+    changed = copy.deepcopy(records)
+    changed[0]["golden"]["confidence"]["level"] = "certain"
+    with_llm = next(i for i, record in enumerate(changed) if i and any(record["llm_responses"]))
+    changed[with_llm]["llm_responses"] = [
+        STUB_LLM_RESPONSE.model_dump(mode="json") if answer is not None else None
+        for answer in changed[with_llm]["llm_responses"]
+    ]
+
+    summary = report(replay_corpus(changed, workers=0, repeat=1))
+    assert summary["errors"] == [] and summary["differing"] == 2
+    assert summary["fields"]["confidence.level"] >= 1
+    assert any(example["id"] == changed[0]["id"] and example["diffs"][0]["replay"] != "certain"
+               for example in summary["examples"])
+    differing_ids = {example["id"] for example in summary["examples"]}
+    assert changed[with_llm]["id"] in differing_ids
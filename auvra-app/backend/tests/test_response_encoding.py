@@ -0,0 +1,118 @@
+import sys, os
+import contextlib
+import io
+import json
+import httpx
+from httpx import ASGITransport
+import cbor2
+import msgpack
+import pytest
+from fastapi.responses import JSONResponse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app
+from benchmarks.payloads import PayloadGenerator
+from models.schemas import CycleContext
+from services.assessment_service import AssessmentService
+from services.response_encoding import json_bytes, model_json, negotiate
+from tests.test_content_refs import payload
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def rendered_before(body: bytes) -> bytes:
+    """What JSONResponse made of the same content"""
+    return JSONResponse(json.loads(body)).body
+
+
+def test_encoders_match_json_response_for_generated_assessments():
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AssessmentService(gemini_api_key=None)
+        generator = PayloadGenerator(21, free_text_rate=0.5, labs_rate=0.5, history_rate=0.7)
+        responses = [service.process_complete_assessment(generator.request()) for _ in range(60)]
+    assert any(response.cycle_context.cycle_length_std is not None for response in responses)
+    for response in responses:
+        expected = JSONResponse(response.model_dump(mode="json")).body
+        assert model_json(response) == expected
+        assert json_bytes(response.model_dump(mode="json")) == expected
+
+
+def test_strings_and_rounded_floats_encode_like_json_response():
+    text = 'Zoë "quoted" back\\slash / tab\t nul\x00 \x7f   😀 日本'
+    for tenths in range(0, 2000, 7):
+        context = CycleContext(current_phase=text, phase_confidence="low",
+                               cycle_length_mean=round(tenths / 10, 1), cycle_length_std=-tenths / 10)
+        assert model_json(context) == JSONResponse(context.model_dump(mode="json")).body
+        assert json_bytes(context.model_dump(mode="json")) == JSONResponse(context.model_dump(mode="json")).body
+
+
+@pytest.mark.anyio
+async def test_assess_replies_are_byte_compatible():
+    data = payload()
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        data["user_id"] = (await client.post("/api/v1/users")).json()["user_id"]  # echoed in assessment_metadata
+        for params in ({}, {"content": "refs"}, {"detail": "scores"}, {"fields": "confidence,primary_hormone"}):
+            resp = await client.post("/api/v1/assess", params=params, json=data)
+            assert resp.status_code == 200, resp.text
+            assert resp.headers["content-type"] == "application/json"
+            assert resp.content == rendered_before(resp.content)
+        assert resp.json()["primary_hormone"]
+
+        full = await client.post("/api/v1/assess", json=data)
+        assert full.json()["assessment_metadata"]["user_id"] == data["user_id"]
+        stored = await client.get(f"/api/v1/assessments/{full.json()['assessment_metadata']['assessment_id']}")
+        assert stored.content == full.content
+
+
+def test_negotiate():
+    assert negotiate(None) == negotiate("*/*") == negotiate("text/html") == "application/json"
+    assert negotiate("application/msgpack") == negotiate("application/x-msgpack") == "application/msgpack"
+    assert negotiate("application/json;q=0.5, application/cbor") == "application/cbor"
+    assert negotiate("application/cbor, application/msgpack") == "application/cbor"
+    assert negotiate("application/msgpack;q=0, */*;q=0.1") == "application/json"
+    assert negotiate("application/msgpack;q=oops, application/json;q=0.2") == "application/json"
+
+
+def without_ids(body):
+    return {**body, "assessment_metadata": {
+        key: value for key, value in body["assessment_metadata"].items() if key not in ("assessment_id", "user_id")
+    }}
+
+
+@pytest.mark.anyio
+async def test_assess_replies_in_msgpack_and_cbor():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        as_json = (await client.post("/api/v1/assess", json=payload())).json()
+        for accept, decode in (("application/msgpack", msgpack.unpackb), ("application/cbor", cbor2.loads)):
+            resp = await client.post("/api/v1/assess", json=payload(), headers={"Accept": accept})
+            assert resp.status_code == 200 and resp.headers["content-type"] == accept
+            assert resp.headers["vary"] == "Accept"
+            assert len(resp.content) < len(json.dumps(as_json))
+            assert without_ids(decode(resp.content)) == without_ids(as_json)
+
+        partial = await client.post("/api/v1/assess", params={"fields": "confidence"}, json=payload(),
+                                    headers={"Accept": "application/cbor"})
+        assert cbor2.loads(partial.content) == {"confidence": as_json["confidence"]}
+
+        # Stored assessments: transcoded, one ETag per representation
+        assessment_id = as_json["assessment_metadata"]["assessment_id"]
+        url = f"/api/v1/assessments/{assessment_id}"
+        stored_json = await client.get(url)
+        stored = await client.get(url, headers={"Accept": "application/msgpack"})
+        assert msgpack.unpackb(stored.content) == as_json
+        assert stored.headers["etag"] != stored_json.headers["etag"]
+        cached = await client.get(url, headers={"Accept": "application/msgpack", "If-None-Match": stored.headers["etag"]})
+        assert cached.status_code == 304
+        refetched = await client.get(url, headers={"Accept": "application/cbor", "If-None-Match": stored.headers["etag"]})
+        assert refetched.status_code == 200 and cbor2.loads(refetched.content) == as_json
+
+        # An Idempotency-Key retry must ask for the same encoding
+        headers = {"Idempotency-Key": "encoding-test"}
+        first = await client.post("/api/v1/assess", json=payload(), headers=headers)
+        assert first.status_code == 200
+        other = await client.post("/api/v1/assess", json=payload(), headers={**headers, "Accept": "application/msgpack"})
+        assert other.status_code == 422
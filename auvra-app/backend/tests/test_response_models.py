@@ -0,0 +1,46 @@
+import sys, os
+import warnings
+import pytest
+from pydantic import ValidationError
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from benchmarks.payloads import PayloadGenerator
+from models.schemas import AssessmentResponse, LLMScoringResponse
+from services.assessment_service import AssessmentService
+
+
+def test_responses_round_trip_without_serializer_warnings():
+    service = AssessmentService(gemini_api_key=None)
+    generator = PayloadGenerator(8, free_text_rate=0.5, labs_rate=0.5, history_rate=0.5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # a stage producing a wrong type shows up as a serializer warning
+        responses = [service.process_complete_assessment(generator.request()) for _ in range(40)]
+        dumps = [response.model_dump(mode="json") for response in responses]
+    assert any(dump["cycle_context"]["cycles_observed"] for dump in dumps)
+    assert any(dump["conflicts"] for dump in dumps)
+    for response in responses:
+        assert AssessmentResponse.model_validate(response.model_dump()) == response
+
+
+def test_responses_do_not_share_the_cached_recommendations():
+    service = AssessmentService(gemini_api_key=None)
+    request = PayloadGenerator(2).request()
+    first = service.process_complete_assessment(request).primary_imbalance
+    first.recommendations[next(iter(first.recommendations))].append("mutated")
+    first.contributing_factors.append("mutated")
+    second = service.process_complete_assessment(request).primary_imbalance
+    assert "mutated" not in str(second.recommendations) and "mutated" not in second.contributing_factors
+
+
+def test_llm_response_validators():
+    impact = {"hormone": "insulin", "direction": "high", "score_weight": 2,
+              "reasoning": "Reported condition is commonly linked to insulin resistance"}
+    response = {"hormone_impacts": [impact], "overall_confidence": "medium", "needs_medical_review": False}
+    assert LLMScoringResponse.model_validate(response).hormone_impacts[0].score_weight == 2
+
+    for invalid in (
+        {**response, "hormone_impacts": [impact, impact]},  # same hormone twice
+        {**response, "hormone_impacts": [{**impact, "reasoning": "too short really"}]},
+        {**response, "unexpected": True},  # extra fields are rejected
+    ):
+        with pytest.raises(ValidationError):
+            LLMScoringResponse.model_validate(invalid)
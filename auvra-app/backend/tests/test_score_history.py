@@ -0,0 +1,132 @@
+import sys, os
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app import app, assessment_store
+from services.assessment_store import MemoryAssessmentBackend, PendingAssessment, SQLiteAssessmentBackend
+from services.score_history import HistorySummary, choose_resolution, history_bucket
+from tests.test_assess import valid_payload
+
+HORMONES = ("androgens", "thyroid", "cortisol")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def synthetic_history(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(count):
+        user_id = "u1" if i % 5 else "u2"
+        at = (start + timedelta(minutes=rng.randint(0, 700 * 24 * 60))).isoformat()
+        scores = {h: rng.randint(0, 20) for h in HORMONES}
+        records.append(PendingAssessment(f"a{i:04d}", user_id, at, "{}", b"{}", scores))
+    return records
+
+
+def all_pages(backend, user_id, resolution, limit):
+    points, before = [], None
+    while True:
+        page = backend.score_history(user_id, resolution, before, limit)
+        points.extend(page)
+        if len(page) < limit:
+            return points
+        before = page[-1].key
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryAssessmentBackend(),
+    lambda tmp_path: SQLiteAssessmentBackend(str(tmp_path / "history.db")),
+])
+def test_history_pages_and_rollups(tmp_path, make_backend):
+    backend = make_backend(tmp_path)
+    records = synthetic_history(300)
+    for i in range(0, len(records), 37):
+        backend.write_batch(records[i:i + 37])
+    backend.write_batch(records[:10])  # re-written records are not counted twice
+
+    mine = sorted((r for r in records if r.user_id == "u1"), key=lambda r: (r.created_at, r.assessment_id))
+    assert backend.history_summary("u1") == HistorySummary(len(mine), mine[0].created_at, mine[-1].created_at)
+    assert backend.history_summary("nobody") is None
+
+    raw = all_pages(backend, "u1", "raw", 50)
+    assert [p.assessment_id for p in raw] == [r.assessment_id for r in reversed(mine)]
+    assert raw[0].scores["thyroid"][0] == mine[-1].hormone_scores["thyroid"]
+
+    weeks = defaultdict(list)
+    for r in mine:
+        weeks[history_bucket(r.created_at, "week")].append(r.hormone_scores["androgens"])
+    rollups = all_pages(backend, "u1", "week", 20)
+    assert [p.at for p in rollups] == sorted(weeks, reverse=True)
+    for point in rollups:
+        totals = weeks[point.at]
+        assert point.count == len(totals)
+        assert point.scores["androgens"] == (round(sum(totals) / len(totals), 2), min(totals), max(totals))
+
+    months = all_pages(backend, "u1", "month", 100)
+    assert sum(p.count for p in months) == len(mine)
+
+
+def test_choose_resolution():
+    assert choose_resolution(HistorySummary(80, "2024-01-01T00:00", "2025-06-01T00:00"), 100) == "raw"
+    assert choose_resolution(HistorySummary(500, "2024-01-01T00:00", "2025-06-01T00:00"), 100) == "week"
+    assert choose_resolution(HistorySummary(5000, "2015-01-01T00:00", "2025-06-01T00:00"), 100) == "month"
+
+
+@pytest.mark.anyio
+async def test_user_score_endpoint():
+    payload = valid_payload()
+    payload["diagnosed_conditions"]["others_input"] = None
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        issued = await client.post("/api/v1/users")
+        assert issued.status_code == 201
+        user_id = payload["user_id"] = issued.json()["user_id"]
+        created = [(await client.post("/api/v1/assess", json=payload)).json() for _ in range(3)]
+        assessment_store.flush()
+
+        url = f"/api/v1/users/{user_id}/scores"
+        assert (await client.get(url)).json()["resolution"] == "raw"  # auto: the whole history fits
+        first = (await client.get(url, params={"resolution": "raw", "limit": 2, "hormones": "androgens,thyroid"})).json()
+        assert first["resolution"] == "raw" and first["total_assessments"] == 3
+        assert set(first["series"]) == {"androgens", "thyroid"}
+        ids = [p["assessment_id"] for p in first["series"]["androgens"]]
+        assert ids == [c["assessment_metadata"]["assessment_id"] for c in created[1:]]  # newest page, oldest first
+        assert first["series"]["thyroid"][0]["score"] == created[1]["all_hormone_scores"]["thyroid"]["total"]
+
+        older = (await client.get(url, params={"limit": 2, "cursor": first["next_cursor"]})).json()
+        assert [p["assessment_id"] for p in older["series"]["androgens"]] == \
+            [created[0]["assessment_metadata"]["assessment_id"]]
+        assert older["next_cursor"] is None
+
+        weekly = (await client.get(url, params={"resolution": "week"})).json()
+        assert weekly["series"]["androgens"][0]["count"] == 3
+
+        assert (await client.get(url, params={"hormones": "bogus"})).status_code == 400
+        assert (await client.get(url, params={"cursor": "raw:no-separator"})).status_code == 400
+        fresh = (await client.post("/api/v1/users")).json()["user_id"]
+        empty = (await client.get(f"/api/v1/users/{fresh}/scores")).json()
+        assert empty["total_assessments"] == 0 and empty["series"]["androgens"] == []
+
+
+@pytest.mark.anyio
+async def test_score_history_needs_an_issued_user_id():
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        user_id = (await client.post("/api/v1/users")).json()["user_id"]
+        token, _, signature = user_id.rpartition(".")
+        flipped = signature[:-1] + ("1" if signature[-1] == "0" else "0")
+        for forged in ("u1", f"other{token}.{signature}", f"{token}.{flipped}"):
+            assert (await client.get(f"/api/v1/users/{forged}/scores")).status_code == 404
+            # Nor can anyone add points to (or read cycle statistics from) a history they were not issued
+            for path in ("/api/v1/assess", "/api/v1/assess/stream"):
+                resp = await client.post(path, json={**valid_payload(), "user_id": forged})
+                assert resp.status_code == 403 and resp.json()["detail"]["error"] == "Unknown user_id"
+        assert (await client.get(f"/api/v1/users/{user_id}/scores")).status_code == 200
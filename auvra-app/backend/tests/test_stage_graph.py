@@ -0,0 +1,84 @@
+import sys, os
+import contextlib
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from services.assessment_pipeline import PipelineError, Stage, StageStats, check_stages, run_stages
+from services.assessment_service import AssessmentService
+from tests.test_thread_safety import comparable, random_request
+
+
+def sleeper(output, seconds=0.2):
+    def run(context):
+        time.sleep(seconds)
+        return {output: context["request"]}
+    return run
+
+
+def test_independent_stages_run_concurrently_and_are_timed():
+    stages = [
+        Stage("a", ("request",), ("a",), sleeper("a"), blocking=True),
+        Stage("b", ("request",), ("b",), sleeper("b"), blocking=True),
+        Stage("c", ("request",), ("c",), sleeper("c"), blocking=True),
+        Stage("join", ("a", "b", "c"), ("joined",), lambda ctx: {"joined": (ctx["a"], ctx["b"], ctx["c"])}),
+    ]
+    stats = StageStats()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        started = time.perf_counter()
+        context = run_stages(stages, {"request": 1}, executor=pool, stats=stats)
+        elapsed = time.perf_counter() - started
+
+    assert context["joined"] == (1, 1, 1)
+    assert elapsed < 0.5  # three blocking 0.2s stages overlap
+    assert set(context["stage_timings"]) == {"a", "b", "c", "join"}
+    assert context["stage_timings"]["a"] >= 200
+    assert stats.snapshot()["b"]["calls"] == 1
+
+
+def test_stage_declarations_are_checked():
+    noop = lambda ctx: {}
+    with pytest.raises(PipelineError):
+        check_stages([Stage("a", ("request",), ("x",), noop), Stage("b", ("request",), ("x",), noop)])
+    with pytest.raises(PipelineError):
+        check_stages([Stage("a", ("missing",), ("x",), noop)])
+    with pytest.raises(PipelineError):
+        run_stages([Stage("a", ("request",), ("x",), noop)], {"request": 1})
+
+
+def test_plugged_in_stage_runs_without_orchestrator_changes():
+    service = AssessmentService(gemini_api_key=None)
+    service.add_stage(Stage(
+        "top_two",
+        ("all_hormone_scores",),
+        ("top_two",),
+        lambda ctx: {"top_two": sorted(ctx["all_hormone_scores"], key=lambda h: -ctx["all_hormone_scores"][h].total)[:2]}
+    ))
+    with pytest.raises(PipelineError):
+        service.add_stage(Stage("again", ("request",), ("confidence",), lambda ctx: {}))
+
+    request = random_request(random.Random(3))
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = service.assess_outputs(request, ("top_two",))
+        full = service.process_complete_assessment(request)
+
+    scores = full.all_hormone_scores
+    assert outputs["top_two"] == sorted(scores, key=lambda h: -scores[h].total)[:2]
+    assert "next_steps" not in outputs and "top_two" in outputs["stage_timings"]
+
+
+def test_stage_pool_matches_inline_scheduling():
+    rng = random.Random(5)
+    requests = [random_request(rng) for _ in range(20)]
+    for request in requests[::2]:
+        request.diagnosed_conditions.others_input = "PCOS"
+    inline = AssessmentService(gemini_api_key=None, stage_workers=0)
+    pooled = AssessmentService(gemini_api_key=None, stage_workers=2)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for request in requests:
+            assert comparable(pooled.process_complete_assessment(request)) == \
+                comparable(inline.process_complete_assessment(request))
+    assert pooled.stage_stats.snapshot()["llm_others"]["calls"] == len(requests)
@@ -0,0 +1,67 @@
+import sys, os
+import contextlib
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from models.schemas import (
+    CompleteAssessmentRequest, CycleDetailsRequest, DiagnosedConditionsRequest,
+    HealthConcernsRequest, PeriodPatternRequest
+)
+from services.assessment_service import AssessmentService
+from services.counterfactual_analyzer import CONCERN_CATEGORIES, _literal_values
+
+
+def random_request(rng: random.Random) -> CompleteAssessmentRequest:
+    concerns = {
+        category: rng.sample(values, rng.randint(0, min(3, len(values))))
+        for category in CONCERN_CATEGORIES
+        for values in [_literal_values(HealthConcernsRequest, category)]
+    }
+    selected = [c for values in concerns.values() for c in values]
+    labs = None
+    if rng.random() < 0.5:
+        labs = {"tsh": round(rng.uniform(0.5, 6), 1), "fasting_insulin": round(rng.uniform(3, 25), 1),
+                "total_testosterone": round(rng.uniform(15, 90), 1)}
+    return CompleteAssessmentRequest(**{
+        "basic_info": {"name": "Stress", "age": rng.randint(18, 40)},
+        "period_pattern": {
+            "period_pattern": rng.choice(_literal_values(PeriodPatternRequest, "period_pattern")),
+            "birth_control": rng.choice(_literal_values(PeriodPatternRequest, "birth_control")),
+        },
+        "cycle_details": {
+            "last_period_date": (date.today() - timedelta(days=rng.randint(0, 40))).isoformat(),
+            "date_not_sure": rng.random() < 0.1,
+            "cycle_length": rng.choice(_literal_values(CycleDetailsRequest, "cycle_length")),
+        },
+        "health_concerns": concerns,
+        "top_concern": {"top_concern": rng.choice(selected) if selected else "none"},
+        "diagnosed_conditions": {
+            "conditions": rng.sample(_literal_values(DiagnosedConditionsRequest, "conditions"), rng.randint(0, 2))
+        },
+        "lab_results": labs,
+    })
+
+
+def comparable(response):
+    data = response.model_dump()
+    data["assessment_metadata"].pop("user_id")  # random per request when no user_id is given
+    data["assessment_metadata"].pop("assessment_id")
+    return data
+
+
+def test_shared_service_is_thread_safe():
+    service = AssessmentService(gemini_api_key=None)
+    rng = random.Random(7)
+    requests = [random_request(rng) for _ in range(40)]
+    jobs = [i for i in range(len(requests)) for _ in range(5)]
+    rng.shuffle(jobs)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [comparable(service.process_complete_assessment(r)) for r in requests]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: comparable(service.process_complete_assessment(requests[i])), jobs))
+
+    for i, result in zip(jobs, results):
+        assert result == expected[i]
@@ -0,0 +1,138 @@
+import sys, os
+import json
+from types import SimpleNamespace
+import httpx
+from httpx import ASGITransport
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import app as app_module
+from app import app
+from services.assessment_pipeline import plan_stages
+from services.assessment_service import RESPONSE_FIELDS
+from services.tracing import (
+    FileSpanExporter, MemorySpanExporter, SpanKind, StatusCode, Tracer, parse_traceparent
+)
+from tests.test_assess import valid_payload
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def exporter():
+    """Trace every request of the app into memory for the test"""
+    tracer = app_module.tracer
+    saved = tracer.exporter, tracer.sample_rate
+    tracer.exporter, tracer.sample_rate = MemorySpanExporter(), 1.0
+    yield tracer.exporter
+    tracer.exporter, tracer.sample_rate = saved
+
+
+class FakeGemini:
+    def generate_content(self, prompt):
+        usage = SimpleNamespace(prompt_token_count=1200, candidates_token_count=85, total_token_count=1285)
+        return SimpleNamespace(text="not json", usage_metadata=usage)
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID.upper()}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+@pytest.mark.anyio
+async def test_assess_request_is_traced_under_incoming_parent(exporter):
+    llm_service = app_module.assessment_service.llm_service
+    saved_model = llm_service.model
+    llm_service.model = FakeGemini()
+    try:
+        transport = ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            resp = await client.post(
+                "/api/v1/assess", json=valid_payload(),
+                headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+            )
+    finally:
+        llm_service.model = saved_model
+    assert resp.status_code == 200
+
+    spans = {span.name: span for span in exporter.spans}
+    assert {span.trace_id for span in exporter.spans} == {TRACE_ID}
+
+    server = spans["POST /api/v1/assess"]
+    assert server.parent_id == PARENT_ID and server.kind == SpanKind.SERVER
+    assert server.attributes["http.status_code"] == 200
+
+    pipeline = spans["pipeline"]
+    assert pipeline.parent_id == server.span_id
+    stages = plan_stages(app_module.assessment_service.stages, RESPONSE_FIELDS)
+    assert {span.name for span in exporter.spans if span.parent_id == pipeline.span_id} == \
+        {stage.name for stage in stages}
+
+    llm = spans["llm.generate_content"]
+    assert llm.kind == SpanKind.CLIENT and llm.parent_id == spans["llm_others"].span_id
+    assert llm.attributes["llm.prompt_chars"] > 1000
+    assert llm.attributes["gen_ai.usage.input_tokens"] == 1200
+    assert llm.attributes["gen_ai.usage.output_tokens"] == 85
+
+    lookups = [span for span in exporter.spans if span.name == "cache.explanations"]
+    assert lookups and all(span.parent_id == spans["imbalances"].span_id for span in lookups)
+    assert all(isinstance(span.attributes["cache.hit"], bool) for span in lookups)
+    assert all(span.end_ns >= span.start_ns for span in exporter.spans)
+
+
+@pytest.mark.anyio
+async def test_unsampled_and_disabled_requests_produce_no_spans(exporter):
+    transport = ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        resp = await client.get("/api/v1/assessments/missing", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        assert resp.status_code == 404
+        assert exporter.spans == []
+
+        app_module.tracer.sample_rate = 0.0
+        await client.get("/api/v1/assessments/missing")
+        assert exporter.spans == []
+
+        # A sampled parent is followed whatever the local rate
+        await client.get("/api/v1/assessments/missing", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        names = [span.name for span in exporter.spans]
+        assert names == ["store.get_response", "GET /api/v1/assessments/{assessment_id}"]
+        assert exporter.spans[0].attributes["store.found"] is False
+
+        app_module.tracer.exporter = None
+        await client.get("/api/v1/assessments/missing", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        assert len(names) == 2 and len(exporter.spans) == 2
+
+
+def test_file_exporter_writes_otlp_json_lines(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(FileSpanExporter(str(path), flush_interval=60), sample_rate=1.0)
+    with tracer.start_trace("POST /api/v1/assess") as root:
+        with root.child("scoring", {"stage.blocking": False, "hormones": 6}):
+            pass
+        try:
+            with root.child("llm", kind=SpanKind.CLIENT):
+                raise TimeoutError("gemini")
+        except TimeoutError:
+            pass
+    tracer.close()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    resource_spans = json.loads(lines[0])["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "auvra-api"}}]
+    spans = {span["name"]: span for span in resource_spans["scopeSpans"][0]["spans"]}
+    assert spans["scoring"]["parentSpanId"] == spans["POST /api/v1/assess"]["spanId"]
+    assert "parentSpanId" not in spans["POST /api/v1/assess"]
+    assert {"key": "hormones", "value": {"intValue": "6"}} in spans["scoring"]["attributes"]
+    assert {"key": "stage.blocking", "value": {"boolValue": False}} in spans["scoring"]["attributes"]
+    assert spans["llm"]["status"] == {"code": StatusCode.ERROR, "message": "gemini"}
+    assert int(spans["llm"]["endTimeUnixNano"]) >= int(spans["llm"]["startTimeUnixNano"])
+    assert tracer.stats()["exporter"]["exported"] == 3